@@ -5,6 +5,7 @@ Django settings for appb2b project.
 from pathlib import Path
 from datetime import timedelta
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -73,9 +74,39 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Saves that keep denormalized rows in step (testimonial ratings,
+        # portfolio stats) read and then write in one transaction, next to the
+        # background writers. SQLite's default deferred transactions fail such
+        # a read-then-write with "database is locked" at once rather than wait,
+        # so take the write lock when the transaction starts and wait for it.
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
+# Cache
+# The site content snapshots, content version stamps and the SiteSetting
+# registry stamp live here, so every worker must see the same cache. The
+# default file cache is shared by the workers of one host; deployments over
+# several hosts point this at a networked backend (e.g. Redis). A per-process
+# backend such as LocMemCache fails the core.W001 system check.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'appb2b-cache')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Seconds a site content snapshot outlives the content version it was rendered for
+SITE_CONTENT_SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+# Seconds a worker trusts its in-process SiteSetting registry before
+# comparing it against the shared version stamp
+SITE_SETTINGS_CHECK_INTERVAL = 1.0
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -107,6 +138,42 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Contact form ingestion: 'sync' inserts during the request, 'queued'
+# group-commits concurrent requests from a background flusher and answers
+# each once its batch is stored
+CONTACT_MESSAGE_INGESTION = os.environ.get('CONTACT_MESSAGE_INGESTION', 'sync')
+CONTACT_MESSAGE_FLUSH_INTERVAL = 0.5
+CONTACT_MESSAGE_BATCH_SIZE = 500
+# Longest a queued request waits for its batch before failing, in seconds
+CONTACT_MESSAGE_COMMIT_TIMEOUT = 10.0
+CONTACT_MESSAGE_DEDUPE_WINDOW = 60 * 60
+
+# Project page views are counted in memory and written every few seconds; a
+# killed worker loses the views of its last interval
+PROJECT_VIEWS_FLUSH_INTERVAL = 5.0
+# Least seconds between the content version bumps those flushes cause
+PROJECT_VIEWS_VERSION_INTERVAL = 60.0
+# ... and rolled up into daily buckets and the trending ranking every few minutes
+PROJECT_TRENDING_REFRESH_INTERVAL = 300.0
+# Portfolio stats are recomputed in the background after bulk project and
+# category writes; a refresh that fails is retried at this interval
+PORTFOLIO_STATS_RETRY_INTERVAL = 30.0
+
+# Real-time messaging push (see `messaging.push`). The in-process broker only
+# reaches clients connected to the same worker; multi-worker deployments need
+# a broker backend on a shared transport
+PUSH_BROKER = os.environ.get('PUSH_BROKER', 'core.broker.InProcessBroker')
+PUSH_MAX_PENDING_MESSAGES = 100
+PUSH_HEARTBEAT_INTERVAL = 25.0
+# Longest a `messaging/sync/?wait=` long-poll is held open, in seconds
+MESSAGING_SYNC_MAX_WAIT = 30.0
+
+# Static export of the public API (see `manage.py export_static_api`)
+STATIC_EXPORT_ROOT = BASE_DIR.parent / 'dist' / 'api'
+STATIC_EXPORT_BASE_URL = os.environ.get('STATIC_EXPORT_BASE_URL', 'http://localhost:8000')
+# Bookkeeping for incremental exports, kept out of the published directory
+STATIC_EXPORT_MANIFEST = BASE_DIR / 'static_export_manifest.json'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
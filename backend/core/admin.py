@@ -1,16 +1,24 @@
 from django.contrib import admin
 from .models import (
-    SiteSetting, HeroSection, Service, TeamMember, 
+    SiteSetting, Technology, HeroSection, Service, TeamMember, 
     AboutSection, ContactInfo, ContactMessage
 )
 
 
 @admin.register(SiteSetting)
 class SiteSettingAdmin(admin.ModelAdmin):
-    list_display = ['key', 'value', 'description']
+    list_display = ['key', 'value', 'value_type', 'description']
+    list_filter = ['value_type']
     search_fields = ['key', 'value', 'description']
 
 
+@admin.register(Technology)
+class TechnologyAdmin(admin.ModelAdmin):
+    list_display = ['name', 'key']
+    search_fields = ['name', 'key']
+    readonly_fields = ['key']
+
+
 @admin.register(HeroSection)
 class HeroSectionAdmin(admin.ModelAdmin):
     list_display = ['title_fa', 'is_active', 'order', 'created_at']
@@ -53,5 +61,5 @@ class ContactMessageAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'subject', 'is_read', 'created_at']
     list_filter = ['is_read', 'created_at']
     search_fields = ['name', 'email', 'subject', 'message']
-    readonly_fields = ['created_at']
+    readonly_fields = ['receipt_id', 'created_at']
     ordering = ['-created_at']
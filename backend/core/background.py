@@ -0,0 +1,107 @@
+"""
+Minimal in-process background execution.
+
+Work that must not run on the request path (image processing, batched
+writes) is handed to a small thread pool owned by the worker process. Each
+task gets its own database connection, closed when the task finishes.
+``PeriodicTask`` runs a flush function on a daemon thread at a fixed
+interval and once more when the process exits, unless the default database
+is no longer the one the task started against (the test runner points the
+connection back at the development database once the test database is gone)
+or cannot be reached.
+"""
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+                thread_name_prefix='appb2b-background',
+            )
+        return _executor
+
+
+def submit(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` in the background and return its future"""
+    return get_executor().submit(_run, func, args, kwargs)
+
+
+def _run(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed.", getattr(func, '__qualname__', func))
+        raise
+    finally:
+        connections.close_all()
+
+
+class PeriodicTask:
+    """Run ``func`` every ``interval`` seconds, on demand and at exit"""
+
+    def __init__(self, func, interval, name):
+        self.func = func
+        self.interval = interval
+        self.name = name
+        self._thread = None
+        self._exit_hook = False
+        self._database = None
+        self._wake = threading.Event()
+        self._run_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the thread on first use, so forked workers each get their own"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+            if not self._exit_hook:
+                self._database = connections['default'].settings_dict['NAME']
+                atexit.register(self.run_at_exit)
+                self._exit_hook = True
+
+    def wake(self):
+        """Run as soon as possible instead of waiting for the interval"""
+        self._wake.set()
+
+    def run_once(self):
+        with self._run_lock:
+            try:
+                self.func()
+            except Exception:
+                logger.exception("Periodic task %s failed.", self.name)
+
+    def run_at_exit(self):
+        if connections['default'].settings_dict['NAME'] != self._database:
+            return
+        with self._run_lock:
+            try:
+                self.func()
+            except DatabaseError as exc:
+                logger.warning("Periodic task %s skipped at exit: %s", self.name, exc)
+            except Exception:
+                logger.exception("Periodic task %s failed.", self.name)
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.run_once()
+            close_old_connections()
@@ -0,0 +1,109 @@
+"""
+Publish/subscribe fan-out for the push endpoints.
+
+Publishers call ``get_broker().publish(channels, message)`` from any thread;
+subscribers are coroutines on the ASGI event loop that ``subscribe`` to a set
+of channels and ``await subscription.get()``. Messages are opaque strings,
+encoded once per publish whatever the number of subscribers.
+
+``PUSH_BROKER`` names the backend class. The default ``InProcessBroker``
+only reaches subscribers connected to the same worker process, which is
+enough for a single-node deployment; several workers need a backend built
+on a shared transport (e.g. Redis pub/sub) implementing the same methods.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Sent in place of the dropped backlog when a subscriber falls behind
+OVERFLOW_MESSAGE = '{"type": "resync", "data": {}}'
+
+
+class Subscription:
+    """Bounded queue of messages for one subscriber"""
+
+    def __init__(self, broker, channels, max_pending):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_pending)
+        self.closed = False
+
+    def deliver(self, message):
+        """Queue ``message`` from any thread; returns ``False`` once the loop is gone"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            return False
+        return True
+
+    def _put(self, message):
+        if self.queue.full():
+            # The client missed events; drop the backlog and tell it to refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = OVERFLOW_MESSAGE
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Fan-out to the subscribers of the current process"""
+
+    def __init__(self, max_pending=None):
+        self.max_pending = max_pending or getattr(settings, 'PUSH_MAX_PENDING_MESSAGES', 100)
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels):
+        """Subscribe the running event loop to ``channels``"""
+        subscription = Subscription(self, channels, self.max_pending)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def _subscribers(self, channels):
+        with self._lock:
+            return set().union(*[self._subscriptions.get(channel, ()) for channel in channels])
+
+    def has_subscribers(self, channels):
+        """Whether publishing to ``channels`` would reach anyone"""
+        return bool(self._subscribers(channels))
+
+    def publish(self, channels, message):
+        """Send ``message`` once to every subscriber of any of ``channels``"""
+        for subscription in self._subscribers(channels):
+            if not subscription.deliver(message):
+                subscription.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(getattr(settings, 'PUSH_BROKER', 'core.broker.InProcessBroker'))()
+        return _broker
@@ -0,0 +1,123 @@
+"""
+Transactional bulk writes for admin-managed content.
+
+``BulkWriteAPIView`` accepts a list of items: items with an ``id`` are
+partial updates of that row, items without one are new rows. Every item is
+validated with the view's serializer first; only when all of them pass are
+the rows written with one ``bulk_create`` and one ``bulk_update`` inside a
+single transaction, followed by one ``content_changed`` event for the model.
+Updated rows get the ``pre_save`` treatment of Model.save() (``auto_now``
+timestamps, uploaded files). Registered image fields that changed get their
+renditions scheduled, since the bulk writes bypass the ``post_save`` hook that
+usually does it.
+
+Reordering can also be sent as ``{"order": [id, id, ...]}``, which sets each
+row's ``order`` to its position in the list.
+"""
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+
+from . import imaging
+from .signals import content_changed
+
+
+class BulkWriteAPIView(generics.GenericAPIView):
+    """Create and partially update many rows of ``queryset`` at once"""
+    permission_classes = [permissions.IsAdminUser]
+    max_items = 500
+
+    def get_items(self, request):
+        data = request.data
+        if isinstance(data, dict) and isinstance(data.get('order'), list):
+            return [{'id': pk, 'order': position} for position, pk in enumerate(data['order'])]
+        return data
+
+    def post(self, request, *args, **kwargs):
+        items = self.get_items(request)
+        if not isinstance(items, list) or not items:
+            return Response({'detail': 'Expected a non-empty list of items.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response({'detail': f'At most {self.max_items} items are accepted per request.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        pk_field = self.get_queryset().model._meta.pk
+        ids = []
+        for item in items:
+            if isinstance(item, dict) and item.get('id') is not None:
+                # Ids sent as strings still match their rows
+                try:
+                    item['id'] = pk_field.to_python(item['id'])
+                except ValidationError:
+                    continue
+                ids.append(item['id'])
+        existing = self.get_queryset().in_bulk(ids)
+
+        errors = []
+        created, updated, update_fields, seen = [], [], set(), set()
+        results = []
+        for item in items:
+            if not isinstance(item, dict):
+                errors.append({'non_field_errors': ['Expected an object.']})
+                continue
+            pk = item.get('id')
+            if pk is not None:
+                instance = existing.get(pk)
+                if instance is None or pk in seen:
+                    errors.append({'id': ['Unknown or repeated id.']})
+                    continue
+                seen.add(pk)
+                serializer = self.get_serializer(instance, data=item, partial=True)
+            else:
+                serializer = self.get_serializer(data=item)
+
+            if not serializer.is_valid():
+                errors.append(serializer.errors)
+                continue
+            errors.append({})
+
+            instance = serializer.instance or self.get_queryset().model()
+            for attr, value in serializer.validated_data.items():
+                setattr(instance, attr, value)
+            if serializer.instance is None:
+                created.append(instance)
+            else:
+                updated.append(instance)
+                update_fields.update(serializer.validated_data)
+            results.append(instance)
+
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            self.perform_bulk_write(created, updated, update_fields)
+        except IntegrityError:
+            # e.g. two items claiming the same unique slug
+            return Response({'detail': 'Items conflict with each other or with existing rows.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(self.get_serializer(results, many=True).data)
+
+    def perform_bulk_write(self, created, updated, update_fields):
+        model = self.get_queryset().model
+        # ``bulk_update`` skips ``Field.pre_save``, which maintains ``auto_now``
+        # columns and commits uploaded files; run it as Model.save() would
+        update_fields |= {
+            field.name for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+        }
+        fields = [model._meta.get_field(name) for name in sorted(update_fields)]
+        for instance in updated:
+            for field in fields:
+                setattr(instance, field.attname, field.pre_save(instance, add=False))
+
+        with transaction.atomic():
+            if created:
+                model.objects.bulk_create(created)
+            if updated:
+                model.objects.bulk_update(updated, sorted(update_fields))
+            content_changed.send(sender=model, pks=[instance.pk for instance in created + updated])
+            for instance in created + updated:
+                imaging.schedule_renditions(model, instance)
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose entries never leave the process that wrote them
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """The registry, snapshot and version stamps must reach every worker"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        f'The default cache backend {backend} is local to each process.',
+        hint=(
+            'Site settings, site content snapshots and conditional GET validators are invalidated '
+            'through the default cache; with several workers, writes in one are not seen by the others. '
+            'Use a shared backend such as FileBasedCache, DatabaseCache or Redis.'
+        ),
+        id='core.W001',
+    )]
@@ -0,0 +1,171 @@
+"""
+Sparse fieldsets and opt-in expansion for the public read endpoints.
+
+``?fields=slug,title`` limits a response to the listed fields and
+``?expand=category`` renders the listed relations as nested objects. Once
+either parameter is given, the relations a serializer names in
+``Meta.expandable_fields`` are rendered as primary keys unless expanded, so
+their joins, nested serializers and prefetches are skipped. Requests without
+both parameters get the full response.
+
+Bilingual fields can be requested by their neutral name (``title`` selects
+``title_fa`` and ``title_en``). Only the top-level serializer is trimmed;
+expanded relations are rendered in full.
+"""
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from .language import ALL_LANGUAGES, split_language_suffix
+
+MAX_FIELDSET_NAMES = 50
+
+
+class Fieldset:
+    """Field names selected by ``?fields=`` and relations named by ``?expand=``"""
+
+    def __init__(self, fields=None, expand=()):
+        self.fields = fields
+        self.expand = frozenset(expand)
+
+    def includes(self, name):
+        if self.fields is None or name in self.expand:
+            return True
+        return name in self.fields or split_language_suffix(name)[0] in self.fields
+
+    def expands(self, name):
+        return name in self.expand
+
+
+def _parse_names(value):
+    names = (name.strip() for name in (value or '').split(','))
+    return frozenset([name for name in names if name][:MAX_FIELDSET_NAMES])
+
+
+def resolve_fieldset(request):
+    """Return the request's ``Fieldset``, or ``None`` for a full response"""
+    fields, expand = request.GET.get('fields'), request.GET.get('expand')
+    if not fields and not expand:
+        return None
+    return Fieldset(_parse_names(fields) or None, _parse_names(expand))
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Serializer mixin applying ``context['fieldset']`` to its fields.
+
+    List it before ``BilingualSerializerMixin`` so neutral names are matched
+    after language projection.
+    """
+
+    def _is_root(self):
+        parent = getattr(self, 'parent', None)
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get('fieldset')
+        if fieldset is None or not self._is_root():
+            return fields
+
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+        sparse = {}
+        for name, field in fields.items():
+            if not (fieldset.includes(name) or fieldset.includes(field.source or name)):
+                continue
+            if name in expandable and not fieldset.expands(name):
+                source = field.source if field.source not in (None, name) else None
+                field = serializers.PrimaryKeyRelatedField(
+                    read_only=True, many=isinstance(field, serializers.ListSerializer), source=source
+                )
+            sparse[name] = field
+        return sparse
+
+
+def _select_related_paths(tree, prefix=''):
+    for name, children in tree.items():
+        path = prefix + name
+        if children:
+            yield from _select_related_paths(children, path + '__')
+        else:
+            yield path
+
+
+def _without_relations(queryset, names):
+    """Drop the ``select_related``/``prefetch_related`` lookups rooted at ``names``"""
+    select = queryset.query.select_related
+    if isinstance(select, dict) and names & set(select):
+        kept = [path for path in _select_related_paths(select) if path.split('__')[0] not in names]
+        queryset = queryset.select_related(None)
+        if kept:
+            queryset = queryset.select_related(*kept)
+
+    lookups = queryset._prefetch_related_lookups
+    kept = [
+        lookup for lookup in lookups
+        if getattr(lookup, 'prefetch_to', lookup).split('__')[0] not in names
+    ]
+    if len(kept) != len(lookups):
+        queryset = queryset.prefetch_related(None).prefetch_related(*kept)
+    return queryset
+
+
+def shape_queryset(queryset, serializer_class, lang, fieldset, keep=()):
+    """
+    Restrict ``queryset`` to the columns and relations ``fieldset`` renders.
+    ``keep`` lists extra columns to load, such as a paginator's ordering.
+    """
+    if fieldset is None or not hasattr(serializer_class, 'get_projected_columns'):
+        return queryset
+
+    model = queryset.model
+    expandable = getattr(serializer_class.Meta, 'expandable_fields', ())
+    collapsed = {name for name in expandable if not fieldset.expands(name)}
+    columns = serializer_class.get_projected_columns(lang, fieldset)
+    # Joins for fields that are not rendered at all
+    select = queryset.query.select_related
+    unused = set(select) - set(columns) if isinstance(select, dict) else set()
+    queryset = _without_relations(queryset, collapsed | unused)
+
+    for name in collapsed:
+        relation = model._meta.get_field(name)
+        if not fieldset.includes(name) or not (relation.one_to_many or relation.many_to_many):
+            continue
+        # Only the related primary keys are rendered
+        related = relation.related_model._default_manager.all()
+        if relation.one_to_many:
+            related = related.only(relation.field.attname)
+        queryset = queryset.prefetch_related(Prefetch(name, queryset=related))
+
+    concrete = {field.name for field in model._meta.concrete_fields}
+    columns += [name.lstrip('-') for name in keep if name.lstrip('-') in concrete]
+    return queryset.only(*columns)
+
+
+class SparseFieldsetMixin:
+    """
+    Generic view mixin passing ``?fields=``/``?expand=`` to the serializer
+    and trimming the queryset to match. List it before
+    ``LanguageProjectionMixin``.
+    """
+
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = resolve_fieldset(self.request)
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldset'] = self.get_fieldset()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        get_language = getattr(self, 'get_language', None)
+        lang = get_language() if get_language is not None else ALL_LANGUAGES
+        # Keyset paginators read their ordering columns from the last row
+        keep = getattr(self.paginator, 'ordering', None) or ()
+        if isinstance(keep, str):
+            keep = (keep,)
+        return shape_queryset(queryset, self.get_serializer_class(), lang, self.get_fieldset(), keep)
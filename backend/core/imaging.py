@@ -0,0 +1,201 @@
+"""
+Responsive image renditions.
+
+Registered image fields get resized WebP (and AVIF, when Pillow supports it)
+derivatives at fixed widths plus a tiny blurred placeholder. The result is
+stored as JSON on a sibling ``*_renditions`` field of the same row:
+
+    {
+        "source": "hero/banner.jpg",
+        "width": 2400, "height": 1200,
+        "placeholder": "data:image/webp;base64,...",
+        "variants": [
+            {"name": "renditions/hero/banner-640w.webp", "width": 640,
+             "height": 320, "format": "webp"},
+            ...
+        ]
+    }
+
+Renditions are generated in the background after the upload is committed,
+so admin saves never wait for image processing. A result is only stored if
+the row still holds the image it was rendered from; otherwise its variant
+files are deleted straight away. Variant files are also deleted when their
+image is replaced or cleared and when their row is deleted.
+"""
+import base64
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from PIL import Image, ImageFilter, ImageOps, features
+
+from . import background
+
+RENDITION_WIDTHS = (320, 640, 960, 1280, 1920)
+RENDITION_FORMATS = ('avif', 'webp') if features.check('avif') else ('webp',)
+RENDITION_QUALITY = {'avif': 50, 'webp': 75}
+RENDITION_PREFIX = 'renditions'
+PLACEHOLDER_WIDTH = 16
+
+FORMAT_MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+# {model: {image field name: renditions field name}}
+_registry = {}
+
+
+def register(model, image_field, renditions_field):
+    """Generate renditions for ``model.image_field`` whenever it changes"""
+    if model not in _registry:
+        _registry[model] = {}
+        post_save.connect(schedule_renditions, sender=model, dispatch_uid=f'renditions-{model._meta.label}')
+        post_delete.connect(
+            schedule_variant_cleanup, sender=model, dispatch_uid=f'renditions-cleanup-{model._meta.label}'
+        )
+    _registry[model][image_field] = renditions_field
+
+
+def registered_fields(model):
+    return _registry.get(model, {})
+
+
+def iter_registered():
+    """Yield ``(model, image field, renditions field)`` for every registration"""
+    for model, fields in _registry.items():
+        for image_field, renditions_field in fields.items():
+            yield model, image_field, renditions_field
+
+
+def schedule_renditions(sender, instance, raw=False, **kwargs):
+    """Queue rendition generation for every image field that changed"""
+    if raw:
+        return
+    for image_field, renditions_field in registered_fields(sender).items():
+        name = getattr(instance, image_field).name or ''
+        renditions = getattr(instance, renditions_field, None) or {}
+        if name != renditions.get('source', ''):
+            transaction.on_commit(
+                lambda field=image_field: background.submit(
+                    generate_renditions, sender, instance.pk, field
+                )
+            )
+
+
+def schedule_variant_cleanup(sender, instance, **kwargs):
+    """Delete the variant files of a deleted row once the delete commits"""
+    names = [
+        variant['name']
+        for renditions_field in registered_fields(sender).values()
+        for variant in (getattr(instance, renditions_field, None) or {}).get('variants', [])
+    ]
+    if names:
+        transaction.on_commit(lambda: background.submit(delete_variants, names))
+
+
+def delete_variants(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+def generate_renditions(model, pk, image_field):
+    """Build and store the renditions of one image field"""
+    renditions_field = registered_fields(model)[image_field]
+    instance = model.objects.filter(pk=pk).only(image_field, renditions_field).first()
+    if instance is None:
+        return None
+
+    name = getattr(instance, image_field).name or ''
+    previous = getattr(instance, renditions_field) or {}
+    renditions = render_image(name) if name else {}
+
+    # Only store the result if the image was not replaced in the meantime;
+    # a cleared image may be stored as NULL or as an empty name
+    if name:
+        unchanged = Q(**{image_field: name})
+    else:
+        unchanged = Q(**{f'{image_field}__isnull': True}) | Q(**{image_field: ''})
+    updated = model.objects.filter(unchanged, pk=pk).update(**{renditions_field: renditions})
+    if not updated:
+        # The source is gone: drop the variants unless the row's current
+        # renditions share their names
+        current = model.objects.filter(pk=pk).values_list(renditions_field, flat=True).first() or {}
+        kept = {variant['name'] for variant in current.get('variants', [])}
+        delete_variants([
+            variant['name'] for variant in renditions.get('variants', []) if variant['name'] not in kept
+        ])
+        return None
+
+    current = {variant['name'] for variant in renditions.get('variants', [])}
+    delete_variants([
+        variant['name'] for variant in previous.get('variants', []) if variant['name'] not in current
+    ])
+
+    from .signals import content_changed
+    content_changed.send(sender=model, pks=[pk], fields=[renditions_field])
+    return renditions
+
+
+def _open(name):
+    with default_storage.open(name) as fp:
+        image = Image.open(fp)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    return image
+
+
+def _encode(image, fmt):
+    buffer = BytesIO()
+    image.save(buffer, fmt.upper(), quality=RENDITION_QUALITY[fmt])
+    return buffer.getvalue()
+
+
+def render_image(name):
+    """Write the resized variants of ``name`` and return its renditions dict"""
+    image = _open(name)
+    width, height = image.size
+    base = os.path.splitext(name)[0]
+
+    widths = [w for w in RENDITION_WIDTHS if w < width]
+    # Images narrower than the largest rendition also get a full-size variant
+    if width <= RENDITION_WIDTHS[-1]:
+        widths.append(width)
+    variants = []
+    for target_width in widths:
+        target_height = max(1, round(height * target_width / width))
+        resized = image if target_width == width else image.resize(
+            (target_width, target_height), Image.LANCZOS
+        )
+        for fmt in RENDITION_FORMATS:
+            variant_name = f'{RENDITION_PREFIX}/{base}-{target_width}w.{fmt}'
+            if default_storage.exists(variant_name):
+                default_storage.delete(variant_name)
+            variant_name = default_storage.save(variant_name, ContentFile(_encode(resized, fmt)))
+            variants.append({
+                'name': variant_name,
+                'width': target_width,
+                'height': target_height,
+                'format': fmt,
+            })
+
+    return {
+        'source': name,
+        'width': width,
+        'height': height,
+        'placeholder': render_placeholder(image),
+        'variants': variants,
+    }
+
+
+def render_placeholder(image):
+    """Tiny blurred WebP of ``image`` as a data URI"""
+    tiny = image.copy()
+    tiny.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH))
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    encoded = base64.b64encode(_encode(tiny, 'webp')).decode('ascii')
+    return f'data:image/webp;base64,{encoded}'
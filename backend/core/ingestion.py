@@ -0,0 +1,243 @@
+"""
+Contact form ingestion.
+
+In ``sync`` mode a validated message is inserted during the request, as
+before. In ``queued`` mode messages from concurrent requests are
+group-committed: each request hands its message to a per-worker queue and
+waits until a background flusher has inserted the batch holding it with
+``bulk_create``, so a burst of submissions turns into a few write
+transactions instead of one per POST. A message is only acknowledged once it
+is stored; a worker killed mid-flush fails the waiting requests rather than
+losing acknowledged messages.
+
+Both modes deduplicate client retries: an ``Idempotency-Key`` header maps to
+the receipt of its first submission, and identical content (same sender,
+subject and body) within ``CONTACT_MESSAGE_DEDUPE_WINDOW`` seconds maps to
+the original receipt as well. Claims in the default cache only spare the
+database a lookup; the database is the real dedupe: the unique
+``idempotency_key`` constraint, and stored content hashes checked before
+every insert.
+"""
+import hashlib
+import logging
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import Future
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .background import PeriodicTask
+from .models import ContactMessage
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_CACHE_KEY = 'core:contact:idempotency:{}'
+CONTENT_CACHE_KEY = 'core:contact:content:{}'
+
+# ``message`` is only set when the row was inserted during the request
+IngestResult = namedtuple('IngestResult', ['receipt_id', 'status', 'message'])
+
+
+def get_mode():
+    return getattr(settings, 'CONTACT_MESSAGE_INGESTION', 'sync')
+
+
+def get_dedupe_window():
+    return getattr(settings, 'CONTACT_MESSAGE_DEDUPE_WINDOW', 3600)
+
+
+def content_hash(data):
+    """Fingerprint of what the sender wrote, insensitive to case and padding"""
+    parts = [
+        data.get('email', '').strip().lower(),
+        data.get('name', '').strip(),
+        data.get('subject', '').strip(),
+        data.get('message', '').strip(),
+    ]
+    return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+
+class ContactMessageQueue:
+    """Per-worker queue of messages awaiting a group commit"""
+
+    def __init__(self):
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._flusher = PeriodicTask(
+            self.flush,
+            getattr(settings, 'CONTACT_MESSAGE_FLUSH_INTERVAL', 0.5),
+            'contact-message-flusher',
+        )
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, message):
+        """
+        Queue ``message`` and return a future of its ``(receipt id, status)``.
+
+        Messages queued while a batch is being committed go into the next one.
+        """
+        future = Future()
+        self._flusher.start()
+        with self._lock:
+            self._pending.append((message, future))
+        self._flusher.wake()
+        return future
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'CONTACT_MESSAGE_BATCH_SIZE', 500)
+
+    def flush(self):
+        """Insert every queued message and resolve the futures of its batch"""
+        while self._pending:
+            with self._lock:
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            # Requests that gave up waiting have cancelled their futures
+            batch = [(message, future) for message, future in batch if future.set_running_or_notify_cancel()]
+            try:
+                results = self._commit([message for message, future in batch])
+            except Exception as exc:
+                for message, future in batch:
+                    future.set_exception(exc)
+                raise
+            for (message, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _commit(self, batch):
+        """Store ``batch``; returns ``(receipt id, status)`` for each message"""
+        # Content deduplication is also enforced here, for retries that
+        # reached different workers before either flushed
+        since = timezone.now() - timedelta(seconds=get_dedupe_window())
+        stored = dict(ContactMessage.objects.filter(
+            content_hash__in={message.content_hash for message in batch},
+            created_at__gte=since,
+        ).values_list('content_hash', 'receipt_id'))
+
+        unique = []
+        for message in batch:
+            if message.content_hash not in stored:
+                stored[message.content_hash] = message.receipt_id
+                unique.append(message)
+
+        with transaction.atomic():
+            ContactMessage.objects.bulk_create(unique, ignore_conflicts=True)
+            # Rows skipped for an idempotency key stored concurrently
+            keys = [message.idempotency_key for message in unique if message.idempotency_key]
+            by_key = dict(ContactMessage.objects.filter(
+                idempotency_key__in=keys
+            ).values_list('idempotency_key', 'receipt_id'))
+        logger.debug("Stored %d of %d queued contact messages.", len(unique), len(batch))
+
+        results = []
+        for message in batch:
+            receipt_id = by_key.get(message.idempotency_key, stored[message.content_hash])
+            status = 'queued' if receipt_id == message.receipt_id else 'duplicate'
+            results.append((str(receipt_id), status))
+        return results
+
+
+contact_queue = ContactMessageQueue()
+
+
+def _idempotency_cache_key(message):
+    return IDEMPOTENCY_CACHE_KEY.format(hashlib.sha256(message.idempotency_key.encode()).hexdigest())
+
+
+def find_duplicate(message):
+    """Return the receipt id an earlier submission claimed, or ``None``"""
+    timeout = get_dedupe_window()
+    receipt = str(message.receipt_id)
+
+    if message.idempotency_key:
+        key = _idempotency_cache_key(message)
+        if not cache.add(key, receipt, timeout):
+            return cache.get(key)
+        stored = ContactMessage.objects.filter(
+            idempotency_key=message.idempotency_key
+        ).values_list('receipt_id', flat=True).first()
+        if stored is not None:
+            cache.set(key, str(stored), timeout)
+            return str(stored)
+
+    content_key = CONTENT_CACHE_KEY.format(message.content_hash)
+    if not cache.add(content_key, receipt, timeout):
+        original = cache.get(content_key)
+    else:
+        original = ContactMessage.objects.filter(
+            content_hash=message.content_hash,
+            created_at__gte=timezone.now() - timedelta(seconds=timeout),
+        ).values_list('receipt_id', flat=True).first()
+        if original is not None:
+            original = str(original)
+            cache.set(content_key, original, timeout)
+    if message.idempotency_key and original:
+        cache.set(key, original, timeout)
+    return original
+
+
+def release_claims(message):
+    """Forget the keys ``find_duplicate`` claimed for a message that was not stored"""
+    keys = [CONTENT_CACHE_KEY.format(message.content_hash)]
+    if message.idempotency_key:
+        keys.append(_idempotency_cache_key(message))
+    receipt = str(message.receipt_id)
+    for key, value in cache.get_many(keys).items():
+        # Leave keys another submission claimed in the meantime
+        if value == receipt:
+            cache.delete(key)
+
+
+def ingest(validated_data, idempotency_key=''):
+    """
+    Accept a validated contact message.
+
+    The result status is ``created``, ``queued`` or ``duplicate``.
+    """
+    message = ContactMessage(
+        idempotency_key=idempotency_key[:100],
+        content_hash=content_hash(validated_data),
+        **validated_data
+    )
+    duplicate = find_duplicate(message)
+    if duplicate is not None:
+        return IngestResult(duplicate, 'duplicate', None)
+
+    try:
+        if get_mode() == 'queued':
+            return _ingest_queued(message)
+        with transaction.atomic():
+            message.save()
+    except IntegrityError:
+        release_claims(message)
+        # The same idempotency key was stored concurrently by another worker
+        receipt_id = ContactMessage.objects.filter(
+            idempotency_key=message.idempotency_key
+        ).values_list('receipt_id', flat=True).first()
+        if receipt_id is None:
+            raise
+        return IngestResult(str(receipt_id), 'duplicate', None)
+    except Exception:
+        # A retry must be able to store the message
+        release_claims(message)
+        raise
+    return IngestResult(str(message.receipt_id), 'created', message)
+
+
+def _ingest_queued(message):
+    future = contact_queue.put(message)
+    try:
+        receipt_id, status = future.result(getattr(settings, 'CONTACT_MESSAGE_COMMIT_TIMEOUT', 10.0))
+    except TimeoutError:
+        if future.cancel():
+            raise
+        # Its batch is being committed already
+        receipt_id, status = future.result()
+    if status == 'duplicate':
+        release_claims(message)
+    return IngestResult(receipt_id, status, None)
@@ -0,0 +1,118 @@
+"""
+Language projection for the bilingual ``*_fa``/``*_en`` models.
+
+Projection is opt-in: public read endpoints accept ``?lang=fa|en`` to
+receive a single language under neutral keys (``title`` instead of
+``title_fa``/``title_en``) and select only that language's columns.
+``?lang=preferred`` uses the authenticated user's ``preferred_language``.
+Without ``lang`` (or with ``?lang=all``) responses keep both languages as they
+always did, and the site content payload still reports ``fa``, the default
+language, as its ``language``.
+
+One change is not backwards compatible: ``/api/core/content/?lang=fa|en``
+used to return both languages and only echo the parameter; it now projects.
+"""
+SUPPORTED_LANGUAGES = ('fa', 'en')
+DEFAULT_LANGUAGE = 'fa'
+ALL_LANGUAGES = 'all'
+PREFERRED_LANGUAGE = 'preferred'
+
+
+def resolve_language(request):
+    """Return ``fa``, ``en`` or, without projection, ``all`` for the request's ``lang`` parameter"""
+    lang = request.GET.get('lang', ALL_LANGUAGES)
+    if lang == PREFERRED_LANGUAGE:
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.preferred_language
+        return DEFAULT_LANGUAGE
+    if lang in SUPPORTED_LANGUAGES:
+        return lang
+    return ALL_LANGUAGES
+
+
+def split_language_suffix(name):
+    """Split ``title_fa`` into ``('title', 'fa')``; other names get ``None``"""
+    base, sep, suffix = name.rpartition('_')
+    if sep and base and suffix in SUPPORTED_LANGUAGES:
+        return base, suffix
+    return name, None
+
+
+class BilingualSerializerMixin:
+    """
+    Serializer mixin that projects ``*_fa``/``*_en`` fields onto one language.
+
+    The language comes from ``context['lang']``; without it every field is
+    emitted as declared, so admin and write paths are unaffected.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        lang = self.context.get('lang', ALL_LANGUAGES)
+        if lang not in SUPPORTED_LANGUAGES:
+            return fields
+
+        projected = {}
+        for name, field in fields.items():
+            base, suffix = split_language_suffix(name)
+            if suffix is None:
+                projected[name] = field
+            elif suffix == lang:
+                if field.source is None:
+                    field.source = name
+                projected[base] = field
+        return projected
+
+    @classmethod
+    def get_projected_columns(cls, lang, fieldset=None):
+        """Concrete model fields needed to serialize ``lang``, for ``.only()``"""
+        concrete = {
+            field.name for field in cls.Meta.model._meta.concrete_fields
+        }
+        # Reverse one-to-one relations, fetched with select_related
+        concrete |= {
+            field.name for field in cls.Meta.model._meta.get_fields()
+            if field.one_to_one and field.auto_created
+        }
+        columns = []
+        for name in cls.Meta.fields:
+            if fieldset is not None and not fieldset.includes(name):
+                continue
+            base, suffix = split_language_suffix(name)
+            if name in concrete and (suffix is None or lang not in SUPPORTED_LANGUAGES or suffix == lang):
+                columns.append(name)
+            # Declared fields reading several columns (e.g. ResponsiveImageField)
+            declared = cls._declared_fields.get(name)
+            for column in getattr(declared, 'model_fields', ()):
+                if column not in columns:
+                    columns.append(column)
+        return columns
+
+
+class LanguageProjectionMixin:
+    """
+    Generic view mixin that passes the requested language to the serializer
+    and defers the other language's columns at the SQL level.
+    """
+
+    def get_language(self):
+        if not hasattr(self, '_language'):
+            self._language = resolve_language(self.request)
+        return self._language
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['lang'] = self.get_language()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return project_queryset(queryset, self.get_serializer_class(), self.get_language())
+
+
+def project_queryset(queryset, serializer_class, lang):
+    """Restrict ``queryset`` to the columns ``serializer_class`` needs for ``lang``"""
+    if lang not in SUPPORTED_LANGUAGES or not hasattr(serializer_class, 'get_projected_columns'):
+        return queryset
+    return queryset.only(*serializer_class.get_projected_columns(lang))
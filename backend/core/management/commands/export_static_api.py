@@ -0,0 +1,39 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.static_export import StaticExporter
+
+
+class Command(BaseCommand):
+    help = 'Render the public read API to static JSON files for CDN hosting'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=str(settings.STATIC_EXPORT_ROOT),
+            help='Directory the JSON files are written to.'
+        )
+        parser.add_argument(
+            '--base-url', default=settings.STATIC_EXPORT_BASE_URL,
+            help='Origin used for absolute media URLs in the payloads.'
+        )
+        parser.add_argument(
+            '--manifest', default=str(settings.STATIC_EXPORT_MANIFEST),
+            help='File recording what the previous export rendered; must be outside --output.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Render every artifact even if its dependencies did not change.'
+        )
+    
+    def handle(self, *args, **options):
+        output, manifest = os.path.abspath(options['output']), os.path.abspath(options['manifest'])
+        if os.path.commonpath([output, manifest]) == output:
+            raise CommandError('--manifest must be outside the published --output directory.')
+        exporter = StaticExporter(options['output'], options['base_url'], options['manifest'])
+        written, skipped, removed = exporter.export(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported to {options["output"]}: {written} written, '
+            f'{skipped} unchanged, {removed} removed.'
+        ))
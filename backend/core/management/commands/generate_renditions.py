@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core import imaging
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive image renditions for existing uploads'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Regenerate renditions that are already up to date.'
+        )
+    
+    def handle(self, *args, **options):
+        generated = 0
+        for model, image_field, renditions_field in imaging.iter_registered():
+            queryset = model.objects.exclude(**{image_field: ''}).exclude(**{f'{image_field}__isnull': True})
+            for pk, name, renditions in queryset.values_list('pk', image_field, renditions_field).iterator():
+                if not options['all'] and (renditions or {}).get('source') == name:
+                    continue
+                imaging.generate_renditions(model, pk, image_field)
+                generated += 1
+        self.stdout.write(self.style.SUCCESS(f'Generated renditions for {generated} images.'))
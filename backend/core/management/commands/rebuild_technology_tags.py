@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import tags
+
+
+class Command(BaseCommand):
+    help = 'Rewrite the technology tags of every tagged model from its technology lists'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows resynced per batch.'
+        )
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        synced = 0
+        for model, list_field, tags_field in tags.iter_registered():
+            pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            for start in range(0, len(pks), batch_size):
+                with transaction.atomic():
+                    tags.sync_tags_bulk(
+                        model, model.objects.filter(pk__in=pks[start:start + batch_size]).only('pk', list_field)
+                    )
+            synced += len(pks)
+        self.stdout.write(self.style.SUCCESS(f'Resynced the technology tags of {synced} rows.'))
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_sitesetting_value_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='herosection',
+            name='background_image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='background image renditions'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='image renditions'),
+        ),
+        migrations.AddField(
+            model_name='teammember',
+            name='photo_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='photo renditions'),
+        ),
+    ]
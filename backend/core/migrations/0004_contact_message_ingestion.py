@@ -0,0 +1,45 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:28
+
+import uuid
+from django.db import migrations, models
+
+
+def assign_receipt_ids(apps, schema_editor):
+    ContactMessage = apps.get_model('core', 'ContactMessage')
+    for message in ContactMessage.objects.only('pk').iterator():
+        ContactMessage.objects.filter(pk=message.pk).update(receipt_id=uuid.uuid4())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactmessage',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, verbose_name='content hash'),
+        ),
+        migrations.AddField(
+            model_name='contactmessage',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='idempotency key'),
+        ),
+        migrations.AddField(
+            model_name='contactmessage',
+            name='receipt_id',
+            field=models.UUIDField(editable=False, null=True, verbose_name='receipt id'),
+        ),
+        migrations.RunPython(assign_receipt_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='contactmessage',
+            name='receipt_id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='receipt id'),
+        ),
+        migrations.AddConstraint(
+            model_name='contactmessage',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key', ''), _negated=True), fields=('idempotency_key',), name='unique_contact_message_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+def tag_service_technologies(apps, schema_editor):
+    Technology = apps.get_model('core', 'Technology')
+    Service = apps.get_model('core', 'Service')
+    cache = {}
+    for instance in Service.objects.exclude(technologies=[]).iterator():
+        tags = []
+        for name in instance.technologies or []:
+            key = ' '.join(str(name).split()).casefold()[:100]
+            if not key:
+                continue
+            if key not in cache:
+                cache[key], _ = Technology.objects.get_or_create(
+                    key=key, defaults={'name': ' '.join(str(name).split())[:100]}
+                )
+            tags.append(cache[key])
+        instance.technology_tags.set(tags)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_contact_message_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Technology',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='name')),
+                ('key', models.CharField(max_length=100, unique=True, verbose_name='key')),
+            ],
+            options={
+                'verbose_name': 'Technology',
+                'verbose_name_plural': 'Technologies',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='technology_tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='services', to='core.technology', verbose_name='technology tags'),
+        ),
+        migrations.RunPython(tag_service_technologies, migrations.RunPython.noop),
+    ]
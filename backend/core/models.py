@@ -1,11 +1,25 @@
-from django.db import models
+import json
+import uuid
+
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
 
 class SiteSetting(models.Model):
     """Global site settings"""
+    TYPE_CHOICES = [
+        ('str', _('String')),
+        ('int', _('Integer')),
+        ('bool', _('Boolean')),
+        ('json', _('JSON')),
+    ]
+    
+    TRUE_VALUES = ('1', 'true', 'yes', 'on')
+    FALSE_VALUES = ('0', 'false', 'no', 'off', '')
+    
     key = models.CharField(_('key'), max_length=100, unique=True)
     value = models.TextField(_('value'))
+    value_type = models.CharField(_('value type'), max_length=10, choices=TYPE_CHOICES, default='str')
     description = models.CharField(_('description'), max_length=255, blank=True)
     
     class Meta:
@@ -14,6 +28,40 @@ class SiteSetting(models.Model):
     
     def __str__(self):
         return self.key
+    
+    def get_typed_value(self):
+        """Coerce the stored text according to ``value_type``; raises ValueError"""
+        if self.value_type == 'int':
+            return int(self.value)
+        if self.value_type == 'bool':
+            value = self.value.strip().lower()
+            if value in self.TRUE_VALUES:
+                return True
+            if value in self.FALSE_VALUES:
+                return False
+            raise ValueError(f"'{self.value}' is not a boolean value.")
+        if self.value_type == 'json':
+            return json.loads(self.value)
+        return self.value
+
+
+class Technology(models.Model):
+    """Technology tag shared by services and projects"""
+    name = models.CharField(_('name'), max_length=100)
+    key = models.CharField(_('key'), max_length=100, unique=True)
+    
+    class Meta:
+        verbose_name = _('Technology')
+        verbose_name_plural = _('Technologies')
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    @staticmethod
+    def normalize_key(name):
+        """Case- and spacing-insensitive lookup key for a technology name"""
+        return ' '.join(str(name).split()).casefold()[:100]
 
 
 class HeroSection(models.Model):
@@ -23,6 +71,7 @@ class HeroSection(models.Model):
     subtitle_fa = models.TextField(_('subtitle (Persian)'))
     subtitle_en = models.TextField(_('subtitle (English)'))
     background_image = models.ImageField(_('background image'), upload_to='hero/', blank=True, null=True)
+    background_image_renditions = models.JSONField(_('background image renditions'), default=dict, blank=True, editable=False)
     cta_button_text_fa = models.CharField(_('CTA button text (Persian)'), max_length=100, default='مشاهده خدمات')
     cta_button_text_en = models.CharField(_('CTA button text (English)'), max_length=100, default='View Services')
     cta_button_link = models.CharField(_('CTA button link'), max_length=200, default='#services')
@@ -50,7 +99,15 @@ class Service(models.Model):
     description_en = models.TextField(_('description (English)'))
     icon = models.CharField(_('icon class'), max_length=100, default='code')
     image = models.ImageField(_('image'), upload_to='services/', blank=True, null=True)
+    image_renditions = models.JSONField(_('image renditions'), default=dict, blank=True, editable=False)
     technologies = models.JSONField(_('technologies'), default=list, blank=True)
+    technology_tags = models.ManyToManyField(
+        Technology,
+        related_name='services',
+        blank=True,
+        editable=False,
+        verbose_name=_('technology tags')
+    )
     features_fa = models.JSONField(_('features (Persian)'), default=list, blank=True)
     features_en = models.JSONField(_('features (English)'), default=list, blank=True)
     code_snippet = models.TextField(_('code snippet'), blank=True)
@@ -65,6 +122,11 @@ class Service(models.Model):
     
     def __str__(self):
         return self.title_fa
+    
+    def save(self, *args, **kwargs):
+        # The technology tags written from post_save commit with the service
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class TeamMember(models.Model):
@@ -76,6 +138,7 @@ class TeamMember(models.Model):
     bio_fa = models.TextField(_('bio (Persian)'), blank=True)
     bio_en = models.TextField(_('bio (English)'), blank=True)
     photo = models.ImageField(_('photo'), upload_to='team/', blank=True, null=True)
+    photo_renditions = models.JSONField(_('photo renditions'), default=dict, blank=True, editable=False)
     skills = models.JSONField(_('skills'), default=list, blank=True)
     experience_years = models.PositiveIntegerField(_('experience years'), default=0)
     projects_count = models.PositiveIntegerField(_('projects count'), default=0)
@@ -148,6 +211,9 @@ class ContactInfo(models.Model):
 
 class ContactMessage(models.Model):
     """Contact form messages"""
+    receipt_id = models.UUIDField(_('receipt id'), default=uuid.uuid4, unique=True, editable=False)
+    idempotency_key = models.CharField(_('idempotency key'), max_length=100, blank=True, editable=False)
+    content_hash = models.CharField(_('content hash'), max_length=64, blank=True, db_index=True, editable=False)
     name = models.CharField(_('name'), max_length=200)
     email = models.EmailField(_('email'))
     phone = models.CharField(_('phone'), max_length=20, blank=True)
@@ -160,6 +226,21 @@ class ContactMessage(models.Model):
         verbose_name = _('Contact Message')
         verbose_name_plural = _('Contact Messages')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='contact_message_created_idx'),
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_read=False),
+                name='contact_message_unread_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['idempotency_key'],
+                condition=~models.Q(idempotency_key=''),
+                name='unique_contact_message_idempotency_key',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.subject}"
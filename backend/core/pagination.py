@@ -0,0 +1,190 @@
+"""
+Keyset (seek) pagination.
+
+``KeysetPagination`` orders by a unique tuple of columns and encodes the
+last row's values of that tuple in an opaque ``cursor``. The next page is a
+``WHERE (a, b, ...) < (x, y, ...)`` style range scan that an index on the
+same columns answers directly, so every page costs the same and no
+``COUNT(*)`` is issued, short of a capped estimate the client may ask for.
+
+``KeysetOptInMixin`` offers keyset pages next to a view's existing
+pagination for clients that ask for them. Keyset pages always follow the
+paginator's fixed ordering, so such requests may not also ask for an
+``?ordering=`` or a ranked ``?search=``; they are rejected with 400.
+"""
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over ``ordering``, which must end with a unique column.
+
+    Columns must not be nullable; prefix a name with ``-`` for descending
+    order.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    # Set to a query parameter name to let clients ask for a capped row count
+    estimate_total_query_param = None
+    estimate_total_cap = 1000
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(self.get_ordering(request, queryset, view))
+
+        queryset = queryset.order_by(*self.ordering)
+        self.estimated_total = self.estimate_total(request, queryset)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(position))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def estimate_total(self, request, queryset):
+        """
+        Row count stopping at ``estimate_total_cap``, when the client asked
+        for it on the first page; ``None`` otherwise.
+        """
+        if not self.estimate_total_query_param or request.query_params.get(self.cursor_query_param):
+            return None
+        if request.query_params.get(self.estimate_total_query_param) not in ('1', 'true'):
+            return None
+        return queryset.order_by()[:self.estimate_total_cap + 1].count()
+
+    def seek_filter(self, position):
+        """Rows strictly after ``position`` in ``self.ordering``"""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def get_position(self, instance):
+        return [getattr(instance, name.lstrip('-')) for name in self.ordering]
+
+    def encode_cursor(self, position):
+        payload = json.dumps([_encode_value(value) for value in position], separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode('ascii').rstrip('=')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(payload)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'first': self.get_first_link(),
+            'results': data,
+        }
+        if self.estimated_total is not None:
+            payload['estimated_total'] = min(self.estimated_total, self.estimate_total_cap)
+            payload['total_is_exact'] = self.estimated_total <= self.estimate_total_cap
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'format': 'uri'},
+                'estimated_total': {'type': 'integer'},
+                'total_is_exact': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetOptInMixin:
+    """
+    Generic view mixin that keeps the view's usual pagination unless the
+    client opts into ``keyset_pagination_class`` with ``?pagination=cursor``
+    (or by following a ``cursor`` link).
+    """
+    keyset_pagination_class = KeysetPagination
+    # Parameters that would reorder the rows the cursor walks
+    keyset_conflicting_params = (api_settings.ORDERING_PARAM, api_settings.SEARCH_PARAM)
+
+    def uses_keyset_pagination(self):
+        params = self.request.query_params
+        return params.get('pagination') == 'cursor' or bool(
+            params.get(self.keyset_pagination_class.cursor_query_param)
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.pagination_class is not None:
+            if self.uses_keyset_pagination():
+                self.check_keyset_params()
+                self._paginator = self.keyset_pagination_class()
+        return super().paginator
+
+    def check_keyset_params(self):
+        conflicting = [name for name in self.keyset_conflicting_params if self.request.query_params.get(name)]
+        if conflicting:
+            raise ValidationError({
+                name: ['Not supported with cursor pagination; use page pagination instead.']
+                for name in conflicting
+            })
@@ -0,0 +1,78 @@
+"""
+In-process registry of typed ``SiteSetting`` values.
+
+Each worker loads every setting once into a dict of coerced values, so
+``site_settings.get(key)`` is a dictionary lookup. Writes replace a version
+stamp in the default cache; workers compare their stamp at most once every
+``SITE_SETTINGS_CHECK_INTERVAL`` seconds and reload when it has moved. That
+cache must be shared by the workers (see ``core.checks``), or the others keep
+their copy until they restart.
+"""
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import SiteSetting
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'core:site-settings:version'
+
+
+class SiteSettingRegistry:
+    """Typed, lazily loaded view of the ``SiteSetting`` table"""
+
+    def __init__(self):
+        self._values = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        return self._current().get(key, default)
+
+    def __getitem__(self, key):
+        return self._current()[key]
+
+    def __contains__(self, key):
+        return key in self._current()
+
+    def as_dict(self):
+        return dict(self._current())
+
+    def invalidate(self):
+        """Drop the local copy and move the shared stamp so other workers reload"""
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        self._values = None
+
+    def _current(self):
+        values = self._values
+        now = time.monotonic()
+        interval = getattr(settings, 'SITE_SETTINGS_CHECK_INTERVAL', 1.0)
+        if values is not None and now - self._checked_at < interval:
+            return values
+
+        with self._lock:
+            version = cache.get(VERSION_CACHE_KEY)
+            if self._values is None or version != self._version:
+                self._values = self._load()
+                self._version = version
+            self._checked_at = now
+            return self._values
+
+    def _load(self):
+        values = {}
+        for setting in SiteSetting.objects.all():
+            try:
+                values[setting.key] = setting.get_typed_value()
+            except ValueError:
+                logger.warning("Site setting %r is not a valid %s value.", setting.key, setting.value_type)
+                values[setting.key] = setting.value
+        return values
+
+
+site_settings = SiteSettingRegistry()
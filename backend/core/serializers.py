@@ -1,42 +1,111 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from .models import (
     SiteSetting, HeroSection, Service, TeamMember, 
     AboutSection, ContactInfo, ContactMessage
 )
+from .fieldsets import SparseFieldsetSerializerMixin
+from .imaging import FORMAT_MIME_TYPES, RENDITION_FORMATS
+from .language import BilingualSerializerMixin
+
+
+class ResponsiveImageField(serializers.Field):
+    """
+    Read-only ``srcset``-ready representation of an image field and the
+    renditions generated for it by ``core.imaging``.
+    """
+    
+    def __init__(self, image_field, renditions_field, max_width=None, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.image_field = image_field
+        self.renditions_field = renditions_field
+        # Thumbnail use: only list variants up to this width
+        self.max_width = max_width
+        self.model_fields = (image_field, renditions_field)
+    
+    def build_url(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+    
+    def to_representation(self, instance):
+        image = getattr(instance, self.image_field)
+        if not image:
+            return None
+        
+        renditions = getattr(instance, self.renditions_field) or {}
+        variants = renditions.get('variants', [])
+        if self.max_width and variants:
+            smallest = min(variant['width'] for variant in variants)
+            limit = max(self.max_width, smallest)
+            variants = [variant for variant in variants if variant['width'] <= limit]
+        sources = []
+        for fmt in RENDITION_FORMATS:
+            srcset = ', '.join(
+                f"{self.build_url(default_storage.url(variant['name']))} {variant['width']}w"
+                for variant in variants if variant['format'] == fmt
+            )
+            if srcset:
+                sources.append({'type': FORMAT_MIME_TYPES[fmt], 'srcset': srcset})
+        
+        return {
+            'src': self.build_url(image.url),
+            'width': renditions.get('width'),
+            'height': renditions.get('height'),
+            'placeholder': renditions.get('placeholder'),
+            'sources': sources,
+        }
 
 
 class SiteSettingSerializer(serializers.ModelSerializer):
     class Meta:
         model = SiteSetting
-        fields = ['key', 'value', 'description']
+        fields = ['key', 'value', 'value_type', 'description']
+    
+    def validate(self, data):
+        value = data.get('value', getattr(self.instance, 'value', ''))
+        value_type = data.get('value_type', getattr(self.instance, 'value_type', 'str'))
+        try:
+            SiteSetting(value=value, value_type=value_type).get_typed_value()
+        except ValueError:
+            raise serializers.ValidationError({"value": f"Not a valid {value_type} value."})
+        return data
 
 
-class HeroSectionSerializer(serializers.ModelSerializer):
+class HeroSectionSerializer(SparseFieldsetSerializerMixin, BilingualSerializerMixin, serializers.ModelSerializer):
+    background_image_responsive = ResponsiveImageField('background_image', 'background_image_renditions')
+    
     class Meta:
         model = HeroSection
         fields = ['id', 'title_fa', 'title_en', 'subtitle_fa', 'subtitle_en',
-                  'background_image', 'cta_button_text_fa', 'cta_button_text_en',
-                  'cta_button_link', 'secondary_button_text_fa', 'secondary_button_text_en',
+                  'background_image', 'background_image_responsive',
+                  'cta_button_text_fa', 'cta_button_text_en', 'cta_button_link',
+                  'secondary_button_text_fa', 'secondary_button_text_en',
                   'secondary_button_link', 'is_active', 'order']
 
 
-class ServiceSerializer(serializers.ModelSerializer):
+class ServiceSerializer(SparseFieldsetSerializerMixin, BilingualSerializerMixin, serializers.ModelSerializer):
+    image_responsive = ResponsiveImageField('image', 'image_renditions')
+    
     class Meta:
         model = Service
         fields = ['id', 'title_fa', 'title_en', 'description_fa', 'description_en',
-                  'icon', 'image', 'technologies', 'features_fa', 'features_en',
-                  'code_snippet', 'is_active', 'order']
+                  'icon', 'image', 'image_responsive', 'technologies', 'features_fa',
+                  'features_en', 'code_snippet', 'is_active', 'order']
 
 
-class TeamMemberSerializer(serializers.ModelSerializer):
+class TeamMemberSerializer(SparseFieldsetSerializerMixin, BilingualSerializerMixin, serializers.ModelSerializer):
+    photo_responsive = ResponsiveImageField('photo', 'photo_renditions')
+    
     class Meta:
         model = TeamMember
         fields = ['id', 'name_fa', 'name_en', 'position_fa', 'position_en',
-                  'bio_fa', 'bio_en', 'photo', 'skills', 'experience_years',
-                  'projects_count', 'email', 'linkedin', 'twitter', 'is_active', 'order']
+                  'bio_fa', 'bio_en', 'photo', 'photo_responsive', 'skills',
+                  'experience_years', 'projects_count', 'email', 'linkedin', 'twitter', 'is_active', 'order']
 
 
-class AboutSectionSerializer(serializers.ModelSerializer):
+class AboutSectionSerializer(SparseFieldsetSerializerMixin, BilingualSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = AboutSection
         fields = ['id', 'title_fa', 'title_en', 'description_fa', 'description_en',
@@ -44,7 +113,7 @@ class AboutSectionSerializer(serializers.ModelSerializer):
                   'awards_won', 'years_experience', 'is_active']
 
 
-class ContactInfoSerializer(serializers.ModelSerializer):
+class ContactInfoSerializer(SparseFieldsetSerializerMixin, BilingualSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ContactInfo
         fields = ['id', 'email', 'phone1', 'phone2', 'address_fa', 'address_en',
@@ -54,5 +123,16 @@ class ContactInfoSerializer(serializers.ModelSerializer):
 class ContactMessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContactMessage
-        fields = ['id', 'name', 'email', 'phone', 'subject', 'message', 'is_read', 'created_at']
-        read_only_fields = ['is_read', 'created_at']
+        fields = ['id', 'receipt_id', 'name', 'email', 'phone', 'subject', 'message', 'is_read', 'created_at']
+        read_only_fields = ['receipt_id', 'is_read', 'created_at']
+
+
+class ContactMessageBulkActionSerializer(serializers.Serializer):
+    ACTION_CHOICES = ['mark_read', 'mark_unread', 'delete']
+    
+    action = serializers.ChoiceField(choices=ACTION_CHOICES)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=10000
+    )
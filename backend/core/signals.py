@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal
+
+from .models import SiteSetting, HeroSection, Service, TeamMember, AboutSection, ContactInfo
+from .registry import site_settings
+from .snapshots import SNAPSHOT_MODELS, rebuild_snapshots
+from . import imaging, tags, versioning
+
+# Sent with the model class as sender when its rows changed without going
+# through Model.save()/delete(), e.g. queryset updates from background jobs.
+# ``pks`` lists the affected rows and ``fields`` the changed fields, when the
+# sender knows them.
+content_changed = Signal()
+
+
+def affects(fields, *names):
+    """Whether a ``content_changed`` carrying ``fields`` may have changed any of ``names``"""
+    return fields is None or not set(fields).isdisjoint(names)
+
+
+# Connected before the snapshot rebuild, so the versions the snapshots are
+# keyed by have moved by the time the rebuild runs
+for model in (HeroSection, Service, TeamMember, AboutSection, ContactInfo):
+    versioning.track(model)
+
+
+def rebuild_site_content_snapshots(sender, **kwargs):
+    """Re-render the site content snapshots once the change is committed"""
+    if kwargs.get('raw'):
+        return
+    transaction.on_commit(rebuild_snapshots)
+
+
+for model in SNAPSHOT_MODELS:
+    post_save.connect(rebuild_site_content_snapshots, sender=model)
+    post_delete.connect(rebuild_site_content_snapshots, sender=model)
+    content_changed.connect(rebuild_site_content_snapshots, sender=model)
+
+
+def invalidate_site_settings(sender, **kwargs):
+    """Make every worker reload its settings registry after a write"""
+    transaction.on_commit(site_settings.invalidate)
+
+
+post_save.connect(invalidate_site_settings, sender=SiteSetting)
+post_delete.connect(invalidate_site_settings, sender=SiteSetting)
+
+
+imaging.register(HeroSection, 'background_image', 'background_image_renditions')
+imaging.register(Service, 'image', 'image_renditions')
+imaging.register(TeamMember, 'photo', 'photo_renditions')
+
+tags.register(Service, 'technologies', 'technology_tags')
@@ -0,0 +1,92 @@
+"""
+Pre-rendered snapshots of the public site content payload.
+
+``get_site_content`` is served from JSON bytes rendered once per language
+projection (``fa``, ``en`` and ``all``) and kept in the default cache. The
+cache key carries the shared content versions of the snapshot models (see
+``core.versioning``), so once a write moves them every worker misses the old
+snapshot rather than serving it. Snapshots are rebuilt right after such a
+write (see ``core.signals``), so a read rarely touches the database; old
+versions expire after ``SITE_CONTENT_SNAPSHOT_TIMEOUT`` seconds.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from .language import SUPPORTED_LANGUAGES, ALL_LANGUAGES, DEFAULT_LANGUAGE, project_queryset
+from .models import HeroSection, Service, TeamMember, AboutSection, ContactInfo
+from .serializers import (
+    HeroSectionSerializer, ServiceSerializer, TeamMemberSerializer,
+    AboutSectionSerializer, ContactInfoSerializer
+)
+from . import versioning
+
+SNAPSHOT_LANGUAGES = SUPPORTED_LANGUAGES + (ALL_LANGUAGES,)
+SNAPSHOT_CACHE_KEY = 'core:site-content:{lang}:{version}'
+
+# Models whose rows end up in the site content payload
+SNAPSHOT_MODELS = (HeroSection, Service, TeamMember, AboutSection, ContactInfo)
+
+
+class Snapshot:
+    """Rendered payload together with its strong ETag"""
+
+    __slots__ = ('content', 'etag')
+
+    def __init__(self, content):
+        self.content = content
+        self.etag = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+
+
+def build_site_content(lang):
+    """Serialize all site content for initial load"""
+    context = {'lang': lang}
+    hero = project_queryset(HeroSection.objects.filter(is_active=True), HeroSectionSerializer, lang).first()
+    services = project_queryset(Service.objects.filter(is_active=True), ServiceSerializer, lang)
+    team = project_queryset(TeamMember.objects.filter(is_active=True), TeamMemberSerializer, lang)
+    about = project_queryset(AboutSection.objects.filter(is_active=True), AboutSectionSerializer, lang).first()
+    contact = project_queryset(ContactInfo.objects.filter(is_active=True), ContactInfoSerializer, lang).first()
+
+    return {
+        # Unprojected payloads reported the default language before ``?lang=all`` existed
+        'language': lang if lang in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE,
+        'hero': HeroSectionSerializer(hero, context=context).data if hero else None,
+        'services': ServiceSerializer(services, many=True, context=context).data,
+        'team': TeamMemberSerializer(team, many=True, context=context).data,
+        'about': AboutSectionSerializer(about, context=context).data if about else None,
+        'contact': ContactInfoSerializer(contact, context=context).data if contact else None,
+    }
+
+
+def content_version():
+    """Digest of the current content versions of ``SNAPSHOT_MODELS``"""
+    versions = versioning.get_versions(SNAPSHOT_MODELS)
+    tokens = ':'.join(versions[model][1] for model in SNAPSHOT_MODELS)
+    return hashlib.sha256(tokens.encode()).hexdigest()[:16]
+
+
+def render_snapshot(lang, version=None):
+    """Render the payload for ``lang`` and store it in the cache"""
+    # Read the version first: the content is then at least as new as the key says
+    version = version or content_version()
+    snapshot = Snapshot(JSONRenderer().render(build_site_content(lang)))
+    timeout = getattr(settings, 'SITE_CONTENT_SNAPSHOT_TIMEOUT', 24 * 60 * 60)
+    cache.set(SNAPSHOT_CACHE_KEY.format(lang=lang, version=version), snapshot, timeout)
+    return snapshot
+
+
+def get_snapshot(lang):
+    """Return the cached snapshot for ``lang``, rendering it on a miss"""
+    version = content_version()
+    snapshot = cache.get(SNAPSHOT_CACHE_KEY.format(lang=lang, version=version))
+    if snapshot is None:
+        snapshot = render_snapshot(lang, version)
+    return snapshot
+
+
+def rebuild_snapshots():
+    version = content_version()
+    for lang in SNAPSHOT_LANGUAGES:
+        render_snapshot(lang, version)
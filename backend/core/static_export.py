@@ -0,0 +1,258 @@
+"""
+Static JSON export of the public read API.
+
+Every public endpoint is rendered through its real view into
+``<output>/<endpoint path>/<lang>.json`` so the API can be hosted on a CDN next
+to the frontend build. A manifest kept outside the published directory
+records, for each artifact, the dependency keys it was rendered from, a
+fingerprint for every key and the content version of every model. On the next
+run only the rows of models whose version moved are fingerprinted again, and
+only artifacts whose dependencies changed are rendered again; artifacts for
+rows that disappeared are removed.
+
+Dependency keys name a group of rows: ``portfolio.project`` is every project,
+``portfolio.project:12`` a single one and ``portfolio.project:category=3``
+the projects of one category. A related-projects artifact depends on its own
+list and on the projects in it, not on every project.
+"""
+import hashlib
+import json
+import os
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from django.test import RequestFactory
+from django.urls import resolve
+from rest_framework.mixins import ListModelMixin
+
+from core import versioning
+from core.language import SUPPORTED_LANGUAGES
+from core.models import HeroSection, Service, TeamMember, AboutSection, ContactInfo
+from portfolio.models import (
+    ProjectCategory, Project, ProjectImage, ProjectTestimonial, ProjectRating, RelatedProject
+)
+
+# Columns that change on every page view and are allowed to go stale
+VOLATILE_FIELDS = {'views_count'}
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+HERO, SERVICE, TEAM, ABOUT, CONTACT = (
+    _label(HeroSection), _label(Service), _label(TeamMember),
+    _label(AboutSection), _label(ContactInfo)
+)
+CATEGORY, PROJECT, TESTIMONIAL = _label(ProjectCategory), _label(Project), _label(ProjectTestimonial)
+RELATED, IMAGE, RATING = _label(RelatedProject), _label(ProjectImage), _label(ProjectRating)
+
+EXPORTED_MODELS = (
+    HeroSection, Service, TeamMember, AboutSection, ContactInfo,
+    ProjectCategory, Project, ProjectImage, ProjectTestimonial, ProjectRating, RelatedProject
+)
+
+
+def _row_keys(model, row):
+    """Dependency keys a row contributes to"""
+    label = _label(model)
+    if model is ProjectCategory:
+        return [label, f"{label}:{row['id']}"]
+    if model is Project:
+        return [label, f"{label}:{row['id']}", f"{label}:category={row['category_id']}"]
+    if model is ProjectTestimonial:
+        return [label, f"{label}:project={row['project_id']}"]
+    if model in (RelatedProject, ProjectImage, ProjectRating):
+        return [label, f"{label}:project={row['project_id']}"]
+    return [label]
+
+
+def _key_model(key):
+    return key.split(':', 1)[0]
+
+
+def fingerprint_rows(models=EXPORTED_MODELS):
+    """Return ``{dependency key: digest}`` over the rows of ``models``"""
+    digests = defaultdict(hashlib.sha256)
+    for model in models:
+        names = [
+            field.attname for field in model._meta.concrete_fields
+            if field.name not in VOLATILE_FIELDS
+        ]
+        for values in model.objects.order_by('pk').values_list(*names):
+            encoded = repr(values).encode()
+            for key in _row_keys(model, dict(zip(names, values))):
+                digests[key].update(encoded)
+    return {key: digest.hexdigest() for key, digest in digests.items()}
+
+
+def plan_artifacts():
+    """Return ``(endpoint path, dependency keys)`` for every public endpoint"""
+    core_endpoints = [
+        ('/api/core/content/', [HERO, SERVICE, TEAM, ABOUT, CONTACT]),
+        ('/api/core/hero/', [HERO]),
+        ('/api/core/services/', [SERVICE]),
+        ('/api/core/team/', [TEAM]),
+        ('/api/core/about/', [ABOUT]),
+        ('/api/core/contact-info/', [CONTACT]),
+    ]
+    portfolio_endpoints = [
+        ('/api/portfolio/categories/', [CATEGORY, PROJECT]),
+        ('/api/portfolio/projects/', [CATEGORY, PROJECT, RATING]),
+        ('/api/portfolio/projects/featured/', [CATEGORY, PROJECT, RATING]),
+        ('/api/portfolio/stats/', [CATEGORY, PROJECT]),
+    ]
+    artifacts = core_endpoints + portfolio_endpoints
+
+    categories = dict(Project.objects.values_list('id', 'category_id'))
+    neighbours = defaultdict(list)
+    for project_id, related_id in RelatedProject.objects.values_list('project_id', 'related_id'):
+        neighbours[project_id].append(related_id)
+
+    def card_keys(project_id):
+        # A project card embeds its category, with that category's project count
+        category_id = categories[project_id]
+        return [f'{PROJECT}:{project_id}', f'{RATING}:project={project_id}',
+                f'{CATEGORY}:{category_id}', f'{PROJECT}:category={category_id}']
+
+    projects = Project.objects.filter(is_active=True).values_list('id', 'slug')
+    for project_id, slug in projects:
+        own = [f'{PROJECT}:{project_id}', f'{TESTIMONIAL}:project={project_id}']
+        related = {f'{PROJECT}:{project_id}', f'{RELATED}:project={project_id}'}
+        for related_id in neighbours[project_id]:
+            related.update(card_keys(related_id))
+        artifacts += [
+            (f'/api/portfolio/projects/{slug}/',
+             own + card_keys(project_id)[1:] + [f'{IMAGE}:project={project_id}']),
+            (f'/api/portfolio/projects/{slug}/related/', sorted(related)),
+            (f'/api/portfolio/projects/{slug}/testimonials/', own),
+        ]
+    return artifacts
+
+
+class StaticExporter:
+    """Render public endpoints to JSON files, skipping unchanged artifacts"""
+
+    def __init__(self, output_dir, base_url, manifest_path, languages=SUPPORTED_LANGUAGES):
+        self.output_dir = output_dir
+        # Kept out of ``output_dir``, which is published as is
+        self.manifest_path = manifest_path
+        self.base_url = base_url
+        self.languages = languages
+        url = urlsplit(base_url)
+        self.secure = url.scheme == 'https'
+        self.factory = RequestFactory()
+        self.environ = {
+            'SERVER_NAME': url.hostname or 'localhost',
+            'SERVER_PORT': str(url.port or (443 if self.secure else 80)),
+        }
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as fp:
+                return json.load(fp)
+        except FileNotFoundError:
+            return {'output_dir': None, 'base_url': None, 'versions': {}, 'keys': {}, 'artifacts': {}}
+
+    def export(self, force=False):
+        """Bring the export up to date; returns ``(written, skipped, removed)``"""
+        manifest = self.load_manifest()
+        output_dir = os.path.abspath(self.output_dir)
+        # Absolute media URLs are baked into every payload, and the manifest
+        # only describes the directory it was written for
+        force = (force or manifest.get('base_url') != self.base_url
+                 or manifest.get('output_dir') != output_dir)
+
+        # Read the versions before the rows: a write landing in between moves
+        # its version again and is fingerprinted on the next run
+        versions = {
+            _label(model): token for model, (timestamp, token) in versioning.get_versions(EXPORTED_MODELS).items()
+        }
+        previous_versions = {} if force else manifest.get('versions', {})
+        stale = [model for model in EXPORTED_MODELS if previous_versions.get(_label(model)) != versions[_label(model)]]
+        stale_labels = {_label(model) for model in stale}
+        previous_keys = manifest['keys']
+        keys = {key: digest for key, digest in previous_keys.items() if _key_model(key) not in stale_labels}
+        keys.update(fingerprint_rows(stale))
+        changed = {
+            key for key in set(keys) | set(previous_keys)
+            if keys.get(key) != previous_keys.get(key)
+        }
+
+        artifacts = {}
+        written = skipped = 0
+        for path, deps in plan_artifacts():
+            for lang in self.languages:
+                name = self.artifact_name(path, lang)
+                previous = manifest['artifacts'].get(name)
+                exists = os.path.exists(os.path.join(self.output_dir, name))
+                if not force and previous is not None and exists and not changed.intersection(deps):
+                    artifacts[name] = previous
+                    skipped += 1
+                    continue
+                content = self.render(path, lang)
+                digest = hashlib.sha256(content).hexdigest()
+                if previous is None or previous['sha256'] != digest or not exists:
+                    self.write(name, content)
+                    written += 1
+                else:
+                    skipped += 1
+                artifacts[name] = {'deps': sorted(deps), 'sha256': digest}
+
+        removed = 0
+        for name in set(manifest['artifacts']) - set(artifacts):
+            try:
+                os.remove(os.path.join(self.output_dir, name))
+                removed += 1
+            except FileNotFoundError:
+                pass
+
+        _write_file(self.manifest_path, json.dumps({
+            'output_dir': output_dir, 'base_url': self.base_url, 'versions': versions,
+            'keys': keys, 'artifacts': artifacts,
+        }, indent=1, sort_keys=True).encode())
+        return written, skipped, removed
+
+    @staticmethod
+    def artifact_name(path, lang):
+        return os.path.join(path.strip('/').removeprefix('api/'), f'{lang}.json')
+
+    def render(self, path, lang):
+        """Render ``path`` through its view and return the JSON body"""
+        match = resolve(path)
+        view = match.func
+        view_class = getattr(view, 'view_class', None)
+        paginated = view_class is not None and issubclass(view_class, ListModelMixin)
+        if view_class is not None:
+            initkwargs = {}
+            if paginated:
+                initkwargs['pagination_class'] = None
+            if hasattr(view_class, 'count_views'):
+                initkwargs['count_views'] = False
+            view = view_class.as_view(**initkwargs)
+
+        request = self.factory.get(path, {'lang': lang}, secure=self.secure, **self.environ)
+        response = view(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        if response.status_code != 200:
+            raise ValueError(f'{path} returned {response.status_code}')
+
+        if not paginated:
+            return response.content
+        # Keep the paginated envelope so clients parse both sources alike
+        results = json.loads(response.content)
+        return json.dumps({
+            'count': len(results), 'next': None, 'previous': None, 'results': results,
+        }, ensure_ascii=False, separators=(',', ':')).encode()
+
+    def write(self, name, content):
+        _write_file(os.path.join(self.output_dir, name), content)
+
+
+def _write_file(path, content):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as fp:
+        fp.write(content)
+    os.replace(tmp_path, path)
@@ -0,0 +1,103 @@
+"""
+Normalized technology tags.
+
+``Service.technologies`` and ``Project.technologies`` stay the editable JSON
+lists the API exposes. Registered models mirror them into a many-to-many
+``technology_tags`` relation on every save, so lookups by technology use
+the indexed ``technology_id`` column of the through table instead of
+scanning JSON.
+
+The mirror is written from ``post_save``; ``Service.save`` and
+``Project.save`` run in a transaction so the tags commit or roll back with
+the row. Rows written without Model.save() are resynced from
+``content_changed``, and ``manage.py rebuild_technology_tags`` rewrites every
+registered model's tags from its lists.
+"""
+from django.db.models.signals import post_save
+
+from .models import Technology
+
+# {model: (JSON list field name, many-to-many field name)}
+_registry = {}
+
+
+def register(model, list_field, tags_field):
+    """Mirror ``model.list_field`` into ``model.tags_field`` on every save"""
+    from .signals import content_changed
+
+    _registry[model] = (list_field, tags_field)
+    uid = f'technology-tags-{model._meta.label}'
+    post_save.connect(sync_on_save, sender=model, dispatch_uid=uid)
+    content_changed.connect(sync_changed, sender=model, dispatch_uid=uid)
+
+
+def iter_registered():
+    for model, (list_field, tags_field) in _registry.items():
+        yield model, list_field, tags_field
+
+
+def get_technologies(names):
+    """Return the ``Technology`` rows for ``names``, creating missing ones"""
+    by_key = {}
+    for name in names:
+        key = Technology.normalize_key(name)
+        if key and key not in by_key:
+            by_key[key] = ' '.join(str(name).split())[:100]
+    if not by_key:
+        return []
+    technologies = list(Technology.objects.filter(key__in=by_key))
+    missing = set(by_key) - {technology.key for technology in technologies}
+    if missing:
+        # Another writer may create the same tag concurrently
+        Technology.objects.bulk_create(
+            [Technology(name=by_key[key], key=key) for key in missing],
+            ignore_conflicts=True,
+        )
+        technologies += Technology.objects.filter(key__in=missing)
+    return technologies
+
+
+def sync_tags(instance):
+    list_field, tags_field = _registry[type(instance)]
+    getattr(instance, tags_field).set(get_technologies(getattr(instance, list_field) or []))
+
+
+def sync_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    list_field, tags_field = _registry[sender]
+    if update_fields is not None and list_field not in update_fields:
+        return
+    sync_tags(instance)
+
+
+def sync_changed(sender, pks=None, fields=None, **kwargs):
+    """``content_changed`` receiver for rows written without Model.save()"""
+    from .signals import affects
+
+    list_field, tags_field = _registry[sender]
+    if pks and affects(fields, list_field):
+        sync_tags_bulk(sender, sender.objects.filter(pk__in=pks).only('pk', list_field))
+
+
+def sync_tags_bulk(model, instances):
+    """Rewrite the tags of many ``instances`` with a fixed number of queries"""
+    list_field, tags_field = _registry[model]
+    names = {instance.pk: getattr(instance, list_field) or [] for instance in instances}
+    technologies = {
+        technology.key: technology.pk
+        for technology in get_technologies([name for values in names.values() for name in values])
+    }
+    rows = {
+        (pk, technologies[key])
+        for pk, values in names.items()
+        for key in map(Technology.normalize_key, values) if key in technologies
+    }
+
+    field = model._meta.get_field(tags_field)
+    through = field.remote_field.through
+    source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+    through.objects.filter(**{f'{source}__in': list(names)}).delete()
+    through.objects.bulk_create([
+        through(**{f'{source}_id': pk, f'{target}_id': technology_id}) for pk, technology_id in rows
+    ])
@@ -1,3 +1,290 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+from PIL import Image
+
+from portfolio.models import ProjectCategory, Project, RelatedProject
+
+from . import background, imaging, ingestion, static_export, tags, versioning
+from .models import ContactMessage, HeroSection, Service
+from .snapshots import get_snapshot
+
+
+class SiteContentSnapshotTests(TestCase):
+    
+    def setUp(self):
+        # The default cache outlives the test database
+        cache.clear()
+    
+    def test_write_from_another_worker_is_served(self):
+        hero = HeroSection.objects.create(title_fa='عنوان', title_en='Title', subtitle_fa='-', subtitle_en='-')
+        self.assertEqual(json.loads(get_snapshot('en').content)['hero']['title'], 'Title')
+        
+        # Another worker's write: the shared version moves, this worker rebuilt nothing
+        HeroSection.objects.filter(pk=hero.pk).update(title_en='New title')
+        versioning.bump(HeroSection)
+        
+        snapshot = get_snapshot('en')
+        self.assertEqual(json.loads(snapshot.content)['hero']['title'], 'New title')
+        self.assertEqual(get_snapshot('en').etag, snapshot.etag)
+    
+    def test_default_payload_keeps_both_languages(self):
+        HeroSection.objects.create(title_fa='عنوان', title_en='Title', subtitle_fa='-', subtitle_en='-')
+        
+        content = self.client.get('/api/core/content/').json()
+        self.assertEqual(content['language'], 'fa')
+        self.assertEqual((content['hero']['title_fa'], content['hero']['title_en']), ('عنوان', 'Title'))
+        self.assertEqual(self.client.get('/api/core/content/', {'lang': 'en'}).json()['hero']['title'], 'Title')
+    
+    def test_rebuild_after_commit_uses_the_new_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            HeroSection.objects.create(title_fa='عنوان', title_en='Title', subtitle_fa='-', subtitle_en='-')
+        
+        with self.assertNumQueries(0):
+            snapshot = get_snapshot('en')
+        self.assertEqual(json.loads(snapshot.content)['hero']['title'], 'Title')
+
+
+class ConditionalGetTests(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+    
+    def test_last_modified_waits_for_the_stamp_second_to_end(self):
+        now = time.time()
+        with mock.patch('core.versioning.time.time', return_value=now):
+            versioning.bump(HeroSection)
+            response = self.client.get('/api/core/hero/')
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        
+        with mock.patch('core.versioning.time.time', return_value=now + 1):
+            response = self.client.get('/api/core/hero/')
+        self.assertEqual(response['Last-Modified'], http_date(int(now)))
+    
+    def test_write_in_the_same_second_is_not_revalidated(self):
+        now = int(time.time()) + 0.1
+        with mock.patch('core.versioning.time.time', return_value=now):
+            versioning.bump(HeroSection)
+        with mock.patch('core.versioning.time.time', return_value=now + 0.2):
+            first = self.client.get('/api/core/hero/')
+        with mock.patch('core.versioning.time.time', return_value=now + 0.5):
+            versioning.bump(HeroSection)
+        
+        # The response between the writes gave the client no date to revalidate with
+        self.assertNotIn('Last-Modified', first)
+        with mock.patch('core.versioning.time.time', return_value=now + 2):
+            response = self.client.get('/api/core/hero/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+    
+    def test_unchanged_content_is_not_modified(self):
+        versioning.bump(HeroSection)
+        with mock.patch('core.versioning.time.time', return_value=time.time() + 2):
+            response = self.client.get('/api/core/hero/')
+            self.assertEqual(self.client.get('/api/core/hero/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+            self.assertEqual(
+                self.client.get('/api/core/hero/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+            )
+
+
+class TechnologyTagTests(TestCase):
+    
+    def create_service(self, technologies):
+        return Service.objects.create(
+            title_fa='خدمت', title_en='Service', description_fa='-', description_en='-', technologies=technologies
+        )
+    
+    def tag_names(self, service):
+        return sorted(service.technology_tags.values_list('name', flat=True))
+    
+    def test_failed_tag_sync_rolls_back_the_save(self):
+        service = self.create_service(['Django'])
+        
+        service.technologies = ['Django', 'React']
+        with mock.patch.object(tags, 'get_technologies', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                service.save()
+        
+        self.assertEqual(Service.objects.get(pk=service.pk).technologies, ['Django'])
+        self.assertEqual(self.tag_names(service), ['Django'])
+    
+    def test_rebuild_command_repairs_drift(self):
+        service = self.create_service(['Django', 'React'])
+        Service.objects.filter(pk=service.pk).update(technologies=['Vue'])
+        
+        call_command('rebuild_technology_tags', stdout=StringIO())
+        self.assertEqual(self.tag_names(service), ['Vue'])
+
+
+class StaticExportTests(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+        for target in (
+            'core.background.PeriodicTask.start', 'core.background.PeriodicTask.wake',
+            'portfolio.related.schedule_update',
+        ):
+            patcher = mock.patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.output_dir = os.path.join(tmp.name, 'api')
+        self.exporter = static_export.StaticExporter(
+            self.output_dir, 'http://testserver', os.path.join(tmp.name, 'manifest.json'), languages=['en']
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            web = ProjectCategory.objects.create(name_fa='وب', name_en='Web', slug='web')
+            mobile = ProjectCategory.objects.create(name_fa='موبایل', name_en='Mobile', slug='mobile')
+            self.projects = {
+                slug: Project.objects.create(
+                    category=category, slug=slug, title_fa=slug, title_en=slug,
+                    description_fa='-', description_en='-', short_description_fa='-', short_description_en='-',
+                )
+                for slug, category in (('first', web), ('second', web), ('other', mobile))
+            }
+            RelatedProject.objects.create(
+                project=self.projects['first'], related=self.projects['second'], rank=0, score=1.0
+            )
+            RelatedProject.objects.create(
+                project=self.projects['second'], related=self.projects['other'], rank=0, score=1.0
+            )
+    
+    def export(self):
+        with mock.patch.object(
+            static_export, 'fingerprint_rows', side_effect=static_export.fingerprint_rows
+        ) as fingerprint, mock.patch.object(
+            static_export.StaticExporter, 'render', autospec=True, side_effect=static_export.StaticExporter.render
+        ) as render:
+            self.exporter.export()
+        fingerprinted = [model for call in fingerprint.call_args_list for model in call.args[0]]
+        return fingerprinted, {call.args[1] for call in render.call_args_list}
+    
+    def test_unchanged_models_are_not_read_again(self):
+        self.export()
+        self.assertEqual(self.export(), ([], set()))
+        self.assertEqual(sorted(os.listdir(os.path.dirname(self.output_dir))), ['api', 'manifest.json'])
+    
+    def test_related_artifacts_follow_their_own_neighbourhood(self):
+        self.export()
+        other = self.projects['other']
+        with self.captureOnCommitCallbacks(execute=True):
+            other.title_en = 'Renamed'
+            other.save()
+        
+        fingerprinted, rendered = self.export()
+        self.assertEqual(fingerprinted, [Project])
+        self.assertIn('/api/portfolio/projects/second/related/', rendered)
+        self.assertNotIn('/api/portfolio/projects/first/related/', rendered)
+
+
+class PeriodicTaskTests(TestCase):
+    
+    def start_task(self):
+        task = background.PeriodicTask(mock.Mock(), 3600, 'test-task')
+        with mock.patch.object(background.threading, 'Thread'), mock.patch.object(background.atexit, 'register'):
+            task.start()
+        return task
+    
+    def test_exit_flush_skips_a_replaced_database(self):
+        task = self.start_task()
+        # As after the test runner dropped the test database
+        with mock.patch.dict(connections['default'].settings_dict, NAME='db.sqlite3'):
+            task.run_at_exit()
+        task.func.assert_not_called()
+        
+        task.run_at_exit()
+        task.func.assert_called_once_with()
+
+
+class RenditionTests(TestCase):
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        patcher = mock.patch.object(background, 'submit')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def upload(self, name):
+        buffer = BytesIO()
+        Image.new('RGB', (400, 200), 'red').save(buffer, 'PNG')
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+    
+    def test_renditions_of_a_replaced_image_are_discarded(self):
+        hero = HeroSection.objects.create(
+            title_fa='عنوان', title_en='Title', subtitle_fa='-', subtitle_en='-',
+            background_image=self.upload('hero/old.png')
+        )
+        rendered = {}
+        render_image = imaging.render_image
+        
+        def replace_while_rendering(name):
+            rendered.update(render_image(name))
+            HeroSection.objects.filter(pk=hero.pk).update(background_image=self.upload('hero/new.png'))
+            return rendered
+        
+        with mock.patch.object(imaging, 'render_image', side_effect=replace_while_rendering):
+            self.assertIsNone(imaging.generate_renditions(HeroSection, hero.pk, 'background_image'))
+        self.assertEqual(HeroSection.objects.get(pk=hero.pk).background_image_renditions, {})
+        self.assertTrue(rendered['variants'])
+        self.assertFalse(any(default_storage.exists(variant['name']) for variant in rendered['variants']))
+
+
+class ContactIngestionTests(TestCase):
+    
+    message = {'name': 'Client', 'email': 'client@example.com', 'subject': 'Hello', 'message': 'Text'}
+    
+    def setUp(self):
+        cache.clear()
+    
+    def post(self, **headers):
+        return self.client.post('/api/core/contact/', self.message, content_type='application/json', **headers)
+    
+    @override_settings(CONTACT_MESSAGE_INGESTION='queued')
+    def test_queued_message_is_stored_before_the_acknowledgement(self):
+        flusher = ingestion.contact_queue._flusher
+        with mock.patch.object(flusher, 'start'), mock.patch.object(
+            flusher, 'wake', side_effect=ingestion.contact_queue.flush
+        ):
+            response = self.post()
+            self.assertEqual(response.status_code, 202)
+            self.assertTrue(ContactMessage.objects.filter(receipt_id=response.data['receipt_id']).exists())
+            
+            retry = self.post()
+        self.assertEqual((retry.data['status'], retry.data['receipt_id']), ('duplicate', response.data['receipt_id']))
+    
+    @override_settings(CONTACT_MESSAGE_INGESTION='queued')
+    def test_failed_commit_fails_the_request(self):
+        flusher = ingestion.contact_queue._flusher
+        with mock.patch.object(flusher, 'start'), mock.patch.object(flusher, 'wake', side_effect=flusher.run_once):
+            with mock.patch.object(ingestion.contact_queue, '_commit', side_effect=RuntimeError):
+                with self.assertRaises(RuntimeError), self.assertLogs('core.background', 'ERROR'):
+                    ingestion.ingest(dict(self.message))
+            self.assertEqual(len(ingestion.contact_queue), 0)
+            self.assertFalse(ContactMessage.objects.exists())
+            
+            # The claims were released, so a retry is stored
+            self.assertEqual(ingestion.ingest(dict(self.message)).status, 'queued')
+    
+    def test_content_dedupe_survives_a_cache_loss(self):
+        first = ingestion.ingest(dict(self.message))
+        cache.clear()
+        
+        retry = ingestion.ingest(dict(self.message))
+        self.assertEqual((retry.status, retry.receipt_id), ('duplicate', first.receipt_id))
+        self.assertEqual(ContactMessage.objects.count(), 1)
@@ -16,17 +16,21 @@ urlpatterns = [
     path('admin/settings/<str:key>/', views.SiteSettingDetailView.as_view(), name='setting-detail'),
     
     path('admin/hero/', views.HeroSectionCreateView.as_view(), name='hero-create'),
+    path('admin/hero/bulk/', views.HeroSectionBulkView.as_view(), name='hero-bulk'),
     path('admin/hero/<int:pk>/', views.HeroSectionDetailView.as_view(), name='hero-detail'),
     
     path('admin/services/', views.ServiceCreateView.as_view(), name='service-create'),
+    path('admin/services/bulk/', views.ServiceBulkView.as_view(), name='service-bulk'),
     path('admin/services/<int:pk>/', views.ServiceDetailView.as_view(), name='service-detail'),
     
     path('admin/team/', views.TeamMemberCreateView.as_view(), name='team-create'),
+    path('admin/team/bulk/', views.TeamMemberBulkView.as_view(), name='team-bulk'),
     path('admin/team/<int:pk>/', views.TeamMemberDetailView.as_view(), name='team-detail'),
     
     path('admin/about/', views.AboutSectionCreateView.as_view(), name='about-create'),
     path('admin/about/<int:pk>/', views.AboutSectionDetailView.as_view(), name='about-detail'),
     
     path('admin/messages/', views.ContactMessageListView.as_view(), name='message-list'),
+    path('admin/messages/bulk/', views.bulk_contact_messages, name='message-bulk'),
     path('admin/messages/<int:pk>/', views.ContactMessageDetailView.as_view(), name='message-detail'),
 ]
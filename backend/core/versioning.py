@@ -0,0 +1,141 @@
+"""
+Per-model content versions and conditional GET support.
+
+Every tracked model has a version stamp in the default cache, which the
+workers share (see ``core.checks``), that moves on each committed save/delete
+(or ``content_changed``). Public read views derive a weak ETag and a
+Last-Modified date from the stamps of the models they render, so a
+revalidation is answered with 304 before any queryset is built.
+
+Last-Modified has whole-second precision, so it is left out while the newest
+stamp is from the current second: a second write within that second would
+otherwise share the date, and clients revalidating by date alone would keep
+the first version. Such responses carry the ETag only.
+"""
+import functools
+import hashlib
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+VERSION_CACHE_KEY = 'content-version:{}'
+
+# {model: fields whose sole change does not count as a content change}
+_tracked = {}
+
+
+def track(model, ignore_fields=()):
+    """Keep a content version for ``model``"""
+    from .signals import content_changed
+
+    _tracked[model] = frozenset(ignore_fields)
+    uid = f'content-version-{model._meta.label}'
+    post_save.connect(_on_save, sender=model, dispatch_uid=uid)
+    post_delete.connect(_on_change, sender=model, dispatch_uid=uid)
+    content_changed.connect(_on_change, sender=model, dispatch_uid=uid)
+
+
+def _on_save(sender, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields and frozenset(update_fields) <= _tracked.get(sender, frozenset()):
+        return
+    _on_change(sender)
+
+
+def _on_change(sender, **kwargs):
+    transaction.on_commit(lambda: bump(sender))
+
+
+def _key(model):
+    return VERSION_CACHE_KEY.format(model._meta.label_lower)
+
+
+def _new_stamp():
+    return (time.time(), uuid.uuid4().hex[:12])
+
+
+def bump(model):
+    cache.set(_key(model), _new_stamp(), None)
+
+
+def get_versions(models):
+    """Return ``{model: (timestamp, token)}``, starting missing stamps at now"""
+    keys = {_key(model): model for model in models}
+    stamps = cache.get_many(keys)
+    for key in set(keys) - set(stamps):
+        cache.add(key, _new_stamp(), None)
+        stamps[key] = cache.get(key) or _new_stamp()
+    return {model: stamps[key] for key, model in keys.items()}
+
+
+def get_validators(request, models, variant=''):
+    """Weak ETag and Last-Modified timestamp (or ``None``) for ``models`` at this URL"""
+    versions = get_versions(models)
+    digest = hashlib.sha1()
+    digest.update(request.get_host().encode())
+    digest.update(request.get_full_path().encode())
+    digest.update(variant.encode())
+    for model in models:
+        timestamp, token = versions[model]
+        digest.update(f'{model._meta.label_lower}:{token}'.encode())
+    last_modified = int(max(timestamp for timestamp, token in versions.values()))
+    if last_modified >= int(time.time()):
+        # More writes may still land in this second
+        last_modified = None
+    return f'W/"{digest.hexdigest()}"', last_modified
+
+
+def add_validators(response, etag, last_modified):
+    if response.status_code == 200:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Generic view mixin answering GET revalidations from content versions.
+
+    Views list the models their payload is built from in
+    ``conditional_models``.
+    """
+    conditional_models = ()
+
+    def get_conditional_variant(self):
+        # Responses negotiated per user (``?lang=preferred``) differ per language
+        get_language = getattr(self, 'get_language', None)
+        return get_language() if get_language is not None else ''
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = get_validators(
+            request, self.conditional_models, self.get_conditional_variant()
+        )
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = super().get(request, *args, **kwargs)
+        return add_validators(response, etag, last_modified)
+
+
+def conditional_on(*models):
+    """Function view decorator equivalent of ``ConditionalGetMixin``"""
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            from .language import resolve_language
+
+            etag, last_modified = get_validators(request, models, resolve_language(request))
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return not_modified
+            response = view_func(request, *args, **kwargs)
+            return add_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
@@ -1,7 +1,8 @@
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.utils import translation
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
 from .models import (
     SiteSetting, HeroSection, Service, TeamMember, 
     AboutSection, ContactInfo, ContactMessage
@@ -9,46 +10,70 @@ from .models import (
 from .serializers import (
     SiteSettingSerializer, HeroSectionSerializer, ServiceSerializer,
     TeamMemberSerializer, AboutSectionSerializer, ContactInfoSerializer,
-    ContactMessageSerializer
+    ContactMessageSerializer, ContactMessageBulkActionSerializer
 )
+from .bulk import BulkWriteAPIView
+from .fieldsets import SparseFieldsetMixin
+from .ingestion import ingest
+from .language import LanguageProjectionMixin, resolve_language
+from .pagination import KeysetPagination
+from .snapshots import get_snapshot
+from .versioning import ConditionalGetMixin
 
 
 # Public views (no authentication required)
 
-class HeroSectionListView(generics.ListAPIView):
+class HeroSectionListView(ConditionalGetMixin, SparseFieldsetMixin, LanguageProjectionMixin, generics.ListAPIView):
     queryset = HeroSection.objects.filter(is_active=True)
     serializer_class = HeroSectionSerializer
     permission_classes = [permissions.AllowAny]
+    conditional_models = (HeroSection,)
 
 
-class ServiceListView(generics.ListAPIView):
+class ServiceListView(ConditionalGetMixin, SparseFieldsetMixin, LanguageProjectionMixin, generics.ListAPIView):
     queryset = Service.objects.filter(is_active=True)
     serializer_class = ServiceSerializer
     permission_classes = [permissions.AllowAny]
+    conditional_models = (Service,)
 
 
-class TeamMemberListView(generics.ListAPIView):
+class TeamMemberListView(ConditionalGetMixin, SparseFieldsetMixin, LanguageProjectionMixin, generics.ListAPIView):
     queryset = TeamMember.objects.filter(is_active=True)
     serializer_class = TeamMemberSerializer
     permission_classes = [permissions.AllowAny]
+    conditional_models = (TeamMember,)
 
 
-class AboutSectionView(generics.ListAPIView):
+class AboutSectionView(ConditionalGetMixin, SparseFieldsetMixin, LanguageProjectionMixin, generics.ListAPIView):
     queryset = AboutSection.objects.filter(is_active=True)
     serializer_class = AboutSectionSerializer
     permission_classes = [permissions.AllowAny]
+    conditional_models = (AboutSection,)
 
 
-class ContactInfoView(generics.ListAPIView):
+class ContactInfoView(ConditionalGetMixin, SparseFieldsetMixin, LanguageProjectionMixin, generics.ListAPIView):
     queryset = ContactInfo.objects.filter(is_active=True)
     serializer_class = ContactInfoSerializer
     permission_classes = [permissions.AllowAny]
+    conditional_models = (ContactInfo,)
 
 
 class ContactMessageCreateView(generics.CreateAPIView):
     queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
     permission_classes = [permissions.AllowAny]
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = ingest(serializer.validated_data, request.headers.get('Idempotency-Key', ''))
+        
+        if result.status == 'created':
+            return Response(self.get_serializer(result.message).data, status=status.HTTP_201_CREATED)
+        if result.status == 'queued':
+            return Response({'receipt_id': result.receipt_id, 'status': result.status},
+                            status=status.HTTP_202_ACCEPTED)
+        return Response({'receipt_id': result.receipt_id, 'status': result.status})
 
 
 # Admin views (authentication required)
@@ -78,6 +103,11 @@ class HeroSectionDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAdminUser]
 
 
+class HeroSectionBulkView(BulkWriteAPIView):
+    queryset = HeroSection.objects.all()
+    serializer_class = HeroSectionSerializer
+
+
 class ServiceCreateView(generics.CreateAPIView):
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
@@ -90,6 +120,11 @@ class ServiceDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAdminUser]
 
 
+class ServiceBulkView(BulkWriteAPIView):
+    queryset = Service.objects.all()
+    serializer_class = ServiceSerializer
+
+
 class TeamMemberCreateView(generics.CreateAPIView):
     queryset = TeamMember.objects.all()
     serializer_class = TeamMemberSerializer
@@ -102,6 +137,11 @@ class TeamMemberDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAdminUser]
 
 
+class TeamMemberBulkView(BulkWriteAPIView):
+    queryset = TeamMember.objects.all()
+    serializer_class = TeamMemberSerializer
+
+
 class AboutSectionCreateView(generics.CreateAPIView):
     queryset = AboutSection.objects.all()
     serializer_class = AboutSectionSerializer
@@ -114,10 +154,24 @@ class AboutSectionDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAdminUser]
 
 
+class ContactMessagePagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
 class ContactMessageListView(generics.ListAPIView):
-    queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = ContactMessagePagination
+    
+    def get_queryset(self):
+        queryset = ContactMessage.objects.all()
+        
+        # Filter by read state (unread uses the partial index)
+        is_read = self.request.query_params.get('is_read')
+        if is_read in ('true', 'false'):
+            queryset = queryset.filter(is_read=is_read == 'true')
+        
+        return queryset
 
 
 class ContactMessageDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -130,21 +184,30 @@ class ContactMessageDetailView(generics.RetrieveUpdateDestroyAPIView):
 @permission_classes([permissions.AllowAny])
 def get_site_content(request):
     """Get all site content for initial load"""
-    lang = request.GET.get('lang', 'fa')
+    snapshot = get_snapshot(resolve_language(request))
+    
+    # Repeat visitors revalidate against the snapshot ETag without any DB work
+    not_modified = get_conditional_response(request, etag=snapshot.etag)
+    if not_modified is not None:
+        return not_modified
     
-    hero = HeroSection.objects.filter(is_active=True).first()
-    services = Service.objects.filter(is_active=True)
-    team = TeamMember.objects.filter(is_active=True)
-    about = AboutSection.objects.filter(is_active=True).first()
-    contact = ContactInfo.objects.filter(is_active=True).first()
+    response = HttpResponse(snapshot.content, content_type='application/json')
+    response['ETag'] = snapshot.etag
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def bulk_contact_messages(request):
+    """Mark or delete many contact messages with a single statement"""
+    serializer = ContactMessageBulkActionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    action = serializer.validated_data['action']
+    messages = ContactMessage.objects.filter(id__in=serializer.validated_data['ids'])
     
-    data = {
-        'language': lang,
-        'hero': HeroSectionSerializer(hero).data if hero else None,
-        'services': ServiceSerializer(services, many=True).data,
-        'team': TeamMemberSerializer(team, many=True).data,
-        'about': AboutSectionSerializer(about).data if about else None,
-        'contact': ContactInfoSerializer(contact).data if contact else None,
-    }
+    if action == 'delete':
+        affected, _ = messages.delete()
+    else:
+        affected = messages.update(is_read=action == 'mark_read')
     
-    return Response(data)
+    return Response({'action': action, 'affected': affected})
@@ -0,0 +1,28 @@
+"""
+WebSocket endpoint for ``messaging.push``, mounted by ``appb2b.asgi``.
+
+Connect to ``/ws/messaging/?token=<access token>``. Connections without a
+valid token are rejected before the handshake completes.
+"""
+from urllib.parse import parse_qs
+
+from . import push
+
+WEBSOCKET_PATH = '/ws/messaging/'
+
+
+async def websocket_application(scope, receive, send):
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    if scope['path'] != WEBSOCKET_PATH:
+        await send({'type': 'websocket.close'})
+        return
+
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    user, expires_at = await push.authenticate(query.get('token', [None])[0])
+    if user is None:
+        await send({'type': 'websocket.close'})
+        return
+
+    await send({'type': 'websocket.accept'})
+    await push.websocket_session(user, expires_at, receive, send)
@@ -0,0 +1,95 @@
+"""
+Denormalized conversation inbox state.
+
+Each ``Conversation`` points at its newest message and keeps two unread
+counters: ``participant_unread_count`` (staff messages the participant has
+not read) and ``staff_unread_count`` (participant messages staff have not
+read). New messages and reads adjust them with one relative ``UPDATE`` in
+the transaction that writes the message; any other change to a message
+(edits, moves, deletes) recounts the conversations involved.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+
+def _side_delta(sender_id, delta):
+    """Counter updates for a ``delta`` of unread messages from ``sender_id``"""
+    from_participant = Q(participant_id=sender_id)
+    return {
+        'staff_unread_count': Greatest(Case(
+            When(from_participant, then=F('staff_unread_count') + delta),
+            default=F('staff_unread_count'),
+            output_field=IntegerField(),
+        ), Value(0)),
+        'participant_unread_count': Greatest(Case(
+            When(from_participant, then=F('participant_unread_count')),
+            default=F('participant_unread_count') + delta,
+            output_field=IntegerField(),
+        ), Value(0)),
+    }
+
+
+def message_added(message):
+    """Make ``message`` the conversation's last message and count it as unread"""
+    from .models import Conversation
+
+    updates = _side_delta(message.sender_id, 0 if message.is_read else 1)
+    Conversation.objects.filter(pk=message.conversation_id).update(last_message=message, **updates)
+
+
+def mark_read(message):
+    """Mark ``message`` read once; returns whether this call did it"""
+    from .models import Conversation, Message, SyncSequence
+
+    with transaction.atomic():
+        read_at = timezone.now()
+        change_seq = SyncSequence.next_value()
+        if not Message.objects.filter(pk=message.pk, is_read=False).update(
+            is_read=True, read_at=read_at, change_seq=change_seq
+        ):
+            return False
+        Conversation.objects.filter(pk=message.conversation_id).update(**_side_delta(message.sender_id, -1))
+    message.is_read, message.read_at, message.change_seq = True, read_at, change_seq
+    return True
+
+
+def unread_counts(user):
+    """Unread messages and notifications of ``user`` as a participant"""
+    from .models import Conversation, Notification
+
+    unread_messages = Conversation.objects.filter(participant=user).aggregate(
+        count=Sum('participant_unread_count')
+    )['count'] or 0
+    unread_notifications = Notification.objects.filter(user=user, is_read=False).count()
+    return {'unread_messages': unread_messages, 'unread_notifications': unread_notifications}
+
+
+def recount(conversation_model, message_model, conversation_ids=None):
+    """Recompute the inbox fields of ``conversation_ids``, or of every conversation"""
+    messages = message_model.objects.filter(conversation=OuterRef('pk'))
+    unread = messages.filter(is_read=False).order_by().values('conversation')
+    from_participant = Q(sender=OuterRef('participant'))
+
+    conversations = conversation_model.objects.all()
+    if conversation_ids is not None:
+        conversations = conversations.filter(pk__in=list(conversation_ids))
+    return conversations.update(
+        last_message=Subquery(messages.order_by('-created_at', '-id').values('pk')[:1]),
+        participant_unread_count=Coalesce(
+            Subquery(unread.filter(~from_participant).annotate(count=Count('id')).values('count')), 0
+        ),
+        staff_unread_count=Coalesce(
+            Subquery(unread.filter(from_participant).annotate(count=Count('id')).values('count')), 0
+        ),
+    )
+
+
+def recount_conversations(conversation_ids):
+    """Recount ``conversation_ids``, ignoring ``None``"""
+    from .models import Conversation, Message
+
+    conversation_ids = sorted(set(conversation_ids) - {None})
+    if conversation_ids:
+        recount(Conversation, Message, conversation_ids)
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_inbox(apps, schema_editor):
+    # Frozen copy of messaging.inbox.recount as of this migration
+    Conversation = apps.get_model('messaging', 'Conversation')
+    Message = apps.get_model('messaging', 'Message')
+    messages = Message.objects.filter(conversation=OuterRef('pk'))
+    unread = messages.filter(is_read=False).order_by().values('conversation')
+    from_participant = Q(sender=OuterRef('participant'))
+    Conversation.objects.update(
+        last_message=Subquery(messages.order_by('-created_at', '-id').values('pk')[:1]),
+        participant_unread_count=Coalesce(
+            Subquery(unread.filter(~from_participant).annotate(count=Count('id')).values('count')), 0
+        ),
+        staff_unread_count=Coalesce(
+            Subquery(unread.filter(from_participant).annotate(count=Count('id')).values('count')), 0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='messaging.message', verbose_name='last message'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='participant_unread_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='unread by participant'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='staff_unread_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='unread by staff'),
+        ),
+        migrations.RunPython(count_inbox, migrations.RunPython.noop),
+    ]
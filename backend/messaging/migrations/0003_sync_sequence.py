@@ -0,0 +1,53 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_sequence(apps, schema_editor):
+    apps.get_model('messaging', 'SyncSequence').objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0002_conversation_inbox_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0, verbose_name='value')),
+            ],
+            options={
+                'verbose_name': 'Sync Sequence',
+                'verbose_name_plural': 'Sync Sequences',
+            },
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='change sequence'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='change sequence'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'change_seq'], name='message_conversation_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['change_seq'], name='message_change_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'change_seq'], name='notification_user_seq_idx'),
+        ),
+        migrations.RunPython(create_sequence, migrations.RunPython.noop),
+    ]
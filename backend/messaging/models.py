@@ -1,10 +1,53 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
 User = get_user_model()
 
 
+class SyncSequence(models.Model):
+    """Monotonic counter stamped on messages and notifications as ``change_seq``"""
+    value = models.BigIntegerField(_('value'), default=0)
+    
+    class Meta:
+        verbose_name = _('Sync Sequence')
+        verbose_name_plural = _('Sync Sequences')
+    
+    @classmethod
+    def next_value(cls):
+        """Take the next value; the counter stays locked until the transaction ends"""
+        if not cls.objects.filter(pk=1).update(value=models.F('value') + 1):
+            cls.objects.get_or_create(pk=1)
+            cls.objects.filter(pk=1).update(value=models.F('value') + 1)
+        return cls.objects.filter(pk=1).values_list('value', flat=True).get()
+    
+    @classmethod
+    def current(cls):
+        """The last committed value; every row stamped up to it is visible"""
+        return cls.objects.filter(pk=1).values_list('value', flat=True).first() or 0
+
+
+class SyncedModel(models.Model):
+    """Stamps ``change_seq`` in the transaction of every save (see ``messaging.sync``)"""
+    change_seq = models.BigIntegerField(_('change sequence'), default=0, editable=False)
+    
+    class Meta:
+        abstract = True
+    
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            self.change_seq = SyncSequence.next_value()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'change_seq'}
+            super().save(*args, **kwargs)
+
+
+class ConversationQuerySet(models.QuerySet):
+    def with_last_message(self):
+        """Fetch the participant and the last message with its sender in the same query"""
+        return self.select_related('participant', 'last_message__sender')
+
+
 class Conversation(models.Model):
     """Conversation between user and admin"""
     participant = models.ForeignKey(
@@ -15,9 +58,27 @@ class Conversation(models.Model):
     )
     subject = models.CharField(_('subject'), max_length=200)
     is_active = models.BooleanField(_('is active'), default=True)
+    # Maintained by ``messaging.inbox``
+    last_message = models.ForeignKey(
+        'Message',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name=_('last message')
+    )
+    participant_unread_count = models.PositiveIntegerField(
+        _('unread by participant'), default=0, editable=False
+    )
+    staff_unread_count = models.PositiveIntegerField(_('unread by staff'), default=0, editable=False)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     
+    objects = ConversationQuerySet.as_manager()
+    
+    INBOX_FIELDS = ('last_message', 'participant_unread_count', 'staff_unread_count')
+    
     class Meta:
         verbose_name = _('Conversation')
         verbose_name_plural = _('Conversations')
@@ -26,16 +87,21 @@ class Conversation(models.Model):
     def __str__(self):
         return f"{self.participant.email} - {self.subject}"
     
-    @property
-    def unread_count(self):
-        return self.messages.filter(is_read=False).exclude(sender=self.participant).count()
+    def save(self, *args, **kwargs):
+        # The inbox fields may have moved since this instance was loaded
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.INBOX_FIELDS
+            ]
+        super().save(*args, **kwargs)
     
     @property
-    def last_message(self):
-        return self.messages.first()
+    def unread_count(self):
+        return self.participant_unread_count
 
 
-class Message(models.Model):
+class Message(SyncedModel):
     """Individual message in a conversation"""
     conversation = models.ForeignKey(
         Conversation, 
@@ -59,12 +125,17 @@ class Message(models.Model):
         verbose_name = _('Message')
         verbose_name_plural = _('Messages')
         ordering = ['-created_at']
+        indexes = [
+            # Changes since a sync cursor (messaging.sync)
+            models.Index(fields=['conversation', 'change_seq'], name='message_conversation_seq_idx'),
+            models.Index(fields=['change_seq'], name='message_change_seq_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sender.email}: {self.content[:50]}..."
 
 
-class Notification(models.Model):
+class Notification(SyncedModel):
     """User notifications"""
     NOTIFICATION_TYPES = [
         ('message', _('New Message')),
@@ -94,6 +165,9 @@ class Notification(models.Model):
         verbose_name = _('Notification')
         verbose_name_plural = _('Notifications')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'change_seq'], name='notification_user_seq_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.title}"
@@ -0,0 +1,211 @@
+"""
+Real-time delivery of messaging events.
+
+Connected clients receive JSON events ``{"type": ..., "data": ...}``:
+
+- ``message.created``: a new message, as ``MessageSerializer`` renders it
+- ``message.read``: ``{"id", "conversation", "read_at"}`` of a message just read
+- ``notification.created``: a new notification
+- ``unread``: counter deltas, e.g. ``{"conversation": 3, "unread_messages": 1}``
+  for a participant, ``staff_unread_messages`` for staff and
+  ``unread_notifications``
+- ``resync``: the client missed events and should refetch its counts
+
+Events are published through ``core.broker`` after the writing transaction
+commits, to the channel of each user concerned; staff also listen on the
+``staff`` channel for participant messages. Clients connect over the
+WebSocket at ``/ws/messaging/`` (``messaging.consumers``) or, where
+WebSockets are unavailable, the ``events/`` server-sent events stream; both
+authenticate with a SimpleJWT access token in ``?token=`` and are closed
+when that token expires.
+"""
+import asyncio
+import json
+import time
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.broker import get_broker
+
+STAFF_CHANNEL = 'staff'
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def channels_for(user):
+    channels = [user_channel(user.pk)]
+    if user.is_staff:
+        channels.append(STAFF_CHANNEL)
+    return channels
+
+
+def _publish(channels, event_type, build_data):
+    broker = get_broker()
+    if not broker.has_subscribers(channels):
+        return
+    message = json.dumps({'type': event_type, 'data': build_data()}, cls=JSONEncoder)
+    broker.publish(channels, message)
+
+
+def publish_on_commit(channels, event_type, build_data):
+    """Publish ``build_data()`` to ``channels`` once the current transaction commits"""
+    transaction.on_commit(partial(_publish, list(channels), event_type, build_data), robust=True)
+
+
+def _message_side(message):
+    """The channels and counter field a message's unread state belongs to"""
+    if message.sender_id == message.conversation.participant_id:
+        return [STAFF_CHANNEL], 'staff_unread_messages'
+    return [user_channel(message.conversation.participant_id)], 'unread_messages'
+
+
+def message_created(message):
+    from .serializers import MessageSerializer
+
+    participant = user_channel(message.conversation.participant_id)
+    publish_on_commit(
+        [participant, STAFF_CHANNEL], 'message.created', lambda: MessageSerializer(message).data
+    )
+    if not message.is_read:
+        unread_changed(message, 1)
+
+
+def message_read(message):
+    participant = user_channel(message.conversation.participant_id)
+    publish_on_commit([participant, STAFF_CHANNEL], 'message.read', lambda: {
+        'id': message.pk, 'conversation': message.conversation_id, 'read_at': message.read_at,
+    })
+    unread_changed(message, -1)
+
+
+def unread_changed(message, delta):
+    channels, field = _message_side(message)
+    publish_on_commit(channels, 'unread', lambda: {'conversation': message.conversation_id, field: delta})
+
+
+def conversations_recounted(participant_ids):
+    """Counters of these participants' conversations were rebuilt"""
+    channels = [user_channel(user_id) for user_id in participant_ids] + [STAFF_CHANNEL]
+    publish_on_commit(channels, 'resync', dict)
+
+
+def notification_created(notification):
+    from .serializers import NotificationSerializer
+
+    publish_on_commit(
+        [user_channel(notification.user_id)], 'notification.created',
+        lambda: NotificationSerializer(notification).data
+    )
+    if not notification.is_read:
+        unread_notifications_changed(notification.user_id, 1)
+
+
+def unread_notifications_changed(user_id, delta):
+    if delta:
+        publish_on_commit([user_channel(user_id)], 'unread', lambda: {'unread_notifications': delta})
+
+
+# Connections
+
+def bearer_token(request):
+    """The access token of a ``Bearer`` authorization header"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return token if scheme == 'Bearer' else None
+
+
+def request_token(request):
+    """
+    The access token of ``?token=`` or of a ``Bearer`` authorization header.
+
+    Only for EventSource streams, which cannot set headers: query strings end
+    up in access logs, so plain HTTP endpoints use ``bearer_token``.
+    """
+    token = request.GET.get('token')
+    return bearer_token(request) if token is None else token
+
+
+def _get_user(authentication, validated_token):
+    close_old_connections()
+    try:
+        return authentication.get_user(validated_token)
+    finally:
+        close_old_connections()
+
+
+async def authenticate(raw_token):
+    """Return ``(user, expires at)`` for a valid access token, or ``(None, None)``"""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    if not raw_token:
+        return None, None
+    authentication = JWTAuthentication()
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+        user = await sync_to_async(_get_user)(authentication, validated_token)
+    except AuthenticationFailed:
+        return None, None
+    return user, validated_token.get('exp')
+
+
+def _seconds_left(expires_at):
+    return None if expires_at is None else max(0.0, expires_at - time.time())
+
+
+async def next_message(subscription, timeout):
+    try:
+        return await asyncio.wait_for(subscription.get(), timeout)
+    except asyncio.TimeoutError:
+        return None
+
+
+async def websocket_session(user, expires_at, receive, send):
+    """Forward ``user``'s events to an accepted WebSocket until either side closes"""
+    subscription = get_broker().subscribe(channels_for(user))
+
+    async def forward():
+        await send({'type': 'websocket.send', 'text': json.dumps({'type': 'ready', 'data': {}})})
+        while True:
+            await send({'type': 'websocket.send', 'text': await subscription.get()})
+
+    async def wait_for_disconnect():
+        # Clients have nothing to say; anything they send is ignored
+        while (await receive())['type'] != 'websocket.disconnect':
+            pass
+        return True
+
+    tasks = [asyncio.ensure_future(forward()), asyncio.ensure_future(wait_for_disconnect())]
+    try:
+        done, pending = await asyncio.wait(
+            tasks, timeout=_seconds_left(expires_at), return_when=asyncio.FIRST_COMPLETED
+        )
+        if not done:
+            # Token expired; the client reconnects with a fresh one
+            await send({'type': 'websocket.close', 'code': 4401})
+    finally:
+        subscription.close()
+        for task in tasks:
+            task.cancel()
+
+
+async def event_stream(user, expires_at):
+    """Server-sent events for ``user``, with a comment line as heartbeat"""
+    heartbeat = getattr(settings, 'PUSH_HEARTBEAT_INTERVAL', 25.0)
+    subscription = get_broker().subscribe(channels_for(user))
+    try:
+        yield 'retry: 3000\ndata: {"type": "ready", "data": {}}\n\n'
+        while True:
+            seconds_left = _seconds_left(expires_at)
+            if seconds_left is not None and seconds_left <= 0:
+                return
+            timeout = heartbeat if seconds_left is None else min(heartbeat, seconds_left)
+            message = await next_message(subscription, timeout)
+            yield ': heartbeat\n\n' if message is None else f'data: {message}\n\n'
+    finally:
+        subscription.close()
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from .models import Conversation, Message, Notification
 
 User = get_user_model()
@@ -40,19 +41,14 @@ class MessageCreateSerializer(serializers.ModelSerializer):
 
 class ConversationSerializer(serializers.ModelSerializer):
     participant = UserBriefSerializer(read_only=True)
-    last_message = serializers.SerializerMethodField()
-    unread_count = serializers.IntegerField(read_only=True)
+    last_message = MessageSerializer(read_only=True)
+    unread_count = serializers.IntegerField(source='participant_unread_count', read_only=True)
     
     class Meta:
         model = Conversation
         fields = ['id', 'participant', 'subject', 'is_active', 
-                  'created_at', 'updated_at', 'last_message', 'unread_count']
-    
-    def get_last_message(self, obj):
-        last_msg = obj.messages.first()
-        if last_msg:
-            return MessageSerializer(last_msg).data
-        return None
+                  'created_at', 'updated_at', 'last_message', 'unread_count', 'staff_unread_count']
+        read_only_fields = ['staff_unread_count']
 
 
 class ConversationCreateSerializer(serializers.ModelSerializer):
@@ -66,16 +62,17 @@ class ConversationCreateSerializer(serializers.ModelSerializer):
         initial_message = validated_data.pop('initial_message')
         user = self.context['request'].user
         
-        conversation = Conversation.objects.create(
-            participant=user,
-            **validated_data
-        )
-        
-        Message.objects.create(
-            conversation=conversation,
-            sender=user,
-            content=initial_message
-        )
+        with transaction.atomic():
+            conversation = Conversation.objects.create(
+                participant=user,
+                **validated_data
+            )
+            
+            Message.objects.create(
+                conversation=conversation,
+                sender=user,
+                content=initial_message
+            )
         
         return conversation
 
@@ -0,0 +1,66 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from . import inbox, push
+from .models import Conversation, Message, Notification
+
+
+def remember_previous_message(sender, instance, raw=False, **kwargs):
+    instance._previous_state = None
+    if instance.pk and not raw:
+        instance._previous_state = Message.objects.filter(pk=instance.pk).values_list(
+            'conversation_id', 'sender_id', 'is_read'
+        ).first()
+
+
+def recount_inboxes(conversation_ids):
+    conversation_ids = set(conversation_ids) - {None}
+    inbox.recount_conversations(conversation_ids)
+    push.conversations_recounted(set(
+        Conversation.objects.filter(pk__in=conversation_ids).values_list('participant_id', flat=True)
+    ))
+
+
+def update_inbox(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        inbox.message_added(instance)
+        push.message_created(instance)
+        return
+    previous = getattr(instance, '_previous_state', None)
+    if previous != (instance.conversation_id, instance.sender_id, instance.is_read):
+        recount_inboxes([instance.conversation_id, previous and previous[0]])
+
+
+def update_inbox_after_delete(sender, instance, **kwargs):
+    recount_inboxes([instance.conversation_id])
+
+
+def remember_notification_read(sender, instance, raw=False, **kwargs):
+    instance._was_read = None
+    if instance.pk and not raw:
+        instance._was_read = Notification.objects.filter(pk=instance.pk).values_list(
+            'is_read', flat=True
+        ).first()
+
+
+def push_notification(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        push.notification_created(instance)
+    elif instance._was_read is not None and instance._was_read != instance.is_read:
+        push.unread_notifications_changed(instance.user_id, -1 if instance.is_read else 1)
+
+
+def push_notification_delete(sender, instance, **kwargs):
+    if not instance.is_read:
+        push.unread_notifications_changed(instance.user_id, -1)
+
+
+pre_save.connect(remember_previous_message, sender=Message)
+post_save.connect(update_inbox, sender=Message)
+post_delete.connect(update_inbox_after_delete, sender=Message)
+pre_save.connect(remember_notification_read, sender=Notification)
+post_save.connect(push_notification, sender=Notification)
+post_delete.connect(push_notification_delete, sender=Notification)
@@ -0,0 +1,88 @@
+"""
+Incremental sync of messages and notifications.
+
+Every write to a ``Message`` or ``Notification`` stamps the row with the next
+``SyncSequence`` value in the writing transaction. The counter row stays
+locked until that transaction ends, so rows commit in sequence order and a
+cursor taken from the committed counter never passes a row that has yet to
+become visible.
+
+``collect_changes`` returns the rows stamped after a cursor through the
+``(conversation, change_seq)`` and ``(user, change_seq)`` indexes, so a sync
+costs the size of the delta rather than the history. Messages cover the
+user's conversations, or every conversation for staff as in the admin inbox;
+read-state changes come back as the changed messages. Deleted rows are not
+reported.
+"""
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from core.broker import get_broker
+
+from . import push
+
+SYNC_PAGE_SIZE = 200
+
+Changes = namedtuple('Changes', ['messages', 'notifications', 'cursor', 'has_more'])
+
+
+def _changed(queryset, since, until, limit):
+    """Rows stamped in ``(since, until]`` and the last value returned if more follow"""
+    rows = list(
+        queryset.filter(change_seq__gt=since, change_seq__lte=until).order_by('change_seq', 'pk')[:limit + 1]
+    )
+    if len(rows) <= limit:
+        return rows, None
+    # Bulk updates share one value; finish it so the next cursor does not split it
+    last = rows[limit - 1].change_seq
+    rows = [row for row in rows if row.change_seq < last]
+    return rows + list(queryset.filter(change_seq=last).order_by('pk')), last
+
+
+def user_messages(user):
+    from .models import Conversation, Message
+
+    messages = Message.objects.select_related('sender')
+    if user.is_staff:
+        return messages
+    return messages.filter(conversation__in=Conversation.objects.filter(participant=user).values('pk'))
+
+
+def collect_changes(user, since, limit=SYNC_PAGE_SIZE):
+    """``user``'s messages and notifications changed after the ``since`` cursor"""
+    from .models import Notification, SyncSequence
+
+    until = SyncSequence.current()
+    messages, messages_last = _changed(user_messages(user), since, until, limit)
+    notifications, notifications_last = _changed(Notification.objects.filter(user=user), since, until, limit)
+
+    truncated = [last for last in (messages_last, notifications_last) if last is not None]
+    if truncated:
+        # Stop both lists where the shorter one stopped
+        until = min(truncated)
+        messages = [message for message in messages if message.change_seq <= until]
+        notifications = [notification for notification in notifications if notification.change_seq <= until]
+    return Changes(messages, notifications, until, bool(truncated))
+
+
+async def wait_for_changes(user, since, timeout):
+    """
+    ``collect_changes``, holding on for up to ``timeout`` seconds while there
+    are none. Woken by the events ``messaging.push`` publishes to the user.
+    """
+    subscription = get_broker().subscribe(push.channels_for(user)) if timeout else None
+    try:
+        changes = await sync_to_async(collect_changes)(user, since)
+        if subscription is not None and not (changes.messages or changes.notifications):
+            if await push.next_message(subscription, timeout) is not None:
+                changes = await sync_to_async(collect_changes)(user, since)
+        return changes
+    finally:
+        if subscription is not None:
+            subscription.close()
+
+
+def get_max_wait():
+    return getattr(settings, 'MESSAGING_SYNC_MAX_WAIT', 30.0)
@@ -1,3 +1,194 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import inbox, push, sync
+from .consumers import websocket_application
+from .models import Conversation, Message, Notification, SyncSequence
+
+User = get_user_model()
+
+
+class CollectChangesTests(TestCase):
+    """Cursor semantics of ``messaging.sync.collect_changes``"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user('member', 'member@example.com', 'password')
+        self.conversation = Conversation.objects.create(participant=self.user, subject='Hello')
+    
+    def message(self):
+        return Message.objects.create(conversation=self.conversation, sender=self.user, content='Hi')
+    
+    def notification(self):
+        return Notification.objects.create(user=self.user, title='Update', message='Hi')
+    
+    def test_bulk_update_is_not_split_across_pages(self):
+        since = SyncSequence.current()
+        notifications = [self.notification() for _ in range(3)]
+        with transaction.atomic():
+            Notification.objects.filter(user=self.user).update(change_seq=SyncSequence.next_value())
+        
+        changes = sync.collect_changes(self.user, since, limit=2)
+        self.assertEqual(
+            sorted(notification.pk for notification in changes.notifications),
+            [notification.pk for notification in notifications],
+        )
+        self.assertTrue(changes.has_more)
+        
+        changes = sync.collect_changes(self.user, changes.cursor)
+        self.assertEqual(changes.notifications, [])
+        self.assertFalse(changes.has_more)
+    
+    def test_both_lists_stop_where_the_shorter_one_stopped(self):
+        since = SyncSequence.current()
+        messages, notifications = [], []
+        for _ in range(3):
+            messages.append(self.message())
+            notifications.append(self.notification())
+        
+        first = sync.collect_changes(self.user, since, limit=2)
+        self.assertTrue(first.has_more)
+        self.assertEqual(first.cursor, messages[1].change_seq)
+        self.assertEqual(first.messages, messages[:2])
+        self.assertEqual(first.notifications, notifications[:1])
+        
+        second = sync.collect_changes(self.user, first.cursor, limit=2)
+        self.assertFalse(second.has_more)
+        self.assertEqual(second.cursor, SyncSequence.current())
+        self.assertEqual(second.messages, messages[2:])
+        self.assertEqual(second.notifications, notifications[1:])
+    
+    def test_changes_after_the_cursor_only(self):
+        self.message()
+        cursor = SyncSequence.current()
+        notification = self.notification()
+        
+        changes = sync.collect_changes(self.user, cursor)
+        self.assertEqual(changes.messages, [])
+        self.assertEqual(changes.notifications, [notification])
+        self.assertEqual(changes.cursor, notification.change_seq)
+        self.assertFalse(changes.has_more)
+
+
+class SyncViewTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('member', 'member@example.com', 'password')
+        self.token = str(AccessToken.for_user(self.user))
+    
+    def test_non_finite_wait_is_rejected(self):
+        for wait in ('nan', 'inf', '-inf'):
+            response = self.client.get(
+                '/api/messaging/sync/', {'since': 0, 'wait': wait}, HTTP_AUTHORIZATION=f'Bearer {self.token}'
+            )
+            self.assertEqual(response.status_code, 400, wait)
+    
+    def test_returns_the_current_cursor_without_since(self):
+        Notification.objects.create(user=self.user, title='Update', message='Hi')
+        response = self.client.get('/api/messaging/sync/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'cursor': SyncSequence.current()})
+    
+    def test_query_string_token_is_rejected(self):
+        response = self.client.get('/api/messaging/sync/', {'token': self.token})
+        self.assertEqual(response.status_code, 401)
+
+
+class InboxCounterTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('member', 'member@example.com', 'password')
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True)
+        self.conversation = Conversation.objects.create(participant=self.user, subject='Hello')
+    
+    def message(self, sender):
+        return Message.objects.create(conversation=self.conversation, sender=sender, content='Hi')
+    
+    def counters(self):
+        return Conversation.objects.filter(pk=self.conversation.pk).values_list(
+            'last_message', 'participant_unread_count', 'staff_unread_count'
+        ).get()
+    
+    def assertMatchesRecount(self):
+        stored = self.counters()
+        inbox.recount_conversations([self.conversation.pk])
+        self.assertEqual(stored, self.counters())
+    
+    def test_counters_follow_every_write(self):
+        from_user = [self.message(self.user) for _ in range(2)]
+        from_staff = [self.message(self.staff) for _ in range(3)]
+        self.assertEqual(self.counters(), (from_staff[-1].pk, 3, 2))
+        
+        self.assertTrue(inbox.mark_read(from_staff[0]))
+        # A second read of the same message, e.g. from a stale instance
+        self.assertFalse(inbox.mark_read(Message.objects.get(pk=from_staff[0].pk)))
+        self.assertTrue(inbox.mark_read(from_user[0]))
+        self.assertEqual(self.counters()[1:], (2, 1))
+        self.assertMatchesRecount()
+        
+        from_staff[-1].delete()
+        self.assertMatchesRecount()
+    
+    def test_failed_counter_update_rolls_back_the_message(self):
+        self.message(self.staff)
+        with mock.patch.object(inbox, 'message_added', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.message(self.staff)
+        self.assertEqual(Message.objects.count(), 1)
+        self.assertEqual(self.counters()[1], 1)
+    
+    def test_stale_conversation_save_keeps_the_counters(self):
+        stale = Conversation.objects.get(pk=self.conversation.pk)
+        self.message(self.staff)
+        
+        stale.subject = 'Renamed'
+        stale.save()
+        self.assertEqual(self.counters()[1], 1)
+
 
-# Create your tests here.
+class PushAuthenticationTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('member', 'member@example.com', 'password')
+        expired = AccessToken.for_user(self.user)
+        expired.set_exp(lifetime=-timedelta(minutes=1))
+        inactive = User.objects.create_user('inactive', 'inactive@example.com', 'password')
+        inactive_token = AccessToken.for_user(inactive)
+        User.objects.filter(pk=inactive.pk).update(is_active=False)
+        self.rejected = {
+            'missing': None,
+            'malformed': 'not-a-token',
+            'expired': str(expired),
+            'refresh token': str(RefreshToken.for_user(self.user)),
+            'inactive user': str(inactive_token),
+        }
+    
+    async def connect(self, token):
+        sent = []
+        query = b'' if token is None else f'token={token}'.encode()
+        scope = {'type': 'websocket', 'path': '/ws/messaging/', 'query_string': query}
+        
+        async def receive():
+            return {'type': 'websocket.connect'}
+        
+        async def send(event):
+            sent.append(event)
+        
+        await websocket_application(scope, receive, send)
+        return sent
+    
+    async def test_websocket_rejects_invalid_tokens(self):
+        user, expires_at = await push.authenticate(str(AccessToken.for_user(self.user)))
+        self.assertEqual(user, self.user)
+        for case, token in self.rejected.items():
+            self.assertEqual(await self.connect(token), [{'type': 'websocket.close'}], case)
+    
+    async def test_event_stream_rejects_invalid_tokens(self):
+        for case, token in self.rejected.items():
+            params = {} if token is None else {'token': token}
+            response = await self.async_client.get('/api/messaging/events/', params)
+            self.assertEqual(response.status_code, 401, case)
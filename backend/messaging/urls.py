@@ -22,4 +22,6 @@ urlpatterns = [
     # Utility endpoints
     path('messages/<int:message_id>/read/', views.mark_message_read, name='message-read'),
     path('unread-counts/', views.get_unread_counts, name='unread-counts'),
+    path('events/', views.event_stream, name='events'),
+    path('sync/', views.sync_changes, name='sync'),
 ]
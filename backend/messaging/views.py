@@ -1,9 +1,15 @@
+import math
+
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
-from .models import Conversation, Message, Notification
+from . import inbox, push, sync
+from .models import Conversation, Message, Notification, SyncSequence
 from .serializers import (
     ConversationSerializer, 
     ConversationCreateSerializer,
@@ -21,7 +27,7 @@ class UserConversationListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Conversation.objects.filter(participant=self.request.user)
+        return Conversation.objects.with_last_message().filter(participant=self.request.user)
 
 
 class UserConversationCreateView(generics.CreateAPIView):
@@ -41,7 +47,7 @@ class UserConversationDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Conversation.objects.filter(participant=self.request.user)
+        return Conversation.objects.with_last_message().filter(participant=self.request.user)
 
 
 class UserMessageListView(generics.ListAPIView):
@@ -57,7 +63,7 @@ class UserMessageListView(generics.ListAPIView):
         if conversation.participant != self.request.user and not self.request.user.is_staff:
             return Message.objects.none()
         
-        return conversation.messages.all()
+        return conversation.messages.select_related('sender')
 
 
 class UserMessageCreateView(generics.CreateAPIView):
@@ -71,7 +77,9 @@ class UserMessageCreateView(generics.CreateAPIView):
         return context
     
     def perform_create(self, serializer):
-        serializer.save(sender=self.request.user)
+        # The message and its inbox counters commit together
+        with transaction.atomic():
+            serializer.save(sender=self.request.user)
 
 
 # Admin Conversation Views
@@ -80,14 +88,14 @@ class AdminConversationListView(generics.ListAPIView):
     """List all conversations (admin only)"""
     serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAdminUser]
-    queryset = Conversation.objects.all()
+    queryset = Conversation.objects.with_last_message()
 
 
 class AdminConversationDetailView(generics.RetrieveAPIView):
     """Get any conversation details (admin only)"""
     serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAdminUser]
-    queryset = Conversation.objects.all()
+    queryset = Conversation.objects.with_last_message()
 
 
 class AdminMessageCreateView(generics.CreateAPIView):
@@ -101,7 +109,9 @@ class AdminMessageCreateView(generics.CreateAPIView):
         return context
     
     def perform_create(self, serializer):
-        serializer.save(sender=self.request.user)
+        # The message and its inbox counters commit together
+        with transaction.atomic():
+            serializer.save(sender=self.request.user)
 
 
 # Notification Views
@@ -134,7 +144,11 @@ class NotificationMarkReadView(generics.UpdateAPIView):
 @permission_classes([permissions.IsAuthenticated])
 def mark_all_notifications_read(request):
     """Mark all notifications as read"""
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    with transaction.atomic():
+        count = Notification.objects.filter(user=request.user, is_read=False).update(
+            is_read=True, change_seq=SyncSequence.next_value()
+        )
+    push.unread_notifications_changed(request.user.pk, -count)
     return Response({'message': 'All notifications marked as read.'})
 
 
@@ -142,17 +156,15 @@ def mark_all_notifications_read(request):
 @permission_classes([permissions.IsAuthenticated])
 def mark_message_read(request, message_id):
     """Mark a message as read"""
-    message = get_object_or_404(Message, id=message_id)
+    message = get_object_or_404(Message.objects.select_related('conversation'), id=message_id)
     
     # Check permission
-    if message.conversation.participant != request.user and not request.user.is_staff:
+    if message.conversation.participant_id != request.user.pk and not request.user.is_staff:
         return Response({'error': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
     
     # Only mark as read if the user is not the sender
-    if message.sender != request.user:
-        message.is_read = True
-        message.read_at = timezone.now()
-        message.save()
+    if message.sender_id != request.user.pk and inbox.mark_read(message):
+        push.message_read(message)
     
     return Response({'message': 'Message marked as read.'})
 
@@ -161,21 +173,57 @@ def mark_message_read(request, message_id):
 @permission_classes([permissions.IsAuthenticated])
 def get_unread_counts(request):
     """Get unread message and notification counts"""
-    user = request.user
-    
-    # Unread messages
-    unread_messages = Message.objects.filter(
-        conversation__participant=user,
-        is_read=False
-    ).exclude(sender=user).count()
-    
-    # Unread notifications
-    unread_notifications = Notification.objects.filter(
-        user=user,
-        is_read=False
-    ).count()
-    
-    return Response({
-        'unread_messages': unread_messages,
-        'unread_notifications': unread_notifications
-    })
+    return Response(inbox.unread_counts(request.user))
+
+
+async def event_stream(request):
+    """Server-sent events for the authenticated user (see ``messaging.push``)"""
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse('Event streams are only served by the ASGI application.', status=501)
+    
+    user, expires_at = await push.authenticate(push.request_token(request))
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'}, status=401)
+    
+    response = StreamingHttpResponse(push.event_stream(user, expires_at), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _render_changes(request, user, changes):
+    context = {'request': request}
+    return {
+        'cursor': changes.cursor,
+        'has_more': changes.has_more,
+        'messages': MessageSerializer(changes.messages, many=True, context=context).data,
+        'notifications': NotificationSerializer(changes.notifications, many=True, context=context).data,
+        'unread_counts': inbox.unread_counts(user),
+    }
+
+
+async def sync_changes(request):
+    """
+    Messages and notifications changed since ``?since=<cursor>`` (see
+    ``messaging.sync``). ``?wait=<seconds>`` holds the request until there
+    are changes. Without ``since`` only the current cursor is returned.
+    """
+    user, _ = await push.authenticate(push.bearer_token(request))
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'}, status=401)
+    
+    try:
+        since = request.GET.get('since')
+        since = None if since is None else int(since)
+        wait = float(request.GET.get('wait', 0))
+        if not math.isfinite(wait):
+            raise ValueError(wait)
+        wait = min(max(wait, 0.0), sync.get_max_wait())
+    except ValueError:
+        return JsonResponse({'error': 'Invalid since or wait.'}, status=400)
+    
+    if since is None:
+        return JsonResponse({'cursor': await sync_to_async(SyncSequence.current)()})
+    
+    changes = await sync.wait_for_changes(user, since, wait)
+    return JsonResponse(await sync_to_async(_render_changes)(request, user, changes))
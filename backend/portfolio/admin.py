@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import ProjectCategory, Project, ProjectTestimonial
+from .models import ProjectCategory, Project, ProjectImage, ProjectTestimonial
+
+
+class ProjectImageInline(admin.TabularInline):
+    model = ProjectImage
+    extra = 0
+    fields = ['image', 'alt_fa', 'alt_en', 'order']
 
 
 class ProjectTestimonialInline(admin.TabularInline):
@@ -28,7 +34,7 @@ class ProjectAdmin(admin.ModelAdmin):
     search_fields = ['title_fa', 'title_en', 'description_fa', 'description_en', 'client_name']
     ordering = ['-is_featured', 'order', '-created_at']
     prepopulated_fields = {'slug': ('title_en',)}
-    inlines = [ProjectTestimonialInline]
+    inlines = [ProjectImageInline, ProjectTestimonialInline]
     readonly_fields = ['views_count', 'created_at', 'updated_at']
     fieldsets = (
         ('Basic Information', {
@@ -0,0 +1,93 @@
+"""
+Buffered project view counting.
+
+Views are tallied in a per-worker ``Counter`` and written by a background
+flusher as ``views_count = views_count + n`` updates, one statement per
+distinct ``n``, inside one transaction. The buffer is swapped out before
+each flush and merged back if the flush fails, so every view is written
+exactly once; the flusher also runs at interpreter exit (see
+``core.background.PeriodicTask``). The same transaction adds the views to
+``PortfolioStats.total_views`` and appends one ``ProjectViewEvent`` per
+project for ``portfolio.trending``.
+
+The buffer only lives in memory: a worker killed outright (SIGKILL, OOM, a
+crash) loses the views counted since its last flush, at most
+``PROJECT_VIEWS_FLUSH_INTERVAL`` seconds of its traffic.
+
+The public listings render and sort by ``views_count``, so a flush also moves
+the Project content version, at most once per
+``PROJECT_VIEWS_VERSION_INTERVAL`` seconds per worker so that busy pages
+still revalidate with 304 in between.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from core import versioning
+from core.background import PeriodicTask
+
+from .models import Project, ProjectViewEvent
+from . import stats, trending
+
+
+class ViewCounter:
+    """Per-worker buffer of project views awaiting a flush"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._version_bumped_at = 0.0
+        self._flusher = PeriodicTask(
+            self.flush,
+            getattr(settings, 'PROJECT_VIEWS_FLUSH_INTERVAL', 5.0),
+            'project-view-flusher',
+        )
+
+    def record(self, project_id):
+        """Count one view and return this worker's unflushed views of the project"""
+        self._flusher.start()
+        trending.refresher.start()
+        with self._lock:
+            self._counts[project_id] += 1
+            return self._counts[project_id]
+
+    def pending(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return
+
+        by_increment = defaultdict(list)
+        for project_id, views in counts.items():
+            by_increment[views].append(project_id)
+
+        try:
+            with transaction.atomic():
+                for views, ids in sorted(by_increment.items()):
+                    Project.objects.filter(pk__in=sorted(ids)).update(views_count=F('views_count') + views)
+                # Projects deleted since the views were counted get no views or event
+                existing = list(Project.objects.filter(pk__in=counts).values_list('pk', flat=True))
+                stats.add_views(sum(counts[pk] for pk in existing))
+                ProjectViewEvent.objects.bulk_create(
+                    [ProjectViewEvent(project_id=pk, views=counts[pk]) for pk in existing]
+                )
+        except Exception:
+            with self._lock:
+                self._counts.update(counts)
+            raise
+
+        now = time.monotonic()
+        if now - self._version_bumped_at >= getattr(settings, 'PROJECT_VIEWS_VERSION_INTERVAL', 60.0):
+            self._version_bumped_at = now
+            versioning.bump(Project)
+
+
+project_views = ViewCounter()
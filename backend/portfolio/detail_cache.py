@@ -0,0 +1,89 @@
+"""
+Per-project response cache for the public project pages.
+
+``resolve_slug`` maps a slug to ``(id, is_active)`` through the cache. Those
+entries are keyed by the Project content version, so any project write (a
+renamed or deactivated slug included) retires the whole map at once.
+
+Rendered payloads are keyed by a per-project generation token, which
+``invalidate`` replaces whenever the project, its category or one of its
+testimonials changes, and by the request parameters that shape them: the
+language and the ``?fields=``/``?expand=`` names, in sorted order. Any other
+query parameter is ignored, so it cannot add cache entries. Payloads are
+stored as plain JSON data, so they can be rendered by any renderer.
+"""
+import hashlib
+import json
+import uuid
+
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from core import versioning
+from core.fieldsets import resolve_fieldset
+
+from .models import Project
+
+SLUG_CACHE_KEY = 'portfolio:project-slug:{}:{}'
+GENERATION_CACHE_KEY = 'portfolio:project-generation:{}'
+PAYLOAD_CACHE_KEY = 'portfolio:project-payload:{}:{}:{}:{}'
+
+# Payloads carry views_count, which only catches up when they expire
+PAYLOAD_CACHE_TIMEOUT = 300
+
+_MISSING = (None, False)
+
+
+def resolve_slug(slug):
+    """Return ``(project id, is_active)``, or ``(None, False)`` for unknown slugs"""
+    token = versioning.get_versions([Project])[Project][1]
+    key = SLUG_CACHE_KEY.format(token, hashlib.sha1(slug.encode()).hexdigest())
+    found = cache.get(key)
+    if found is None:
+        found = Project.objects.filter(slug=slug).values_list('pk', 'is_active').first() or _MISSING
+        cache.set(key, tuple(found))
+    return tuple(found)
+
+
+def get_generation(project_id):
+    key = GENERATION_CACHE_KEY.format(project_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate(project_ids):
+    cache.delete_many([GENERATION_CACHE_KEY.format(pk) for pk in set(project_ids)])
+
+
+def _payload_key(kind, project_id, request, variant):
+    generation = get_generation(project_id)
+    if generation is None:
+        return None
+    fieldset = resolve_fieldset(request)
+    if fieldset is None:
+        shape = ['', '']
+    else:
+        fields = '*' if fieldset.fields is None else ','.join(sorted(fieldset.fields))
+        shape = [fields, ','.join(sorted(fieldset.expand))]
+    # Media URLs in the payload are absolute
+    request_key = hashlib.sha1(
+        '\n'.join([request.build_absolute_uri('/'), variant] + shape).encode()
+    ).hexdigest()
+    return PAYLOAD_CACHE_KEY.format(kind, project_id, generation, request_key)
+
+
+def get_payload(kind, project_id, request, variant=''):
+    key = _payload_key(kind, project_id, request, variant)
+    return cache.get(key) if key else None
+
+
+def set_payload(kind, project_id, request, data, variant=''):
+    """Store serializer output and return it as plain data"""
+    data = json.loads(JSONRenderer().render(data))
+    key = _payload_key(kind, project_id, request, variant)
+    if key:
+        cache.set(key, data, PAYLOAD_CACHE_TIMEOUT)
+    return data
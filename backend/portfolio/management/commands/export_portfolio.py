@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from portfolio import transfer
+
+
+class Command(BaseCommand):
+    help = 'Stream portfolio categories, projects or testimonials as NDJSON or CSV'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(transfer.DATASETS))
+        parser.add_argument(
+            '--output', default='-',
+            help='File to write to; "-" (the default) writes to stdout.'
+        )
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, dest='data_format',
+            help='Output format; guessed from the output file name by default.'
+        )
+    
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['data_format'] or transfer.guess_format(output)
+        rows = transfer.export_rows(transfer.DATASETS[options['dataset']], fmt)
+        if output == '-':
+            sys.stdout.writelines(rows)
+            return
+        with open(output, 'w', encoding='utf-8', newline='') as stream:
+            stream.writelines(rows)
+        self.stderr.write(self.style.SUCCESS(f'Exported {options["dataset"]} to {output}.'))
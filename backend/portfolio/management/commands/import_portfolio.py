@@ -0,0 +1,43 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio import transfer
+
+
+class Command(BaseCommand):
+    help = 'Upsert portfolio categories, projects or testimonials from NDJSON or CSV'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(transfer.DATASETS))
+        parser.add_argument('path', help='File to read; "-" reads from stdin.')
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, dest='data_format',
+            help='Input format; guessed from the file name by default.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=transfer.IMPORT_CHUNK_SIZE,
+            help='Rows validated and written per transaction.'
+        )
+    
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['data_format'] or transfer.guess_format(path)
+        dataset = transfer.DATASETS[options['dataset']]
+        try:
+            if path == '-':
+                result = transfer.import_rows(dataset, sys.stdin, fmt, options['chunk_size'])
+            else:
+                with open(path, encoding='utf-8', newline='') as stream:
+                    result = transfer.import_rows(dataset, stream, fmt, options['chunk_size'])
+        except OSError as exc:
+            raise CommandError(exc)
+        
+        for error in result.errors:
+            self.stderr.write(f'Line {error["line"]}: {json.dumps(error["errors"], ensure_ascii=False)}')
+        skipped = result.rows - result.written
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.written} of {result.rows} rows ({skipped} skipped). '
+            'Run generate_renditions for newly referenced images.'
+        ))
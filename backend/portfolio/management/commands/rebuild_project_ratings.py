@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from portfolio import ratings
+from portfolio.models import Project, ProjectRating
+
+
+class Command(BaseCommand):
+    help = 'Recount the rating aggregates of every project from its testimonials'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        project_ids = list(Project.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(project_ids), batch_size):
+            ratings.recount(project_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted ratings of {len(project_ids)} projects '
+            f'({ProjectRating.objects.filter(count__gt=0).count()} rated).'
+        ))
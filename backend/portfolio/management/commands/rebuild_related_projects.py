@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from portfolio import related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related projects of every active project'
+    
+    def handle(self, *args, **options):
+        projects = related.recompute()
+        self.stdout.write(self.style.SUCCESS(f'Computed related projects for {projects} projects.'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from portfolio import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the project full-text search index'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Projects indexed per batch.'
+        )
+    
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stdout.write(self.style.WARNING('Full-text search index requires SQLite; nothing to do.'))
+            return
+        with transaction.atomic():
+            indexed = search.rebuild_index(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} projects.'))
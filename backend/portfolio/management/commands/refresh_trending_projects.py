@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from portfolio import trending
+
+
+class Command(BaseCommand):
+    help = 'Roll up pending project view events and recompute the trending projects'
+    
+    def handle(self, *args, **options):
+        events = trending.rollup_events()
+        projects = trending.recompute_trending()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rolled up {events} view events; {projects} projects are trending.'
+        ))
@@ -0,0 +1,76 @@
+# Generated by Django 6.0.2
+
+import re
+
+from django.db import migrations
+
+# Frozen copy of portfolio.search as of this migration
+SEARCH_TABLE = 'portfolio_project_search'
+ZWNJ = '\u200c'
+CHARACTER_MAP = {
+    'ي': 'ی',
+    'ى': 'ی',
+    'ك': 'ک',
+    'ة': 'ه',
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+}
+NORMALIZE = re.compile('[{}\u064b-\u065f\u0670\u0640]'.format(''.join(CHARACTER_MAP)))
+COMPOUND = re.compile(rf'\w+(?:{ZWNJ}\w+)+')
+
+
+def index_text(*parts):
+    text = ' '.join(part for part in parts if part)
+    text = NORMALIZE.sub(lambda match: CHARACTER_MAP.get(match.group(), ''), text).casefold()
+    if ZWNJ not in text:
+        return text
+    joined = [compound.replace(ZWNJ, '') for compound in COMPOUND.findall(text)]
+    return ' '.join([text.replace(ZWNJ, ' ')] + joined)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+        'title, short_description, description, technologies, '
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    Project = apps.get_model('portfolio', 'Project')
+    rows = [
+        (
+            project.pk,
+            index_text(project.title_fa, project.title_en),
+            index_text(project.short_description_fa, project.short_description_en),
+            index_text(project.description_fa, project.description_en),
+            index_text(*(str(tech) for tech in project.technologies or [])),
+        )
+        for project in Project.objects.order_by('pk')
+    ]
+    if rows:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, title, short_description, description, technologies) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                rows,
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
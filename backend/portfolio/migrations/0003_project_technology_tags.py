@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+def tag_project_technologies(apps, schema_editor):
+    Technology = apps.get_model('core', 'Technology')
+    Project = apps.get_model('portfolio', 'Project')
+    cache = {}
+    for instance in Project.objects.exclude(technologies=[]).iterator():
+        tags = []
+        for name in instance.technologies or []:
+            key = ' '.join(str(name).split()).casefold()[:100]
+            if not key:
+                continue
+            if key not in cache:
+                cache[key], _ = Technology.objects.get_or_create(
+                    key=key, defaults={'name': ' '.join(str(name).split())[:100]}
+                )
+            tags.append(cache[key])
+        instance.technology_tags.set(tags)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_technology_tags'),
+        ('portfolio', '0002_project_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='technology_tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='projects', to='core.technology', verbose_name='technology tags'),
+        ),
+        migrations.RunPython(tag_project_technologies, migrations.RunPython.noop),
+    ]
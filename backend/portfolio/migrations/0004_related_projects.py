@@ -0,0 +1,80 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:41
+
+import heapq
+import math
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def compute_related_projects(apps, schema_editor):
+    # Frozen copy of portfolio.related as of this migration
+    category_weight, technology_weight, recency_weight = 0.5, 0.4, 0.1
+    half_life_days, stored = 365, 8
+
+    Project = apps.get_model('portfolio', 'Project')
+    RelatedProject = apps.get_model('portfolio', 'RelatedProject')
+    category, created, by_category = {}, {}, defaultdict(set)
+    for pk, category_id, created_at in Project.objects.filter(is_active=True).values_list(
+        'pk', 'category_id', 'created_at'
+    ):
+        category[pk], created[pk] = category_id, created_at
+        by_category[category_id].add(pk)
+    tags, by_tag = defaultdict(set), defaultdict(set)
+    for project_id, technology_id in Project.technology_tags.through.objects.filter(
+        project__is_active=True
+    ).values_list('project_id', 'technology_id'):
+        tags[project_id].add(technology_id)
+        by_tag[technology_id].add(project_id)
+    weights = {tag: math.log(1 + len(category) / len(projects)) for tag, projects in by_tag.items()}
+    now = timezone.now()
+
+    def score(pk, other):
+        value = category_weight if category[pk] == category[other] else 0.0
+        union = sum(weights[tag] for tag in tags[pk] | tags[other])
+        if union:
+            value += technology_weight * sum(weights[tag] for tag in tags[pk] & tags[other]) / union
+        age_days = max(0.0, (now - created[other]).total_seconds() / 86400)
+        return value + recency_weight * 0.5 ** (age_days / half_life_days)
+
+    rows = []
+    for pk in category:
+        candidates = set(by_category[category[pk]])
+        for tag in tags[pk]:
+            candidates |= by_tag[tag]
+        candidates.discard(pk)
+        best = heapq.nlargest(stored, ((score(pk, other), other) for other in candidates))
+        rows += [
+            RelatedProject(project_id=pk, related_id=other, rank=rank, score=value)
+            for rank, (value, other) in enumerate(best)
+        ]
+    RelatedProject.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0003_project_technology_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedProject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='rank')),
+                ('score', models.FloatField(verbose_name='score')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='portfolio.project', verbose_name='project')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbour_of', to='portfolio.project', verbose_name='related project')),
+            ],
+            options={
+                'verbose_name': 'Related Project',
+                'verbose_name_plural': 'Related Projects',
+                'ordering': ['project', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'rank'), name='unique_related_project_rank')],
+            },
+        ),
+        migrations.RunPython(compute_related_projects, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0004_related_projects'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_projects', models.PositiveIntegerField(default=0, verbose_name='total projects')),
+                ('completed_projects', models.PositiveIntegerField(default=0, verbose_name='completed projects')),
+                ('in_progress_projects', models.PositiveIntegerField(default=0, verbose_name='in progress projects')),
+                ('planned_projects', models.PositiveIntegerField(default=0, verbose_name='planned projects')),
+                ('featured_projects', models.PositiveIntegerField(default=0, verbose_name='featured projects')),
+                ('categories_count', models.PositiveIntegerField(default=0, verbose_name='categories count')),
+                ('total_views', models.PositiveBigIntegerField(default=0, verbose_name='total views')),
+                ('by_category', models.JSONField(blank=True, default=list, verbose_name='projects by category')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'Portfolio Stats',
+                'verbose_name_plural': 'Portfolio Stats',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0005_portfolio_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-is_featured', 'order', '-created_at', 'id'], name='project_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def import_gallery_images(apps, schema_editor):
+    # Gallery entries that name a stored file become ProjectImage rows;
+    # external URLs stay in the JSON list only
+    Project = apps.get_model('portfolio', 'Project')
+    ProjectImage = apps.get_model('portfolio', 'ProjectImage')
+    images = []
+    for project in Project.objects.exclude(gallery=[]).only('pk', 'gallery').iterator():
+        for order, entry in enumerate(project.gallery or []):
+            name = entry.get('image') if isinstance(entry, dict) else entry
+            if isinstance(name, str) and name and '://' not in name:
+                images.append(ProjectImage(project_id=project.pk, image=name.lstrip('/'), order=order))
+    ProjectImage.objects.bulk_create(images, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0006_project_listing_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='featured_image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='featured image renditions'),
+        ),
+        migrations.CreateModel(
+            name='ProjectImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='projects/gallery/', verbose_name='image')),
+                ('image_renditions', models.JSONField(blank=True, default=dict, editable=False, verbose_name='image renditions')),
+                ('alt_fa', models.CharField(blank=True, max_length=200, verbose_name='alt text (Persian)')),
+                ('alt_en', models.CharField(blank=True, max_length=200, verbose_name='alt text (English)')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='order')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='portfolio.project', verbose_name='project')),
+            ],
+            options={
+                'verbose_name': 'Project Image',
+                'verbose_name_plural': 'Project Images',
+                'ordering': ['order', 'id'],
+            },
+        ),
+        migrations.RunPython(import_gallery_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0007_project_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectViewEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('views', models.PositiveIntegerField(verbose_name='views')),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='recorded at')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_events', to='portfolio.project', verbose_name='project')),
+            ],
+            options={
+                'verbose_name': 'Project View Event',
+                'verbose_name_plural': 'Project View Events',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingProject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(unique=True, verbose_name='rank')),
+                ('score', models.FloatField(verbose_name='score')),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='portfolio.project', verbose_name='project')),
+            ],
+            options={
+                'verbose_name': 'Trending Project',
+                'verbose_name_plural': 'Trending Projects',
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectDailyViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True, verbose_name='day')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='views')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='portfolio.project', verbose_name='project')),
+            ],
+            options={
+                'verbose_name': 'Project Daily Views',
+                'verbose_name_plural': 'Project Daily Views',
+                'ordering': ['-day', 'project'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'day'), name='unique_project_daily_views')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_ratings(apps, schema_editor):
+    # Frozen copy of portfolio.ratings.build_ratings as of this migration
+    ProjectTestimonial = apps.get_model('portfolio', 'ProjectTestimonial')
+    ProjectRating = apps.get_model('portfolio', 'ProjectRating')
+    rows = {
+        project_id: ProjectRating(project_id=project_id)
+        for project_id in ProjectTestimonial.objects.values_list('project_id', flat=True).distinct().order_by()
+    }
+    counts = ProjectTestimonial.objects.filter(is_active=True, rating__in=range(1, 6)).values_list(
+        'project_id', 'rating'
+    ).annotate(count=Count('id')).order_by()
+    for project_id, rating, count in counts:
+        row = rows[project_id]
+        setattr(row, f'rating_{rating}', count)
+        row.count += count
+        row.total += rating * count
+    for row in rows.values():
+        row.average = row.total / row.count if row.count else None
+    ProjectRating.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0008_project_view_analytics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectRating',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating', serialize=False, to='portfolio.project', verbose_name='project')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='count')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='sum of ratings')),
+                ('rating_1', models.PositiveIntegerField(default=0, verbose_name='1 star ratings')),
+                ('rating_2', models.PositiveIntegerField(default=0, verbose_name='2 star ratings')),
+                ('rating_3', models.PositiveIntegerField(default=0, verbose_name='3 star ratings')),
+                ('rating_4', models.PositiveIntegerField(default=0, verbose_name='4 star ratings')),
+                ('rating_5', models.PositiveIntegerField(default=0, verbose_name='5 star ratings')),
+                ('average', models.FloatField(blank=True, db_index=True, null=True, verbose_name='average rating')),
+            ],
+            options={
+                'verbose_name': 'Project Rating',
+                'verbose_name_plural': 'Project Ratings',
+            },
+        ),
+        migrations.RunPython(count_ratings, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -18,6 +19,23 @@ class ProjectCategory(models.Model):
     
     def __str__(self):
         return self.name_fa
+    
+    def save(self, *args, **kwargs):
+        # The portfolio stats written from post_save commit with the category
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class ProjectQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(is_active=True)
+    
+    def with_category(self):
+        """Fetch the category in the same query, as every listing renders it"""
+        return self.select_related('category')
+    
+    def with_rating(self):
+        return self.select_related('rating')
 
 
 class Project(models.Model):
@@ -44,6 +62,7 @@ class Project(models.Model):
     )
     
     featured_image = models.ImageField(_('featured image'), upload_to='projects/')
+    featured_image_renditions = models.JSONField(_('featured image renditions'), default=dict, blank=True, editable=False)
     gallery = models.JSONField(_('gallery images'), default=list, blank=True)
     
     client_name = models.CharField(_('client name'), max_length=200, blank=True)
@@ -51,6 +70,13 @@ class Project(models.Model):
     github_url = models.URLField(_('GitHub URL'), blank=True)
     
     technologies = models.JSONField(_('technologies used'), default=list, blank=True)
+    technology_tags = models.ManyToManyField(
+        'core.Technology',
+        related_name='projects',
+        blank=True,
+        editable=False,
+        verbose_name=_('technology tags')
+    )
     features_fa = models.JSONField(_('features (Persian)'), default=list, blank=True)
     features_en = models.JSONField(_('features (English)'), default=list, blank=True)
     
@@ -66,17 +92,57 @@ class Project(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     
+    objects = ProjectQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('Project')
         verbose_name_plural = _('Projects')
         ordering = ['-is_featured', 'order', '-created_at']
+        indexes = [
+            # Keyset order of the public listings (portfolio.views.ProjectKeysetPagination)
+            models.Index(
+                fields=['-is_featured', 'order', '-created_at', 'id'],
+                condition=models.Q(is_active=True),
+                name='project_listing_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title_fa
     
+    def save(self, *args, **kwargs):
+        # The search index row, tags and stats written from post_save commit with the project
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
     def increment_views(self):
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        """Count one view; it reaches the database with the next counter flush"""
+        from .counters import project_views
+        self.views_count += project_views.record(self.pk)
+
+
+class ProjectImage(models.Model):
+    """Gallery images for projects"""
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='images',
+        verbose_name=_('project')
+    )
+    image = models.ImageField(_('image'), upload_to='projects/gallery/')
+    image_renditions = models.JSONField(_('image renditions'), default=dict, blank=True, editable=False)
+    alt_fa = models.CharField(_('alt text (Persian)'), max_length=200, blank=True)
+    alt_en = models.CharField(_('alt text (English)'), max_length=200, blank=True)
+    order = models.PositiveIntegerField(_('order'), default=0)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('Project Image')
+        verbose_name_plural = _('Project Images')
+        ordering = ['order', 'id']
+    
+    def __str__(self):
+        return f"{self.project.title_fa} - {self.image.name}"
 
 
 class ProjectTestimonial(models.Model):
@@ -104,3 +170,149 @@ class ProjectTestimonial(models.Model):
     
     def __str__(self):
         return f"{self.client_name} - {self.project.title_fa}"
+    
+    def save(self, *args, **kwargs):
+        # The rating deltas of portfolio.signals commit with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+class ProjectRating(models.Model):
+    """Rating aggregates of a project's active testimonials, maintained by ``portfolio.ratings``"""
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rating',
+        verbose_name=_('project')
+    )
+    count = models.PositiveIntegerField(_('count'), default=0)
+    total = models.PositiveIntegerField(_('sum of ratings'), default=0)
+    rating_1 = models.PositiveIntegerField(_('1 star ratings'), default=0)
+    rating_2 = models.PositiveIntegerField(_('2 star ratings'), default=0)
+    rating_3 = models.PositiveIntegerField(_('3 star ratings'), default=0)
+    rating_4 = models.PositiveIntegerField(_('4 star ratings'), default=0)
+    rating_5 = models.PositiveIntegerField(_('5 star ratings'), default=0)
+    average = models.FloatField(_('average rating'), null=True, blank=True, db_index=True)
+    
+    class Meta:
+        verbose_name = _('Project Rating')
+        verbose_name_plural = _('Project Ratings')
+    
+    def __str__(self):
+        return f"{self.project_id}: {self.average} ({self.count})"
+
+
+class RelatedProject(models.Model):
+    """Precomputed top-k neighbours of a project, see ``portfolio.related``"""
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='neighbours',
+        verbose_name=_('project')
+    )
+    related = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='neighbour_of',
+        verbose_name=_('related project')
+    )
+    rank = models.PositiveSmallIntegerField(_('rank'))
+    score = models.FloatField(_('score'))
+    
+    class Meta:
+        verbose_name = _('Related Project')
+        verbose_name_plural = _('Related Projects')
+        ordering = ['project', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'rank'], name='unique_related_project_rank'),
+        ]
+    
+    def __str__(self):
+        return f"{self.project_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class PortfolioStats(models.Model):
+    """Materialized portfolio counters, a single row maintained by ``portfolio.stats``"""
+    total_projects = models.PositiveIntegerField(_('total projects'), default=0)
+    completed_projects = models.PositiveIntegerField(_('completed projects'), default=0)
+    in_progress_projects = models.PositiveIntegerField(_('in progress projects'), default=0)
+    planned_projects = models.PositiveIntegerField(_('planned projects'), default=0)
+    featured_projects = models.PositiveIntegerField(_('featured projects'), default=0)
+    categories_count = models.PositiveIntegerField(_('categories count'), default=0)
+    total_views = models.PositiveBigIntegerField(_('total views'), default=0)
+    by_category = models.JSONField(_('projects by category'), default=list, blank=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Portfolio Stats')
+        verbose_name_plural = _('Portfolio Stats')
+    
+    def __str__(self):
+        return f"{self.total_projects} projects"
+
+
+class ProjectViewEvent(models.Model):
+    """Views of a project flushed by one worker, awaiting the daily rollup"""
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='view_events',
+        verbose_name=_('project')
+    )
+    views = models.PositiveIntegerField(_('views'))
+    recorded_at = models.DateTimeField(_('recorded at'), default=timezone.now)
+    
+    class Meta:
+        verbose_name = _('Project View Event')
+        verbose_name_plural = _('Project View Events')
+    
+    def __str__(self):
+        return f"{self.project_id}: {self.views} ({self.recorded_at:%Y-%m-%d %H:%M})"
+
+
+class ProjectDailyViews(models.Model):
+    """Views of a project per day, rolled up from ``ProjectViewEvent``"""
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='daily_views',
+        verbose_name=_('project')
+    )
+    day = models.DateField(_('day'), db_index=True)
+    views = models.PositiveIntegerField(_('views'), default=0)
+    
+    class Meta:
+        verbose_name = _('Project Daily Views')
+        verbose_name_plural = _('Project Daily Views')
+        ordering = ['-day', 'project']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'day'], name='unique_project_daily_views'),
+        ]
+    
+    def __str__(self):
+        return f"{self.project_id} @ {self.day}: {self.views}"
+
+
+class TrendingProject(models.Model):
+    """Precomputed trending ranking, see ``portfolio.trending``"""
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='trending',
+        verbose_name=_('project')
+    )
+    rank = models.PositiveSmallIntegerField(_('rank'), unique=True)
+    score = models.FloatField(_('score'))
+    
+    class Meta:
+        verbose_name = _('Trending Project')
+        verbose_name_plural = _('Trending Projects')
+        ordering = ['rank']
+    
+    def __str__(self):
+        return f"#{self.rank + 1} {self.project_id} ({self.score:.1f})"
@@ -0,0 +1,72 @@
+"""
+Shared query shaping for the public portfolio endpoints.
+
+Project listings fetch their category and rating aggregates with
+``select_related`` and take the per-category active project counts from one
+cached ``GROUP BY`` map, so the nested serializers never query per row.
+"""
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Value
+
+from core import versioning
+
+from .models import ProjectCategory, Project
+
+CATEGORY_COUNTS_CACHE_KEY = 'portfolio:category-project-counts:{}'
+
+
+def public_projects():
+    return Project.objects.active().with_category().with_rating()
+
+
+def public_categories():
+    """Active categories annotated with ``active_project_count``"""
+    # Meta.ordering is not applied to aggregating queries, so restate it
+    return ProjectCategory.objects.filter(is_active=True).annotate(
+        active_project_count=Count('projects', filter=Q(projects__is_active=True))
+    ).order_by(*ProjectCategory._meta.ordering)
+
+
+def get_category_project_counts():
+    """Return ``{category id: active project count}``"""
+    # Keyed by the project content version, so any project write moves to a new key
+    token = versioning.get_versions([Project])[Project][1]
+    key = CATEGORY_COUNTS_CACHE_KEY.format(token)
+    counts = cache.get(key)
+    if counts is None:
+        counts = dict(
+            Project.objects.active().order_by().values_list('category').annotate(count=Count('id'))
+        )
+        cache.set(key, counts)
+    return counts
+
+
+def get_facets(queryset, lang='fa'):
+    """
+    Counts of ``queryset`` projects per technology, category and status,
+    computed by one ``UNION ALL`` of three grouped aggregates.
+    """
+    base = queryset.order_by()
+    category_label = 'category__name_en' if lang == 'en' else 'category__name_fa'
+    facets = [
+        ('technologies', base.filter(technology_tags__isnull=False),
+         'technology_tags__key', 'technology_tags__name'),
+        ('categories', base, 'category__slug', category_label),
+        ('status', base, 'status', 'status'),
+    ]
+    parts = [
+        rows.values(facet_value=F(value), facet_label=F(label)).annotate(
+            facet=Value(name), count=Count('pk', distinct=True)
+        ).values_list('facet', 'facet_value', 'facet_label', 'count')
+        for name, rows, value, label in facets
+    ]
+
+    status_labels = dict(Project.STATUS_CHOICES)
+    result = {name: [] for name, *_ in facets}
+    for facet, value, label, count in parts[0].union(*parts[1:], all=True):
+        if facet == 'status':
+            label = str(status_labels.get(value, value))
+        result[facet].append({'value': value, 'label': label, 'count': count})
+    for entries in result.values():
+        entries.sort(key=lambda entry: (-entry['count'], entry['label']))
+    return result
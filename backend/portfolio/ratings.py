@@ -0,0 +1,133 @@
+"""
+Denormalized testimonial ratings.
+
+``ProjectRating`` holds the count, sum, average and 1-5 histogram of the
+ratings of a project's active testimonials. ``ProjectTestimonial.save`` and
+``delete`` run in a transaction, and the signal handlers of
+``portfolio.signals`` read the previous row with ``select_for_update`` and
+apply the difference to those counters with one relative ``UPDATE`` inside
+it, so the row and its aggregates commit or roll back together. Testimonials
+written without Model.save() are recounted from ``content_changed``. Ratings
+outside 1-5 are not counted.
+
+``manage.py rebuild_project_ratings`` recounts every project.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField
+from django.db.models.functions import Cast, NullIf
+from rest_framework import filters
+
+RATINGS = range(1, 6)
+
+# Testimonial fields the aggregates depend on
+RATED_FIELDS = ('project', 'rating', 'is_active')
+
+
+def contribution(project_id, rating, is_active):
+    """The ``(project id, rating)`` a testimonial counts as, or ``None``"""
+    if project_id is None or not is_active or rating not in RATINGS:
+        return None
+    return project_id, rating
+
+
+def apply_changes(changes):
+    """Add ``{(project id, rating): delta}`` to the stored aggregates"""
+    from .models import ProjectRating
+    from core.signals import content_changed
+
+    by_project = defaultdict(dict)
+    for (project_id, rating), delta in changes.items():
+        if delta:
+            by_project[project_id][rating] = delta
+    if not by_project:
+        return
+
+    # Only additions need a row; removals may run while the project is being deleted
+    ProjectRating.objects.bulk_create(
+        [
+            ProjectRating(project_id=project_id) for project_id, deltas in by_project.items()
+            if any(delta > 0 for delta in deltas.values())
+        ],
+        ignore_conflicts=True,
+    )
+    for project_id, deltas in by_project.items():
+        count = sum(deltas.values())
+        total = sum(rating * delta for rating, delta in deltas.items())
+        # Every expression reads the values from before this UPDATE
+        ProjectRating.objects.filter(project_id=project_id).update(
+            count=F('count') + count,
+            total=F('total') + total,
+            average=Cast(F('total') + total, FloatField()) / NullIf(F('count') + count, 0),
+            **{f'rating_{rating}': F(f'rating_{rating}') + delta for rating, delta in deltas.items()}
+        )
+    content_changed.send(sender=ProjectRating, pks=list(by_project))
+
+
+def apply_testimonial_change(before, after):
+    """Move a testimonial's contribution from ``before`` to ``after``"""
+    changes = Counter()
+    if before is not None:
+        changes[before] -= 1
+    if after is not None:
+        changes[after] += 1
+    apply_changes(changes)
+
+
+def build_ratings(testimonial_model, rating_model, project_ids):
+    """Fresh ``rating_model`` rows counted from the testimonials of ``project_ids``"""
+    rows = {project_id: rating_model(project_id=project_id) for project_id in project_ids}
+    counts = testimonial_model.objects.filter(
+        project_id__in=list(rows), is_active=True, rating__in=RATINGS
+    ).values_list('project_id', 'rating').annotate(count=Count('id')).order_by()
+    for project_id, rating, count in counts:
+        row = rows[project_id]
+        setattr(row, f'rating_{rating}', count)
+        row.count += count
+        row.total += rating * count
+    for row in rows.values():
+        row.average = row.total / row.count if row.count else None
+    return list(rows.values())
+
+
+def recount(project_ids):
+    """Recompute the aggregates of ``project_ids`` from their testimonials"""
+    from .models import ProjectRating, ProjectTestimonial
+    from core.signals import content_changed
+
+    project_ids = sorted(set(project_ids))
+    if not project_ids:
+        return
+    fields = ['count', 'total', 'average'] + [f'rating_{rating}' for rating in RATINGS]
+    with transaction.atomic():
+        ProjectRating.objects.bulk_create(
+            build_ratings(ProjectTestimonial, ProjectRating, project_ids),
+            update_conflicts=True, unique_fields=['project'], update_fields=fields,
+        )
+        content_changed.send(sender=ProjectRating, pks=project_ids)
+
+
+class ProjectOrderingFilter(filters.OrderingFilter):
+    """
+    ``OrderingFilter`` that also sorts by ``rating`` (the average) and
+    ``rating_count`` from ``ProjectRating``, unrated projects last.
+    """
+    rating_fields = {'rating': 'rating__average', 'rating_count': 'rating__count'}
+
+    def get_valid_fields(self, queryset, view, context={}):
+        valid_fields = super().get_valid_fields(queryset, view, context)
+        return valid_fields + [(name, name) for name in self.rating_fields]
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+        return queryset.order_by(*[self.to_expression(term) for term in ordering])
+
+    def to_expression(self, term):
+        name = term.lstrip('-')
+        if name not in self.rating_fields:
+            return term
+        field = F(self.rating_fields[name])
+        return field.asc(nulls_last=True) if name == term else field.desc(nulls_last=True)
@@ -0,0 +1,241 @@
+"""
+Precomputed related-projects graph.
+
+Every active project stores its ``RELATED_PROJECTS_STORED`` best neighbours in
+``RelatedProject``, ranked by
+
+    CATEGORY_WEIGHT   * same category
+  + TECHNOLOGY_WEIGHT * weighted Jaccard similarity of technology tags
+  + RECENCY_WEIGHT    * 0.5 ** (neighbour age / RECENCY_HALF_LIFE_DAYS)
+
+Technologies are weighted by inverse project frequency, so sharing a rare
+technology counts for more than sharing a ubiquitous one. Only projects that
+share a category or a technology are candidates.
+
+After a project is saved or deleted, only its row and column of the graph
+are scored: the project's own list is recomputed from its candidates, and
+each candidate's stored list is merged with the project's new score. A
+candidate is rescored in full only when the project drops out of a full
+list, as the project that takes its place is not stored anywhere; the same
+goes for the projects that listed a deleted project. Only that
+neighbourhood is loaded (the projects of the categories and technologies
+involved), not the whole catalogue. The stored scores of untouched pairs are
+kept as they are, so their recency term and technology weights drift until
+``manage.py rebuild_related_projects`` recomputes everything.
+"""
+import heapq
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from core import background
+
+CATEGORY_WEIGHT = 0.5
+TECHNOLOGY_WEIGHT = 0.4
+RECENCY_WEIGHT = 0.1
+RECENCY_HALF_LIFE_DAYS = 365
+
+RELATED_PROJECTS_STORED = 8
+
+# Project fields the scores depend on
+SCORED_FIELDS = ('category', 'technologies', 'is_active', 'created_at')
+
+
+class ProjectGraph:
+    """
+    Features of active projects: all of them, or only the neighbourhood of
+    ``pks`` as ``expand`` loads it.
+    """
+
+    def __init__(self, project_model, pks=None):
+        self.model = project_model
+        self.category = {}
+        self.created = {}
+        self.by_category = defaultdict(set)
+        self.tags = defaultdict(set)
+        self.by_tag = defaultdict(set)
+        self.weights = {}
+        self.complete = pks is None
+        # Categories and technologies whose projects are all loaded
+        self._loaded_categories = set()
+        self._loaded_tags = set()
+
+        active = project_model.objects.filter(is_active=True)
+        self._load(active if self.complete else active.filter(pk__in=list(pks)))
+        self.total = len(self.category) if self.complete else active.count()
+        self.now = timezone.now()
+
+    def _load(self, projects):
+        new = []
+        for pk, category_id, created_at in projects.values_list('pk', 'category_id', 'created_at'):
+            if pk not in self.category:
+                self.category[pk] = category_id
+                self.created[pk] = created_at
+                self.by_category[category_id].add(pk)
+                new.append(pk)
+        through = self.model.technology_tags.through
+        for start in range(0, len(new), 1000):
+            for project_id, technology_id in through.objects.filter(
+                project_id__in=new[start:start + 1000]
+            ).values_list('project_id', 'technology_id'):
+                self.tags[project_id].add(technology_id)
+                self.by_tag[technology_id].add(project_id)
+
+    def add(self, pks):
+        """Load ``pks`` themselves and the weights of their technologies, without their candidates"""
+        missing = [pk for pk in pks if pk not in self.category]
+        if missing and not self.complete:
+            self._load(self.model.objects.filter(is_active=True, pk__in=missing))
+        self._load_weights()
+
+    def expand(self, pks):
+        """Load every candidate of ``pks`` and the weights of their technologies"""
+        if not self.complete:
+            active = self.model.objects.filter(is_active=True)
+            self.add(pks)
+            known = [pk for pk in pks if pk in self.category]
+            categories = {self.category[pk] for pk in known} - self._loaded_categories
+            tags = set().union(*[self.tags[pk] for pk in known]) - self._loaded_tags
+            if categories or tags:
+                through = self.model.technology_tags.through
+                self._load(active.filter(
+                    Q(category_id__in=categories)
+                    | Q(pk__in=through.objects.filter(technology_id__in=tags).values('project_id'))
+                ))
+                self._loaded_categories |= categories
+                self._loaded_tags |= tags
+        self._load_weights()
+
+    def _load_weights(self):
+        """Inverse project frequency of every loaded technology"""
+        missing = set(self.by_tag) - set(self.weights)
+        if not missing:
+            return
+        if self.complete:
+            counts = {tag: len(self.by_tag[tag]) for tag in missing}
+        else:
+            counts = dict(self.model.technology_tags.through.objects.filter(
+                technology_id__in=missing, project__is_active=True
+            ).values_list('technology_id').annotate(count=Count('project_id')).order_by())
+        for tag in missing:
+            self.weights[tag] = math.log(1 + self.total / max(counts.get(tag, 0), 1))
+
+    def candidates(self, pk):
+        if pk not in self.category:
+            return set()
+        found = set(self.by_category[self.category[pk]])
+        for technology_id in self.tags[pk]:
+            found |= self.by_tag[technology_id]
+        found.discard(pk)
+        return found
+
+    def score(self, pk, other):
+        score = CATEGORY_WEIGHT if self.category[pk] == self.category[other] else 0.0
+
+        tags, other_tags = self.tags[pk], self.tags[other]
+        union = sum(self.weights[tag] for tag in tags | other_tags)
+        if union:
+            shared = sum(self.weights[tag] for tag in tags & other_tags)
+            score += TECHNOLOGY_WEIGHT * shared / union
+
+        age_days = max(0.0, (self.now - self.created[other]).total_seconds() / 86400)
+        return score + RECENCY_WEIGHT * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+    def neighbours(self, pk, limit=RELATED_PROJECTS_STORED):
+        """Best ``(score, project id)`` pairs for ``pk``, best first"""
+        return heapq.nlargest(limit, ((self.score(pk, other), other) for other in self.candidates(pk)))
+
+    def rows(self, related_model, pks):
+        self.expand(pks)
+        return [
+            related_model(project_id=pk, related_id=other, rank=rank, score=score)
+            for pk in pks
+            for rank, (score, other) in enumerate(self.neighbours(pk))
+        ]
+
+
+def recompute(pks=None, graph=None):
+    """Rewrite the neighbour lists of ``pks``, or of every project"""
+    from .models import Project, RelatedProject
+    from core.signals import content_changed
+
+    graph = graph or ProjectGraph(Project)
+    with transaction.atomic():
+        if pks is None:
+            RelatedProject.objects.all().delete()
+            pks = list(graph.category)
+        else:
+            RelatedProject.objects.filter(project_id__in=pks).delete()
+        RelatedProject.objects.bulk_create(graph.rows(RelatedProject, pks), batch_size=1000)
+        content_changed.send(sender=RelatedProject)
+    return len(pks)
+
+
+def _merge_column(stored, pks, scores, limit=RELATED_PROJECTS_STORED):
+    """
+    ``stored`` (best first ``(score, project id)`` pairs) with ``pks`` moved
+    to their ``scores``, or ``None`` when only a full rescore can tell.
+    """
+    kept = [(score, other) for score, other in stored if other not in pks]
+    merged = heapq.nlargest(limit, kept + [(score, pk) for pk, score in scores.items()])
+    if len(stored) < limit:
+        # Every candidate was listed
+        return merged
+    # Unlisted candidates score at most the old last place
+    if len(merged) < limit or merged[-1][0] < stored[-1][0]:
+        return None
+    return merged
+
+
+def update_neighbourhood(pks, listed_by=()):
+    """Rescore the row and column of ``pks`` in the graph"""
+    from .models import Project, RelatedProject
+    from core.signals import content_changed
+
+    pks = set(pks)
+    graph = ProjectGraph(Project, pks)
+    graph.expand(pks)
+    candidates = {pk: graph.candidates(pk) for pk in pks}
+    columns = set().union(*candidates.values()) - pks
+    columns |= set(RelatedProject.objects.filter(related_id__in=pks).values_list('project_id', flat=True))
+    stored = defaultdict(list)
+    for project_id, related_id, score in RelatedProject.objects.filter(
+        project_id__in=columns | set(listed_by)
+    ).order_by('project_id', 'rank').values_list('project_id', 'related_id', 'score'):
+        stored[project_id].append((score, related_id))
+
+    graph.add(columns)
+    lists = {pk: graph.neighbours(pk) for pk in pks}
+    rescore = set(listed_by) - pks
+    for other in sorted(columns - rescore):
+        if other not in graph.category:
+            # Inactive now; its list goes
+            lists[other] = []
+            continue
+        scores = {pk: graph.score(other, pk) for pk in pks if other in candidates[pk]}
+        merged = _merge_column(stored[other], pks, scores)
+        if merged is None:
+            rescore.add(other)
+        elif merged != stored[other]:
+            lists[other] = merged
+    graph.expand(rescore)
+    lists.update((pk, graph.neighbours(pk)) for pk in rescore)
+
+    with transaction.atomic():
+        RelatedProject.objects.filter(project_id__in=lists).delete()
+        RelatedProject.objects.bulk_create([
+            RelatedProject(project_id=pk, related_id=other, rank=rank, score=score)
+            for pk, neighbours in lists.items()
+            for rank, (score, other) in enumerate(neighbours)
+        ], batch_size=1000)
+        content_changed.send(sender=RelatedProject)
+    return len(lists)
+
+
+def schedule_update(pks, listed_by=()):
+    """Update the neighbourhood of ``pks`` in the background after commit"""
+    pks, listed_by = list(pks), list(listed_by)
+    transaction.on_commit(lambda: background.submit(update_neighbourhood, pks, listed_by))
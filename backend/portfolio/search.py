@@ -0,0 +1,161 @@
+"""
+Full-text search over projects.
+
+On SQLite, projects are mirrored into the FTS5 table ``portfolio_project_search``
+(rowid = project id), kept in sync by the post_save/post_delete handlers in
+``portfolio.signals``. ``Project.save`` and deletes run in a transaction, so a
+failed index write rolls the project write back with it; rows changed behind
+the handlers' back are repaired by ``manage.py rebuild_search_index``. Both indexed text and queries go through ``normalize``,
+which unifies Arabic and Persian letter forms and digits, strips diacritics
+and tatweel, and treats ZWNJ compounds as both split and joined words. Every
+query term is matched as a prefix and results are ranked with BM25.
+
+Other database backends fall back to DRF's ``SearchFilter``.
+"""
+import re
+
+from django.db import connection
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+SEARCH_TABLE = 'portfolio_project_search'
+
+# title, short description, description, technologies
+SEARCH_WEIGHTS = (10.0, 4.0, 1.0, 6.0)
+
+INDEXED_FIELDS = (
+    'title_fa', 'title_en', 'short_description_fa', 'short_description_en',
+    'description_fa', 'description_en', 'technologies',
+)
+
+MAX_QUERY_TERMS = 8
+
+ZWNJ = '\u200c'
+
+_CHARACTER_MAP = {
+    'ي': 'ی',  # Arabic yeh
+    'ى': 'ی',  # Alef maksura
+    'ك': 'ک',  # Arabic kaf
+    'ة': 'ه',  # Teh marbuta
+    'أ': 'ا',  # Alef with hamza above
+    'إ': 'ا',  # Alef with hamza below
+    'آ': 'ا',  # Alef with madda
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},  # Persian digits
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+}
+
+# Characters to unify, plus harakat, superscript alef and tatweel to drop.
+# A regex is used rather than str.translate, which is slow on non-ASCII text.
+_NORMALIZE = re.compile('[{}\u064b-\u065f\u0670\u0640]'.format(''.join(_CHARACTER_MAP)))
+_COMPOUND = re.compile(rf'\w+(?:{ZWNJ}\w+)+')
+_TERM = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Canonical form shared by indexed text and queries"""
+    text = _NORMALIZE.sub(lambda match: _CHARACTER_MAP.get(match.group(), ''), text or '')
+    return text.casefold()
+
+
+def index_text(*parts):
+    """Normalized text for one column, with ZWNJ compounds indexed both ways"""
+    text = normalize(' '.join(part for part in parts if part))
+    if ZWNJ not in text:
+        return text
+    joined = [compound.replace(ZWNJ, '') for compound in _COMPOUND.findall(text)]
+    return ' '.join([text.replace(ZWNJ, ' ')] + joined)
+
+
+def build_match(query):
+    """FTS5 MATCH expression requiring every term as a prefix, or ``''``"""
+    terms = _TERM.findall(normalize(query).replace(ZWNJ, ' '))[:MAX_QUERY_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def _row(project):
+    return (
+        project.pk,
+        index_text(project.title_fa, project.title_en),
+        index_text(project.short_description_fa, project.short_description_en),
+        index_text(project.description_fa, project.description_en),
+        index_text(*(str(tech) for tech in project.technologies or [])),
+    )
+
+
+def index_projects(projects, replace=True):
+    """Insert or replace the index rows of ``projects``"""
+    rows = [_row(project) for project in projects]
+    if not rows or not is_available():
+        return
+    with connection.cursor() as cursor:
+        if replace:
+            cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, short_description, description, technologies) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            rows,
+        )
+
+
+def unindex_projects(ids):
+    if not ids or not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(pk,) for pk in ids])
+
+
+def rebuild_index(batch_size=1000):
+    """Re-create every index row from the projects table; returns the row count"""
+    from .models import Project
+
+    if not is_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    batch, total = [], 0
+    for project in Project.objects.only('id', *INDEXED_FIELDS).order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(project)
+        if len(batch) >= batch_size:
+            index_projects(batch, replace=False)
+            total += len(batch)
+            batch = []
+    index_projects(batch, replace=False)
+    return total + len(batch)
+
+
+def search_projects(queryset, query):
+    """Restrict ``queryset`` to matches of ``query``, annotated with ``search_rank``"""
+    match = build_match(query)
+    if not match:
+        return queryset
+    weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        select={'search_rank': f'bm25({SEARCH_TABLE}, {weights})'},
+        tables=[SEARCH_TABLE],
+        where=[f'{SEARCH_TABLE}.rowid = {table}.id', f'{SEARCH_TABLE} MATCH %s'],
+        params=[match],
+    )
+
+
+class ProjectSearchFilter(filters.SearchFilter):
+    """
+    ``?search=`` backed by the FTS5 index, best matches first unless an
+    explicit ``?ordering=`` is given. Place it after ``OrderingFilter``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not is_available():
+            return super().filter_queryset(request, queryset, view)
+        query = request.query_params.get(self.search_param, '')
+        if not build_match(query):
+            return queryset
+        queryset = search_projects(queryset, query)
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        # bm25() is lower for better matches
+        return queryset.order_by('search_rank', '-created_at')
@@ -1,8 +1,12 @@
 from rest_framework import serializers
-from .models import ProjectCategory, Project, ProjectTestimonial
+from core.fieldsets import SparseFieldsetSerializerMixin
+from core.language import BilingualSerializerMixin
+from core.serializers import ResponsiveImageField
+from .models import ProjectCategory, Project, ProjectImage, ProjectRating, ProjectTestimonial
+from .queries import get_category_project_counts
 
 
-class ProjectCategorySerializer(serializers.ModelSerializer):
+class ProjectCategorySerializer(SparseFieldsetSerializerMixin, BilingualSerializerMixin, serializers.ModelSerializer):
     project_count = serializers.SerializerMethodField()
     
     class Meta:
@@ -10,38 +14,75 @@ class ProjectCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name_fa', 'name_en', 'slug', 'icon', 'order', 'is_active', 'project_count']
     
     def get_project_count(self, obj):
-        return obj.projects.filter(is_active=True).count()
+        count = getattr(obj, 'active_project_count', None)
+        if count is not None:
+            return count
+        # Nested under projects: one shared lookup for the whole response
+        if 'project_counts' not in self.context:
+            self.context['project_counts'] = get_category_project_counts()
+        return self.context['project_counts'].get(obj.pk, 0)
 
 
-class ProjectTestimonialSerializer(serializers.ModelSerializer):
+class ProjectTestimonialSerializer(SparseFieldsetSerializerMixin, BilingualSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ProjectTestimonial
         fields = ['id', 'client_name', 'client_position', 'client_company', 
                   'client_photo', 'content_fa', 'content_en', 'rating', 'created_at']
 
 
-class ProjectListSerializer(serializers.ModelSerializer):
+class ProjectRatingSerializer(serializers.ModelSerializer):
+    histogram = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ProjectRating
+        fields = ['average', 'count', 'histogram']
+    
+    def get_histogram(self, obj):
+        return {str(stars): getattr(obj, f'rating_{stars}') for stars in range(1, 6)}
+
+
+class ProjectImageSerializer(BilingualSerializerMixin, serializers.ModelSerializer):
+    image_responsive = ResponsiveImageField('image', 'image_renditions')
+    
+    class Meta:
+        model = ProjectImage
+        fields = ['id', 'project', 'image', 'image_responsive', 'alt_fa', 'alt_en', 'order']
+        extra_kwargs = {'project': {'write_only': True}}
+
+
+class ProjectListSerializer(SparseFieldsetSerializerMixin, BilingualSerializerMixin, serializers.ModelSerializer):
     category = ProjectCategorySerializer(read_only=True)
+    rating = ProjectRatingSerializer(read_only=True)
+    # Cards only need the small variants
+    featured_image_responsive = ResponsiveImageField(
+        'featured_image', 'featured_image_renditions', max_width=640
+    )
     
     class Meta:
         model = Project
         fields = ['id', 'title_fa', 'title_en', 'slug', 'short_description_fa', 
-                  'short_description_en', 'category', 'featured_image', 'technologies',
-                  'status', 'is_featured', 'views_count', 'created_at']
+                  'short_description_en', 'category', 'featured_image',
+                  'featured_image_responsive', 'technologies',
+                  'status', 'is_featured', 'views_count', 'rating', 'created_at']
+        expandable_fields = ['category']
 
 
-class ProjectDetailSerializer(serializers.ModelSerializer):
+class ProjectDetailSerializer(SparseFieldsetSerializerMixin, BilingualSerializerMixin, serializers.ModelSerializer):
     category = ProjectCategorySerializer(read_only=True)
     testimonials = ProjectTestimonialSerializer(many=True, read_only=True)
+    rating = ProjectRatingSerializer(read_only=True)
+    featured_image_responsive = ResponsiveImageField('featured_image', 'featured_image_renditions')
+    images = ProjectImageSerializer(many=True, read_only=True)
     
     class Meta:
         model = Project
         fields = ['id', 'title_fa', 'title_en', 'slug', 'description_fa', 'description_en',
                   'short_description_fa', 'short_description_en', 'category', 
-                  'featured_image', 'gallery', 'client_name', 'project_url', 'github_url',
+                  'featured_image', 'featured_image_responsive', 'gallery', 'images', 'client_name', 'project_url', 'github_url',
                   'technologies', 'features_fa', 'features_en', 'status', 
                   'start_date', 'completion_date', 'is_featured', 'views_count',
-                  'testimonials', 'created_at', 'updated_at']
+                  'testimonials', 'rating', 'created_at', 'updated_at']
+        expandable_fields = ['category', 'testimonials', 'images']
 
 
 class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
@@ -52,3 +93,53 @@ class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
                   'featured_image', 'gallery', 'client_name', 'project_url', 'github_url',
                   'technologies', 'features_fa', 'features_en', 'status', 
                   'start_date', 'completion_date', 'is_featured', 'is_active', 'order']
+
+
+class ChunkSlugRelatedField(serializers.SlugRelatedField):
+    """
+    ``SlugRelatedField`` that resolves slugs from ``context['related']``,
+    filled with one query per import chunk, instead of one query per row.
+    """
+    
+    def to_internal_value(self, data):
+        related = self.context.get('related', {}).get(self.field_name)
+        if related is None:
+            return super().to_internal_value(data)
+        try:
+            return related[str(data)]
+        except KeyError:
+            self.fail('does_not_exist', slug_name=self.slug_field, value=str(data))
+
+
+class ProjectCategoryImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProjectCategory
+        fields = ['name_fa', 'name_en', 'slug', 'icon', 'order', 'is_active']
+        # Existing slugs are updated rather than rejected
+        extra_kwargs = {'slug': {'validators': []}}
+
+
+class ProjectImportSerializer(serializers.ModelSerializer):
+    category = ChunkSlugRelatedField(slug_field='slug', queryset=ProjectCategory.objects.all())
+    # Storage paths of files that are already uploaded
+    featured_image = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    
+    class Meta:
+        model = Project
+        fields = ['title_fa', 'title_en', 'slug', 'description_fa', 'description_en',
+                  'short_description_fa', 'short_description_en', 'category', 
+                  'featured_image', 'gallery', 'client_name', 'project_url', 'github_url',
+                  'technologies', 'features_fa', 'features_en', 'status', 
+                  'start_date', 'completion_date', 'is_featured', 'is_active', 'order']
+        extra_kwargs = {'slug': {'validators': []}}
+
+
+class ProjectTestimonialImportSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(min_value=1, required=False)
+    project = ChunkSlugRelatedField(slug_field='slug', queryset=Project.objects.all())
+    client_photo = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    
+    class Meta:
+        model = ProjectTestimonial
+        fields = ['id', 'project', 'client_name', 'client_position', 'client_company',
+                  'client_photo', 'content_fa', 'content_en', 'rating', 'is_active']
@@ -0,0 +1,212 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+
+from core import imaging, tags, versioning
+from core.signals import affects, content_changed
+
+from .models import (
+    ProjectCategory, Project, ProjectImage, ProjectTestimonial, ProjectRating, RelatedProject,
+    PortfolioStats, TrendingProject
+)
+from . import detail_cache, ratings, related, search, stats
+
+
+versioning.track(ProjectCategory)
+# View counts move the version from the counter flush instead (portfolio.counters)
+versioning.track(Project, ignore_fields={'views_count'})
+versioning.track(ProjectImage)
+versioning.track(ProjectTestimonial)
+versioning.track(ProjectRating)
+versioning.track(RelatedProject)
+versioning.track(PortfolioStats)
+versioning.track(TrendingProject)
+
+tags.register(Project, 'technologies', 'technology_tags')
+
+imaging.register(Project, 'featured_image', 'featured_image_renditions')
+imaging.register(ProjectImage, 'image', 'image_renditions')
+
+
+def index_project(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Write the project's search index row; Project.save runs this inside its transaction"""
+    if raw or (update_fields and set(update_fields) <= {'views_count'}):
+        return
+    search.index_projects([instance])
+
+
+def unindex_project(sender, instance, **kwargs):
+    search.unindex_projects([instance.pk])
+
+
+def reindex_changed_projects(sender, pks=None, fields=None, **kwargs):
+    if pks and affects(fields, *search.INDEXED_FIELDS):
+        search.index_projects(Project.objects.filter(pk__in=pks))
+
+
+post_save.connect(index_project, sender=Project)
+post_delete.connect(unindex_project, sender=Project)
+content_changed.connect(reindex_changed_projects, sender=Project)
+
+
+def update_related_projects(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and set(update_fields) <= {'views_count'}):
+        return
+    related.schedule_update([instance.pk])
+
+
+def remember_listing_projects(sender, instance, **kwargs):
+    # The cascade removes these links before post_delete runs
+    instance._related_listed_by = list(
+        RelatedProject.objects.filter(related=instance).values_list('project_id', flat=True)
+    )
+
+
+def update_related_after_delete(sender, instance, **kwargs):
+    related.schedule_update([instance.pk], getattr(instance, '_related_listed_by', ()))
+
+
+def update_related_for_changed(sender, pks=None, fields=None, **kwargs):
+    if pks and affects(fields, *related.SCORED_FIELDS):
+        related.schedule_update(pks)
+
+
+post_save.connect(update_related_projects, sender=Project)
+pre_delete.connect(remember_listing_projects, sender=Project)
+post_delete.connect(update_related_after_delete, sender=Project)
+content_changed.connect(update_related_for_changed, sender=Project)
+
+
+def remember_project_stats(sender, instance, raw=False, **kwargs):
+    # Project.save and deletes run in a transaction; the row stays locked until the delta is applied
+    instance._previous_stats_state = None
+    if instance.pk and not raw:
+        instance._previous_stats_state = stats.stored_project_state(instance.pk)
+
+
+def update_project_stats(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    stats.apply_project_change(getattr(instance, '_previous_stats_state', None), stats.project_state(instance))
+
+
+def remove_project_stats(sender, instance, **kwargs):
+    stats.apply_project_change(getattr(instance, '_previous_stats_state', None), None)
+
+
+def update_category_stats(sender, instance, raw=False, **kwargs):
+    if not raw:
+        stats.apply_changes({}, [instance.pk])
+
+
+pre_save.connect(remember_project_stats, sender=Project)
+post_save.connect(update_project_stats, sender=Project)
+pre_delete.connect(remember_project_stats, sender=Project)
+post_delete.connect(remove_project_stats, sender=Project)
+post_save.connect(update_category_stats, sender=ProjectCategory)
+post_delete.connect(update_category_stats, sender=ProjectCategory)
+for model in (ProjectCategory, Project):
+    content_changed.connect(stats.schedule_refresh, sender=model)
+
+
+def _invalidate_pages(project_ids):
+    project_ids = list(project_ids)
+    transaction.on_commit(lambda: detail_cache.invalidate(project_ids))
+
+
+def invalidate_project_pages(sender, instance, raw=False, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'views_count'}:
+        return
+    _invalidate_pages([instance.pk])
+
+
+def invalidate_changed_project_pages(sender, pks=None, **kwargs):
+    if pks:
+        _invalidate_pages(pks)
+
+
+def invalidate_category_pages(sender, instance, **kwargs):
+    _invalidate_pages(Project.objects.filter(category_id=instance.pk).values_list('pk', flat=True))
+
+
+def invalidate_changed_category_pages(sender, pks=None, **kwargs):
+    if pks:
+        _invalidate_pages(Project.objects.filter(category_id__in=pks).values_list('pk', flat=True))
+
+
+def remember_previous_project(sender, instance, raw=False, **kwargs):
+    # A testimonial or image moved to another project leaves the old page stale too
+    if instance.pk and not raw:
+        instance._previous_project_id = sender.objects.filter(
+            pk=instance.pk
+        ).values_list('project_id', flat=True).first()
+
+
+def remember_previous_testimonial(sender, instance, raw=False, **kwargs):
+    """``remember_previous_project`` that also keeps the rating contribution"""
+    instance._previous_rating = None
+    if instance.pk and not raw:
+        # ProjectTestimonial.save runs in a transaction; lock the row until the delta is applied
+        previous = sender.objects.select_for_update().filter(pk=instance.pk).values_list(
+            'project_id', 'rating', 'is_active'
+        ).first()
+        if previous is not None:
+            instance._previous_project_id = previous[0]
+            instance._previous_rating = ratings.contribution(*previous)
+
+
+def invalidate_project_child_pages(sender, instance, **kwargs):
+    _invalidate_pages({instance.project_id, getattr(instance, '_previous_project_id', None)} - {None})
+
+
+def _changed_child_projects(sender, pks, previous_project_ids):
+    """Projects of the changed rows, and those they were moved away from"""
+    project_ids = set(sender.objects.filter(pk__in=pks).values_list('project_id', flat=True))
+    return project_ids.union(previous_project_ids or ())
+
+
+def invalidate_changed_child_pages(sender, pks=None, previous_project_ids=None, **kwargs):
+    if pks:
+        _invalidate_pages(_changed_child_projects(sender, pks, previous_project_ids))
+
+
+post_save.connect(invalidate_project_pages, sender=Project)
+post_delete.connect(invalidate_project_pages, sender=Project)
+content_changed.connect(invalidate_changed_project_pages, sender=Project)
+post_save.connect(invalidate_category_pages, sender=ProjectCategory)
+pre_delete.connect(invalidate_category_pages, sender=ProjectCategory)
+content_changed.connect(invalidate_changed_category_pages, sender=ProjectCategory)
+pre_save.connect(remember_previous_testimonial, sender=ProjectTestimonial)
+post_save.connect(invalidate_project_child_pages, sender=ProjectTestimonial)
+post_delete.connect(invalidate_project_child_pages, sender=ProjectTestimonial)
+content_changed.connect(invalidate_changed_child_pages, sender=ProjectTestimonial)
+pre_save.connect(remember_previous_project, sender=ProjectImage)
+post_save.connect(invalidate_project_child_pages, sender=ProjectImage)
+post_delete.connect(invalidate_project_child_pages, sender=ProjectImage)
+content_changed.connect(invalidate_changed_child_pages, sender=ProjectImage)
+
+
+def update_rating(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_previous_rating', None)
+    if update_fields is not None and not ({'project', 'project_id', 'rating', 'is_active'} & set(update_fields)):
+        return
+    ratings.apply_testimonial_change(
+        before, ratings.contribution(instance.project_id, instance.rating, instance.is_active)
+    )
+
+
+def remove_rating(sender, instance, **kwargs):
+    ratings.apply_testimonial_change(
+        ratings.contribution(instance.project_id, instance.rating, instance.is_active), None
+    )
+
+
+def recount_changed_ratings(sender, pks=None, fields=None, previous_project_ids=None, **kwargs):
+    if pks and affects(fields, *ratings.RATED_FIELDS):
+        ratings.recount(_changed_child_projects(sender, pks, previous_project_ids))
+
+
+post_save.connect(update_rating, sender=ProjectTestimonial)
+post_delete.connect(remove_rating, sender=ProjectTestimonial)
+content_changed.connect(recount_changed_ratings, sender=ProjectTestimonial)
@@ -0,0 +1,245 @@
+"""
+Portfolio statistics.
+
+All counters live in the single ``PortfolioStats`` row and are maintained
+incrementally inside the writing transaction:
+
+- a project save or delete (``Project.save`` and deletes are atomic) reads
+  the project's previous state with ``select_for_update`` and adds the
+  difference to the counters with one relative ``UPDATE``;
+- when a project joins or leaves a category's active projects, or a category
+  changes, the ``by_category`` entries of those categories are recounted
+  under the stats row lock;
+- buffered view counts are added to ``total_views`` by the transaction of
+  the counter flush (``portfolio.counters``).
+
+``compute_stats`` recomputes every counter with one grouped query. It builds
+the row the first time and is the repair path: projects and categories
+written without Model.save() (``content_changed``) ask a background refresher
+to run it, and a failed refresh is retried every
+``PORTFOLIO_STATS_RETRY_INTERVAL`` seconds. Reads come from the cache,
+falling back to the row, so serving the stats never aggregates.
+"""
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from core.background import PeriodicTask
+
+from .models import ProjectCategory, Project, PortfolioStats
+
+STATS_CACHE_KEY = 'portfolio:stats'
+# Project and category fields the counters depend on
+COUNTED_FIELDS = ('is_active', 'status', 'is_featured', 'category', 'views_count',
+                  'slug', 'name_fa', 'name_en', 'order')
+# What a project contributes, as read by ``project_state``
+PROJECT_STATE_FIELDS = ('category_id', 'is_active', 'status', 'is_featured', 'views_count')
+STATS_PK = 1
+# Bounds staleness if a read races a refresh
+STATS_CACHE_TIMEOUT = 300
+
+def compute_stats():
+    """Every counter, from one query grouped by category"""
+    active = Q(projects__is_active=True)
+    categories = ProjectCategory.objects.order_by('order', 'name_fa').annotate(
+        total=Count('projects', filter=active),
+        completed=Count('projects', filter=active & Q(projects__status='completed')),
+        in_progress=Count('projects', filter=active & Q(projects__status='in_progress')),
+        planned=Count('projects', filter=active & Q(projects__status='planned')),
+        featured=Count('projects', filter=active & Q(projects__is_featured=True)),
+        views=Coalesce(Sum('projects__views_count'), 0),
+    ).values('slug', 'name_fa', 'name_en', 'is_active', 'total', 'completed',
+             'in_progress', 'planned', 'featured', 'views')
+
+    stats = {
+        'total_projects': 0, 'completed_projects': 0, 'in_progress_projects': 0,
+        'planned_projects': 0, 'featured_projects': 0, 'categories_count': 0,
+        'total_views': 0, 'by_category': [],
+    }
+    for category in categories:
+        stats['total_projects'] += category['total']
+        stats['completed_projects'] += category['completed']
+        stats['in_progress_projects'] += category['in_progress']
+        stats['planned_projects'] += category['planned']
+        stats['featured_projects'] += category['featured']
+        stats['total_views'] += category['views']
+        if category['is_active']:
+            stats['categories_count'] += 1
+            stats['by_category'].append({
+                'slug': category['slug'],
+                'name_fa': category['name_fa'],
+                'name_en': category['name_en'],
+                'count': category['total'],
+            })
+    return stats
+
+
+def refresh_stats():
+    with transaction.atomic():
+        # Lock first: deltas of concurrent writes then land after the recompute
+        if PortfolioStats.objects.select_for_update().filter(pk=STATS_PK).exists():
+            PortfolioStats.objects.filter(pk=STATS_PK).update(**compute_stats())
+        else:
+            PortfolioStats.objects.update_or_create(pk=STATS_PK, defaults=compute_stats())
+        transaction.on_commit(stats_changed)
+
+
+def project_state(project):
+    return tuple(getattr(project, field) for field in PROJECT_STATE_FIELDS)
+
+
+def stored_project_state(pk):
+    """The committed state of project ``pk``, locked; call inside the writing transaction"""
+    return Project.objects.select_for_update().filter(pk=pk).values_list(*PROJECT_STATE_FIELDS).first()
+
+
+def contribution(category_id, is_active, status, is_featured, views_count):
+    """The counters one project adds to the stats"""
+    counted = 1 if is_active else 0
+    return Counter({
+        'total_projects': counted,
+        'completed_projects': counted if status == 'completed' else 0,
+        'in_progress_projects': counted if status == 'in_progress' else 0,
+        'planned_projects': counted if status == 'planned' else 0,
+        'featured_projects': counted if is_featured else 0,
+        'total_views': views_count or 0,
+    })
+
+
+def apply_project_change(before, after):
+    """Move a project's counters from state ``before`` to ``after``; either may be ``None``"""
+    changes = Counter()
+    if before is not None:
+        changes.subtract(contribution(*before))
+    if after is not None:
+        changes.update(contribution(*after))
+    # The category an active project is listed under in ``by_category``
+    listed = {state[0] if state is not None and state[1] else None for state in (before, after)}
+    apply_changes(changes, listed - {None} if len(listed) > 1 else ())
+
+
+def apply_changes(changes, category_ids=()):
+    """
+    Add ``{counter: delta}`` to the stats row and recount the ``by_category``
+    entries of ``category_ids``; call inside the writing transaction.
+    """
+    # Rows written in bulk are only counted once the background refresh has
+    # run; until then a delete must not push a counter below zero
+    updates = {field: Greatest(F(field) + delta, 0) for field, delta in changes.items() if delta}
+    if not updates and not category_ids:
+        return
+    with transaction.atomic():
+        row = PortfolioStats.objects.select_for_update().filter(pk=STATS_PK).first()
+        if row is None:
+            # First write: count everything, this write included
+            PortfolioStats.objects.update_or_create(pk=STATS_PK, defaults=compute_stats())
+        else:
+            if category_ids:
+                updates['by_category'] = _recount_categories(row.by_category, set(category_ids))
+                updates['categories_count'] = len(updates['by_category'])
+            PortfolioStats.objects.filter(pk=STATS_PK).update(**updates)
+        transaction.on_commit(stats_changed)
+
+
+def _recount_categories(by_category, category_ids):
+    """``by_category`` with fresh counts for ``category_ids`` and current category names and order"""
+    counts = {entry['slug']: entry['count'] for entry in by_category}
+    recounted = dict(
+        Project.objects.filter(category_id__in=category_ids, is_active=True).order_by().values(
+            'category_id'
+        ).annotate(count=Count('pk')).values_list('category_id', 'count')
+    )
+    categories = ProjectCategory.objects.filter(is_active=True).order_by('order', 'name_fa')
+    return [
+        {
+            'slug': category['slug'],
+            'name_fa': category['name_fa'],
+            'name_en': category['name_en'],
+            'count': recounted.get(category['pk'], 0) if category['pk'] in category_ids
+            else counts.get(category['slug'], 0),
+        }
+        for category in categories.values('pk', 'slug', 'name_fa', 'name_en')
+    ]
+
+
+_refresh_pending = threading.Event()
+
+
+def _refresh_if_pending():
+    if not _refresh_pending.is_set():
+        return
+    _refresh_pending.clear()
+    try:
+        refresh_stats()
+    except Exception:
+        # Retried on the next run
+        _refresh_pending.set()
+        raise
+
+
+refresher = PeriodicTask(
+    _refresh_if_pending,
+    getattr(settings, 'PORTFOLIO_STATS_RETRY_INTERVAL', 30.0),
+    'portfolio-stats-refresher',
+)
+
+
+def request_refresh():
+    _refresh_pending.set()
+    refresher.start()
+    refresher.wake()
+
+
+def schedule_refresh(sender, fields=None, **kwargs):
+    """``content_changed`` receiver recomputing the stats in the background once the write is committed"""
+    from core.signals import affects
+
+    if affects(fields, *COUNTED_FIELDS):
+        transaction.on_commit(request_refresh)
+
+
+def add_views(count):
+    """Add flushed page views; call inside the flushing transaction"""
+    PortfolioStats.objects.filter(pk=STATS_PK).update(total_views=F('total_views') + count)
+    transaction.on_commit(stats_changed)
+
+
+def stats_changed():
+    from core.signals import content_changed
+
+    cache.delete(STATS_CACHE_KEY)
+    content_changed.send(sender=PortfolioStats)
+
+
+def serialize(row):
+    return {
+        'total_projects': row.total_projects,
+        'completed_projects': row.completed_projects,
+        'in_progress_projects': row.in_progress_projects,
+        'planned_projects': row.planned_projects,
+        'featured_projects': row.featured_projects,
+        'categories_count': row.categories_count,
+        'total_views': row.total_views,
+        'by_status': {
+            'completed': row.completed_projects,
+            'in_progress': row.in_progress_projects,
+            'planned': row.planned_projects,
+        },
+        'by_category': row.by_category,
+    }
+
+
+def get_stats():
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        row = PortfolioStats.objects.filter(pk=STATS_PK).first()
+        if row is None:
+            row, _ = PortfolioStats.objects.update_or_create(pk=STATS_PK, defaults=compute_stats())
+        stats = serialize(row)
+        cache.set(STATS_CACHE_KEY, stats, STATS_CACHE_TIMEOUT)
+    return stats
@@ -1,3 +1,424 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.signals import content_changed
+
+from . import counters, detail_cache, ratings, related, search, stats, transfer, trending
+from .models import (
+    ProjectCategory, Project, ProjectTestimonial, ProjectRating, PortfolioStats, RelatedProject,
+    ProjectViewEvent, TrendingProject
+)
+
+User = get_user_model()
+
+RATING_FIELDS = ['count', 'total', 'average'] + [f'rating_{rating}' for rating in ratings.RATINGS]
+
+
+def create_project(category, slug, **kwargs):
+    fields = {
+        'title_fa': slug, 'title_en': slug,
+        'description_fa': 'description', 'description_en': 'description',
+        'short_description_fa': 'summary', 'short_description_en': 'summary',
+    }
+    fields.update(kwargs)
+    return Project.objects.create(category=category, slug=slug, **fields)
+
+
+class PortfolioTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = ProjectCategory.objects.create(name_fa='وب', name_en='Web', slug='web')
+    
+    def setUp(self):
+        # The default cache outlives the test database
+        cache.clear()
+        # Keep the background refreshers and jobs out of the test run
+        for target in (
+            'core.background.PeriodicTask.start', 'core.background.PeriodicTask.wake', 'core.background.submit',
+        ):
+            patcher = mock.patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class RatingAggregateTests(PortfolioTestCase):
+
+    def stored(self, *projects):
+        rows = ProjectRating.objects.filter(project__in=projects).order_by('project_id')
+        return list(rows.values_list('project_id', *RATING_FIELDS))
+    
+    def assertMatchesRecount(self, *projects):
+        stored = self.stored(*projects)
+        ratings.recount([project.pk for project in projects])
+        self.assertEqual(stored, self.stored(*projects))
+    
+    def test_moving_a_testimonial_updates_both_projects(self):
+        first, second = create_project(self.category, 'first'), create_project(self.category, 'second')
+        testimonial = ProjectTestimonial.objects.create(
+            project=first, client_name='Client', content_fa='متن', content_en='Text', rating=4
+        )
+        ProjectTestimonial.objects.create(
+            project=second, client_name='Other', content_fa='متن', content_en='Text', rating=2
+        )
+        
+        testimonial.project, testimonial.rating = second, 5
+        testimonial.save()
+        
+        self.assertMatchesRecount(first, second)
+        self.assertEqual(ProjectRating.objects.get(project=first).count, 0)
+        self.assertEqual(ProjectRating.objects.get(project=second).average, 3.5)
+    
+    def test_failed_delta_rolls_back_the_save(self):
+        project = create_project(self.category, 'project')
+        testimonial = ProjectTestimonial.objects.create(
+            project=project, client_name='Client', content_fa='متن', content_en='Text', rating=4
+        )
+        
+        testimonial.rating = 1
+        with mock.patch.object(ratings, 'apply_changes', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                testimonial.save()
+        
+        self.assertEqual(ProjectTestimonial.objects.get(pk=testimonial.pk).rating, 4)
+        self.assertMatchesRecount(project)
+
+
+class SearchIndexTests(PortfolioTestCase):
+
+    def test_failed_index_write_rolls_back_the_save(self):
+        project = create_project(self.category, 'project')
+        
+        project.title_en = 'Renamed'
+        with mock.patch.object(search, 'index_projects', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                project.save()
+        
+        self.assertEqual(Project.objects.get(pk=project.pk).title_en, 'project')
+    
+    def test_saved_project_is_searchable(self):
+        if not search.is_available():
+            self.skipTest('Full-text search index requires SQLite.')
+        project = create_project(self.category, 'project', title_en='Warehouse dashboard')
+        
+        response = self.client.get('/api/portfolio/projects/', {'search': 'wareh'})
+        self.assertEqual([row['id'] for row in response.data['results']], [project.pk])
+
+
+class PortfolioStatsTests(PortfolioTestCase):
+
+    def assertMatchesRecompute(self):
+        row = PortfolioStats.objects.get(pk=stats.STATS_PK)
+        stored = {field: getattr(row, field) for field in stats.compute_stats()}
+        self.assertEqual(stored, stats.compute_stats())
+    
+    def test_saves_and_deletes_apply_deltas(self):
+        stats.get_stats()
+        mobile = ProjectCategory.objects.create(name_fa='موبایل', name_en='Mobile', slug='mobile', order=1)
+        first = create_project(self.category, 'first', status='planned')
+        second = create_project(mobile, 'second', is_featured=True, views_count=7)
+        self.assertMatchesRecompute()
+        
+        first.status, first.category = 'completed', mobile
+        first.save()
+        second.is_active = False
+        second.save()
+        self.assertMatchesRecompute()
+        
+        mobile.name_en, mobile.order = 'Apps', 0
+        mobile.save()
+        first.delete()
+        self.assertMatchesRecompute()
+        
+        mobile.delete()
+        self.assertMatchesRecompute()
+        self.assertEqual(stats.get_stats()['total_projects'], 0)
+    
+    def test_save_does_not_recompute(self):
+        stats.get_stats()
+        project = create_project(self.category, 'project')
+        
+        project.status = 'in_progress'
+        with mock.patch.object(stats, 'compute_stats') as compute, self.captureOnCommitCallbacks(execute=True):
+            project.save()
+        compute.assert_not_called()
+        self.assertEqual(stats.get_stats()['in_progress_projects'], 1)
+    
+    def test_delete_before_the_bulk_refresh_keeps_counters_valid(self):
+        stats.get_stats()
+        # Written in bulk: counted by the background refresh only
+        Project.objects.bulk_create([Project(
+            category=self.category, slug='bulk', title_fa='bulk', title_en='bulk', description_fa='-',
+            description_en='-', short_description_fa='-', short_description_en='-',
+        )])
+        
+        Project.objects.get(slug='bulk').delete()
+        self.assertEqual(PortfolioStats.objects.get(pk=stats.STATS_PK).total_projects, 0)
+        stats.refresh_stats()
+        self.assertMatchesRecompute()
+
+
+class RelatedProjectTests(PortfolioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(related, 'schedule_update')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.categories = [self.category] + [
+            ProjectCategory.objects.create(name_fa=slug, name_en=slug, slug=slug) for slug in ('mobile', 'desktop')
+        ]
+        self.projects = [
+            create_project(self.categories[index % 3], f'project-{index}') for index in range(30)
+        ]
+        for index, project in enumerate(self.projects):
+            Project.objects.filter(pk=project.pk).update(created_at=project.created_at - timedelta(days=index * 7))
+        related.recompute()
+    
+    def lists(self):
+        lists = {}
+        for project_id, related_id in RelatedProject.objects.values_list('project_id', 'related_id'):
+            lists.setdefault(project_id, []).append(related_id)
+        return lists
+    
+    def assertMatchesRebuild(self, pks, listed_by=()):
+        related.update_neighbourhood(pks, listed_by)
+        updated = self.lists()
+        related.recompute()
+        self.assertEqual(updated, self.lists())
+    
+    def test_category_move_updates_row_and_column(self):
+        project = self.projects[4]
+        project.category = self.categories[2]
+        project.save()
+        self.assertMatchesRebuild([project.pk])
+    
+    def test_deactivation_refills_the_lists_it_left(self):
+        project = self.projects[0]
+        project.is_active = False
+        project.save()
+        self.assertMatchesRebuild([project.pk])
+    
+    def test_delete_refills_the_lists_it_left(self):
+        project = self.projects[3]
+        listed_by = list(RelatedProject.objects.filter(related=project).values_list('project_id', flat=True))
+        pk = project.pk
+        project.delete()
+        self.assertMatchesRebuild([pk], listed_by)
+    
+    def test_new_project_scores_its_row_and_column_only(self):
+        project = create_project(self.categories[1], 'new')
+        candidates = Project.objects.filter(category=self.categories[1]).exclude(pk=project.pk).count()
+        with mock.patch.object(
+            related.ProjectGraph, 'score', autospec=True, side_effect=related.ProjectGraph.score
+        ) as score:
+            related.update_neighbourhood([project.pk])
+        # Once per candidate for the new project's list, once for each candidate's list
+        self.assertEqual(score.call_count, 2 * candidates)
+        
+        updated = self.lists()
+        related.recompute()
+        self.assertEqual(updated, self.lists())
+
+
+class DetailCacheTests(PortfolioTestCase):
+    
+    def payload_key(self, query):
+        request = RequestFactory().get('/api/portfolio/projects/project/', query)
+        return detail_cache._payload_key('detail', 1, request, 'en')
+    
+    def test_key_ignores_unrelated_parameters(self):
+        key = self.payload_key({'fields': 'title,slug', 'expand': 'category'})
+        self.assertEqual(self.payload_key({'expand': 'category', 'fields': 'slug,title', 'utm_source': 'x'}), key)
+        self.assertNotEqual(self.payload_key({'fields': 'title'}), key)
+        self.assertEqual(self.payload_key({'page': '2'}), self.payload_key({}))
+
+
+class ViewCounterTests(PortfolioTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.counter = counters.ViewCounter()
+        self.project = create_project(self.category, 'project')
+        stats.get_stats()
+    
+    def views(self):
+        return Project.objects.get(pk=self.project.pk).views_count
+    
+    def test_each_view_is_written_once(self):
+        for _ in range(3):
+            self.counter.record(self.project.pk)
+        self.counter.flush()
+        self.counter.flush()
+        
+        self.assertEqual(self.views(), 3)
+        self.assertEqual(list(ProjectViewEvent.objects.values_list('project_id', 'views')), [(self.project.pk, 3)])
+        self.assertEqual(PortfolioStats.objects.get(pk=stats.STATS_PK).total_views, 3)
+    
+    def test_failed_flush_keeps_the_views_for_the_next_one(self):
+        self.counter.record(self.project.pk)
+        with mock.patch.object(stats, 'add_views', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.counter.flush()
+        self.assertEqual(self.views(), 0)
+        
+        self.counter.record(self.project.pk)
+        self.counter.flush()
+        self.assertEqual(self.views(), 2)
+        self.assertEqual(self.counter.pending(), {})
+
+
+class BulkWriteTests(PortfolioTestCase):
+    
+    def test_bulk_update_moves_updated_at(self):
+        project = create_project(self.category, 'project')
+        stale = project.updated_at - timedelta(days=1)
+        Project.objects.filter(pk=project.pk).update(updated_at=stale)
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        
+        response = self.client.post(
+            '/api/portfolio/admin/projects/bulk/', [{'id': project.pk, 'title_en': 'Renamed'}],
+            content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+        )
+        self.assertEqual(response.status_code, 200)
+        project.refresh_from_db()
+        self.assertEqual(project.title_en, 'Renamed')
+        self.assertGreater(project.updated_at, stale)
+
+
+class ListQueryCountTests(PortfolioTestCase):
+    
+    def query_count(self, path):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+    
+    def test_list_queries_do_not_grow_with_rows(self):
+        paths = ['/api/portfolio/projects/', '/api/portfolio/projects/featured/', '/api/portfolio/categories/']
+        for index in range(2):
+            create_project(self.category, f'web-{index}', is_featured=True)
+        counts = [self.query_count(path) for path in paths]
+        
+        mobile = ProjectCategory.objects.create(name_fa='موبایل', name_en='Mobile', slug='mobile')
+        for index in range(8):
+            project = create_project(mobile, f'mobile-{index}', is_featured=True)
+            ProjectTestimonial.objects.create(
+                project=project, client_name='Client', content_fa='متن', content_en='Text', rating=5
+            )
+        self.assertEqual([self.query_count(path) for path in paths], counts)
+
+
+class KeysetPaginationTests(PortfolioTestCase):
+    
+    def walk(self, url, created_during=None):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+            if created_during is not None:
+                created_during()
+                created_during = None
+        return ids
+    
+    def test_cursor_walk_is_stable_across_ties_and_inserts(self):
+        projects = [create_project(self.category, f'project-{index}') for index in range(7)]
+        # Rows sharing every ordering column but the id
+        Project.objects.update(created_at=projects[0].created_at)
+        expected = list(
+            Project.objects.order_by('-is_featured', 'order', '-created_at', 'id').values_list('pk', flat=True)
+        )
+        
+        ids = self.walk(
+            '/api/portfolio/projects/?pagination=cursor&page_size=3',
+            created_during=lambda: create_project(self.category, 'newer')
+        )
+        self.assertEqual(ids, expected)
+    
+    def test_reordering_parameters_are_rejected(self):
+        for params in ({'ordering': 'views_count'}, {'search': 'project'}):
+            response = self.client.get('/api/portfolio/projects/', {'pagination': 'cursor', **params})
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(next(iter(params)), response.data)
+
+
+class SparseFieldsetTests(PortfolioTestCase):
+    
+    def test_view_is_counted_when_fields_leave_the_counter_out(self):
+        project = create_project(self.category, 'project', views_count=4)
+        counter = counters.ViewCounter()
+        with mock.patch('portfolio.views.project_views', counter):
+            response = self.client.get('/api/portfolio/projects/project/', {'fields': 'title,slug'})
+            self.assertEqual(set(response.data), {'title_fa', 'title_en', 'slug'})
+            self.assertEqual(counter.pending(), {project.pk: 1})
+            
+            response = self.client.get('/api/portfolio/projects/project/')
+        self.assertEqual(response.data['views_count'], 6)
+
+
+class TransferTests(PortfolioTestCase):
+    
+    datasets = ('categories', 'projects', 'testimonials')
+    
+    def export(self, fmt):
+        return {name: ''.join(transfer.export_rows(transfer.DATASETS[name], fmt)) for name in self.datasets}
+    
+    def test_export_import_round_trip(self):
+        mobile = ProjectCategory.objects.create(name_fa='موبایل', name_en='Mobile', slug='mobile', order=1)
+        create_project(self.category, 'web-app', technologies=['Django', 'React'], features_en=['Search'])
+        project = create_project(mobile, 'mobile-app', client_name='Client, Inc.', project_url='')
+        ProjectTestimonial.objects.create(
+            project=project, client_name='Client', content_fa='متن', content_en='Line one\nline two', rating=4
+        )
+        
+        for fmt in transfer.FORMATS:
+            exported = self.export(fmt)
+            ProjectTestimonial.objects.all().delete()
+            Project.objects.all().delete()
+            ProjectCategory.objects.all().delete()
+            for name in self.datasets:
+                result = transfer.import_rows(transfer.DATASETS[name], io.StringIO(exported[name]), fmt)
+                self.assertEqual(result.errors, [], (fmt, name))
+            self.assertEqual(self.export(fmt), exported, fmt)
+
+
+class TrendingTests(PortfolioTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.first, self.second = create_project(self.category, 'first'), create_project(self.category, 'second')
+        self.changed = mock.Mock()
+        content_changed.connect(self.changed, sender=TrendingProject)
+        self.addCleanup(content_changed.disconnect, self.changed, sender=TrendingProject)
+    
+    def view(self, project, views):
+        ProjectViewEvent.objects.create(project=project, views=views)
+        trending.refresh()
+    
+    def test_unchanged_order_keeps_the_rows(self):
+        self.view(self.first, 5)
+        self.view(self.second, 2)
+        rows = list(TrendingProject.objects.order_by('rank').values_list('pk', 'project_id'))
+        self.changed.reset_mock()
+        
+        self.view(self.second, 1)
+        self.assertEqual(list(TrendingProject.objects.order_by('rank').values_list('pk', 'project_id')), rows)
+        self.changed.assert_not_called()
+        
+        self.view(self.second, 5)
+        self.assertEqual(
+            list(TrendingProject.objects.order_by('rank').values_list('project_id', flat=True)),
+            [self.second.pk, self.first.pk]
+        )
+        self.changed.assert_called_once()
@@ -0,0 +1,242 @@
+"""
+Streaming bulk import and export of portfolio data as NDJSON or CSV.
+
+Exports walk the table in primary key order with ``iterator()`` and yield one
+line per row, so memory use does not grow with the table. Related rows are
+referenced by slug; JSON columns are written as JSON text in CSV.
+
+Imports read the same formats line by line and work in chunks. Each chunk is
+validated with the dataset's import serializer, resolving related slugs with
+one query per chunk, and its valid rows are upserted by ``slug`` (by ``id``
+for testimonials) with ``bulk_create(update_conflicts=True)`` in a
+transaction of its own, followed by one ``content_changed`` event; for
+testimonials it also carries ``previous_project_ids``, the projects the rows
+belonged to before, so pages and ratings of the projects they left are
+refreshed too. Invalid rows are skipped and reported with their line number,
+as are rows that conflict with existing data once the chunk is retried row by
+row.
+"""
+import csv
+import itertools
+import json
+from collections import namedtuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from core.signals import content_changed
+
+from .models import ProjectCategory, Project, ProjectTestimonial
+from .serializers import (
+    ProjectCategoryImportSerializer,
+    ProjectImportSerializer,
+    ProjectTestimonialImportSerializer,
+)
+
+FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+# ``relations`` maps foreign keys to the models they reference by slug
+Dataset = namedtuple('Dataset', ['model', 'serializer_class', 'key', 'relations'])
+
+DATASETS = {
+    'categories': Dataset(ProjectCategory, ProjectCategoryImportSerializer, 'slug', {}),
+    'projects': Dataset(Project, ProjectImportSerializer, 'slug', {'category': ProjectCategory}),
+    'testimonials': Dataset(ProjectTestimonial, ProjectTestimonialImportSerializer, 'id', {'project': Project}),
+}
+
+ImportResult = namedtuple('ImportResult', ['rows', 'written', 'errors'])
+
+
+def guess_format(name, default='ndjson'):
+    return 'csv' if str(name).lower().endswith('.csv') else default
+
+
+class _Echo:
+    """File-like object handing each CSV line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return '' if value is None else value
+
+
+def export_rows(dataset, fmt):
+    """Yield ``dataset`` as NDJSON lines, or as CSV lines after a header"""
+    columns = dataset.serializer_class.Meta.fields
+    lookups = [f'{column}__slug' if column in dataset.relations else column for column in columns]
+    rows = dataset.model.objects.order_by('pk').values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([_csv_value(value) for value in row])
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def read_records(stream, fmt):
+    """Yield ``(line number, record)`` from a text stream; bad lines give ``None``"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+
+def _from_csv(record, fields):
+    """Undo the CSV encoding of JSON columns and empty nullable cells"""
+    decoded = {}
+    for name, value in record.items():
+        field = fields.get(name)
+        if field is None or value is None:
+            continue
+        if value == '' and field.allow_null:
+            value = None
+        elif isinstance(field, serializers.JSONField) and value != '':
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        decoded[name] = value
+    return decoded
+
+
+def _auto_now_fields(model):
+    return [field.name for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+
+
+def _import_chunk(dataset, chunk, fmt):
+    """Validate and upsert one chunk; returns ``(rows written, errors)``"""
+    model, key = dataset.model, dataset.key
+    related = {}
+    for name, related_model in dataset.relations.items():
+        slugs = {
+            str(record[name]) for number, record in chunk
+            if isinstance(record, dict) and record.get(name) not in (None, '')
+        }
+        related[name] = related_model.objects.only('pk', 'slug').in_bulk(slugs, field_name='slug')
+
+    validator = dataset.serializer_class(context={'related': related})
+    fields = validator.fields
+    errors = []
+    # {validated field names: {key value or line number: (line number, data)}}
+    groups = {}
+    for number, record in chunk:
+        if fmt == 'csv' and isinstance(record, dict):
+            record = _from_csv(record, fields)
+        if not isinstance(record, dict):
+            errors.append({'line': number, 'errors': {'non_field_errors': ['Expected an object.']}})
+            continue
+        try:
+            data = validator.run_validation(record)
+        except serializers.ValidationError as exc:
+            errors.append({'line': number, 'errors': exc.detail})
+            continue
+        # A key repeated within the chunk keeps its last row
+        groups.setdefault(frozenset(data), {})[data.get(key, number)] = (number, data)
+
+    written, pks = 0, []
+    try:
+        with transaction.atomic():
+            previous = _previous_projects(dataset, groups)
+            for names, rows in groups.items():
+                pks += _upsert(dataset, names, [data for number, data in rows.values()])
+                written += len(rows)
+            _send_changed(dataset, groups, pks, previous)
+    except IntegrityError:
+        # Find the offending rows by retrying one at a time
+        written, pks = 0, []
+        with transaction.atomic():
+            previous = _previous_projects(dataset, groups)
+            for names, rows in groups.items():
+                for number, data in rows.values():
+                    try:
+                        with transaction.atomic():
+                            pks += _upsert(dataset, names, [data])
+                    except IntegrityError as exc:
+                        errors.append({'line': number, 'errors': {'non_field_errors': [
+                            f'Conflicts with existing data: {exc}'
+                        ]}})
+                    else:
+                        written += 1
+            _send_changed(dataset, groups, pks, previous)
+    return written, errors
+
+
+def _upsert(dataset, names, rows):
+    """Write the validated ``rows`` carrying the fields ``names``; returns their pks"""
+    model, key = dataset.model, dataset.key
+    instances = [model(**data) for data in rows]
+    update_fields = sorted(names - {key, 'id'})
+    if key not in names:
+        model.objects.bulk_create(instances)
+    elif update_fields:
+        model.objects.bulk_create(
+            instances, update_conflicts=True, unique_fields=[key],
+            update_fields=update_fields + _auto_now_fields(model),
+        )
+    else:
+        model.objects.bulk_create(instances, ignore_conflicts=True)
+    if key == 'id':
+        return [instance.pk for instance in instances if instance.pk is not None]
+    return list(model.objects.filter(
+        **{f'{key}__in': [getattr(instance, key) for instance in instances]}
+    ).values_list('pk', flat=True))
+
+
+def _previous_projects(dataset, groups):
+    """Projects the chunk's existing rows belong to before the upsert moves them"""
+    if 'project' not in dataset.relations:
+        return None
+    pks = [data['id'] for rows in groups.values() for number, data in rows.values() if data.get('id') is not None]
+    return set(dataset.model.objects.filter(pk__in=pks).values_list('project_id', flat=True))
+
+
+def _send_changed(dataset, groups, pks, previous_project_ids):
+    if not groups:
+        return
+    extra = {} if previous_project_ids is None else {'previous_project_ids': sorted(previous_project_ids)}
+    content_changed.send(sender=dataset.model, pks=pks, fields=sorted(set().union(*groups)), **extra)
+
+
+def import_rows(dataset, stream, fmt, chunk_size=IMPORT_CHUNK_SIZE):
+    """Upsert every record of ``stream`` into ``dataset``"""
+    rows = written = 0
+    errors = []
+    records = read_records(stream, fmt)
+    while True:
+        try:
+            chunk = list(itertools.islice(records, chunk_size))
+        except UnicodeDecodeError:
+            raise serializers.ValidationError({'file': [
+                f'The file is not UTF-8 text; {written} rows were imported before the invalid line.'
+            ]})
+        if not chunk:
+            break
+        rows += len(chunk)
+        chunk_written, chunk_errors = _import_chunk(dataset, chunk, fmt)
+        written += chunk_written
+        errors += chunk_errors[:MAX_REPORTED_ERRORS - len(errors)]
+    return ImportResult(rows, written, errors)
@@ -0,0 +1,126 @@
+"""
+Project view analytics and the precomputed trending ranking.
+
+``portfolio.counters`` appends one ``ProjectViewEvent`` per project each time
+a worker flushes its view buffer. ``refresh`` then, in the background:
+
+1. rolls the pending events up into ``ProjectDailyViews`` and deletes them.
+   Events are claimed by deleting them in the same transaction; when another
+   worker deleted some of them first, the rollup is rolled back and retried
+   on the next run, so no event is counted twice.
+2. rewrites ``TrendingProject`` with the best active projects by
+
+       sum(daily views * 0.5 ** (age in days / TRENDING_HALF_LIFE_DAYS))
+
+   over the last ``TRENDING_WINDOW_DAYS`` days. The rows are left alone
+   while the ranking keeps its order, so their stored scores may lag.
+
+Each worker starts the refresher on its first project view or trending
+listing.
+
+``manage.py refresh_trending_projects`` runs the same steps, e.g. from cron.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.background import PeriodicTask
+
+TRENDING_WINDOW_DAYS = 28
+TRENDING_HALF_LIFE_DAYS = 3
+TRENDING_PROJECTS_STORED = 20
+
+
+class _Contended(Exception):
+    """Another worker rolled up some of the same events"""
+
+
+def rollup_events():
+    """Move pending view events into the daily buckets; returns the event count"""
+    from .models import ProjectDailyViews, ProjectViewEvent
+
+    last_id = ProjectViewEvent.objects.aggregate(last=Max('id'))['last']
+    if last_id is None:
+        return 0
+    try:
+        with transaction.atomic():
+            pending = ProjectViewEvent.objects.filter(id__lte=last_id)
+            buckets = list(
+                pending.annotate(day=TruncDate('recorded_at')).values('project_id', 'day').annotate(
+                    views=Sum('views'), events=Count('id')
+                ).values_list('project_id', 'day', 'views', 'events').order_by()
+            )
+            events = sum(count for project_id, day, views, count in buckets)
+            if pending.delete()[0] != events:
+                raise _Contended
+
+            ProjectDailyViews.objects.bulk_create(
+                [ProjectDailyViews(project_id=project_id, day=day) for project_id, day, views, count in buckets],
+                ignore_conflicts=True,
+            )
+            # Like the views_count flush: one relative update per distinct increment
+            by_increment = defaultdict(lambda: defaultdict(list))
+            for project_id, day, views, count in buckets:
+                by_increment[views][day].append(project_id)
+            for views, days in sorted(by_increment.items()):
+                for day, ids in sorted(days.items()):
+                    ProjectDailyViews.objects.filter(day=day, project_id__in=sorted(ids)).update(
+                        views=F('views') + views
+                    )
+    except _Contended:
+        return 0
+    return events
+
+
+def compute_scores(today=None):
+    """Return ``{project id: trending score}`` for active projects with views"""
+    from .models import ProjectDailyViews
+
+    today = today or timezone.localdate()
+    scores = defaultdict(float)
+    rows = ProjectDailyViews.objects.filter(
+        day__gt=today - timedelta(days=TRENDING_WINDOW_DAYS),
+        project__is_active=True,
+    ).values_list('project_id', 'day', 'views').order_by().iterator(chunk_size=2000)
+    for project_id, day, views in rows:
+        age_days = max(0, (today - day).days)
+        scores[project_id] += views * 0.5 ** (age_days / TRENDING_HALF_LIFE_DAYS)
+    return scores
+
+
+def recompute_trending(today=None):
+    """Rewrite the stored ranking; returns the number of ranked projects"""
+    from .models import TrendingProject
+    from core.signals import content_changed
+
+    scores = compute_scores(today)
+    best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:TRENDING_PROJECTS_STORED]
+    ranking = [project_id for project_id, score in best]
+    if ranking == list(TrendingProject.objects.order_by('rank').values_list('project_id', flat=True)):
+        # Same order as stored: keep the rows, and the version clients cached
+        return len(best)
+    with transaction.atomic():
+        TrendingProject.objects.all().delete()
+        TrendingProject.objects.bulk_create([
+            TrendingProject(project_id=project_id, rank=rank, score=score)
+            for rank, (project_id, score) in enumerate(best)
+        ])
+        content_changed.send(sender=TrendingProject)
+    return len(best)
+
+
+def refresh():
+    rollup_events()
+    return recompute_trending()
+
+
+refresher = PeriodicTask(
+    refresh,
+    getattr(settings, 'PROJECT_TRENDING_REFRESH_INTERVAL', 300.0),
+    'project-trending-refresher',
+)
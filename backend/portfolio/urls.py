@@ -6,6 +6,8 @@ urlpatterns = [
     path('categories/', views.ProjectCategoryListView.as_view(), name='category-list'),
     path('projects/', views.ProjectListView.as_view(), name='project-list'),
     path('projects/featured/', views.FeaturedProjectsView.as_view(), name='featured-projects'),
+    path('projects/facets/', views.ProjectFacetsView.as_view(), name='project-facets'),
+    path('projects/trending/', views.TrendingProjectsView.as_view(), name='trending-projects'),
     path('projects/<slug:slug>/', views.ProjectDetailView.as_view(), name='project-detail'),
     path('projects/<slug:slug>/related/', views.get_related_projects, name='related-projects'),
     path('projects/<slug:project_slug>/testimonials/', views.ProjectTestimonialListView.as_view(), name='project-testimonials'),
@@ -15,11 +17,19 @@ urlpatterns = [
     
     # Admin endpoints
     path('admin/categories/', views.ProjectCategoryCreateView.as_view(), name='admin-category-create'),
+    path('admin/categories/bulk/', views.ProjectCategoryBulkView.as_view(), name='admin-category-bulk'),
     path('admin/categories/<slug:slug>/', views.ProjectCategoryDetailView.as_view(), name='admin-category-detail'),
     
     path('admin/projects/', views.ProjectCreateView.as_view(), name='admin-project-create'),
+    path('admin/projects/bulk/', views.ProjectBulkView.as_view(), name='admin-project-bulk'),
     path('admin/projects/<int:pk>/', views.ProjectDetailAdminView.as_view(), name='admin-project-detail'),
     
+    path('admin/images/', views.ProjectImageCreateView.as_view(), name='admin-image-create'),
+    path('admin/images/<int:pk>/', views.ProjectImageDetailView.as_view(), name='admin-image-detail'),
+    
     path('admin/testimonials/', views.ProjectTestimonialCreateView.as_view(), name='admin-testimonial-create'),
     path('admin/testimonials/<int:pk>/', views.ProjectTestimonialDetailView.as_view(), name='admin-testimonial-detail'),
+    
+    path('admin/export/<str:dataset>.<str:data_format>', views.export_portfolio_data, name='admin-export'),
+    path('admin/import/<str:dataset>/', views.import_portfolio_data, name='admin-import'),
 ]
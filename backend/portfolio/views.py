@@ -1,38 +1,68 @@
-from rest_framework import generics, permissions, filters
-from rest_framework.decorators import api_view, permission_classes
+import io
+
+from rest_framework import generics, permissions, filters, status
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
+from django.http import Http404, StreamingHttpResponse
+from django.db import transaction
 from django.db.models import Q
-from .models import ProjectCategory, Project, ProjectTestimonial
+from core.bulk import BulkWriteAPIView
+from core.models import Technology
+from core.fieldsets import SparseFieldsetMixin, resolve_fieldset, shape_queryset
+from core.language import LanguageProjectionMixin, project_queryset, resolve_language
+from core.pagination import KeysetOptInMixin, KeysetPagination
+from core.versioning import ConditionalGetMixin, conditional_on
+from . import detail_cache, transfer, trending
+from .counters import project_views
+from .models import (
+    ProjectCategory, Project, ProjectImage, ProjectTestimonial, ProjectRating, RelatedProject,
+    PortfolioStats, TrendingProject
+)
+from .queries import get_facets, public_categories, public_projects
+from .ratings import ProjectOrderingFilter
+from .search import ProjectSearchFilter
+from .stats import get_stats
 from .serializers import (
     ProjectCategorySerializer, 
     ProjectListSerializer, 
     ProjectDetailSerializer,
     ProjectCreateUpdateSerializer,
+    ProjectImageSerializer,
     ProjectTestimonialSerializer
 )
 
 
 # Public Views
 
-class ProjectCategoryListView(generics.ListAPIView):
+class ProjectCategoryListView(ConditionalGetMixin, SparseFieldsetMixin, LanguageProjectionMixin, generics.ListAPIView):
     """List all active project categories"""
-    queryset = ProjectCategory.objects.filter(is_active=True)
+    queryset = public_categories()
     serializer_class = ProjectCategorySerializer
     permission_classes = [permissions.AllowAny]
+    conditional_models = (ProjectCategory, Project)
+
+
+class ProjectKeysetPagination(KeysetPagination):
+    """Constant-cost pages in the default project order, for infinite scroll"""
+    ordering = ('-is_featured', 'order', '-created_at', 'id')
+    estimate_total_query_param = 'estimate_total'
 
 
-class ProjectListView(generics.ListAPIView):
+class ProjectListView(ConditionalGetMixin, KeysetOptInMixin, SparseFieldsetMixin, LanguageProjectionMixin, generics.ListAPIView):
     """List all active projects with filtering"""
     serializer_class = ProjectListSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    keyset_pagination_class = ProjectKeysetPagination
+    conditional_models = (Project, ProjectCategory, ProjectRating)
+    filter_backends = [ProjectOrderingFilter, ProjectSearchFilter]
     search_fields = ['title_fa', 'title_en', 'description_fa', 'description_en', 'technologies']
+    # ProjectOrderingFilter adds ``rating`` and ``rating_count``
     ordering_fields = ['created_at', 'views_count', 'order']
     ordering = ['-is_featured', '-created_at']
     
     def get_queryset(self):
-        queryset = Project.objects.filter(is_active=True)
+        queryset = public_projects()
         
         # Filter by category
         category_slug = self.request.query_params.get('category')
@@ -52,32 +82,75 @@ class ProjectListView(generics.ListAPIView):
         # Filter by technology
         tech = self.request.query_params.get('tech')
         if tech:
-            queryset = queryset.filter(technologies__contains=[tech])
+            queryset = queryset.filter(technology_tags__key=Technology.normalize_key(tech))
         
         return queryset
 
 
-class ProjectDetailView(generics.RetrieveAPIView):
+class ProjectFacetsView(ProjectListView):
+    """Project counts per technology, category and status for the current filters"""
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(get_facets(queryset, self.get_language()))
+
+
+class ProjectDetailView(SparseFieldsetMixin, LanguageProjectionMixin, generics.RetrieveAPIView):
     """Get project details"""
-    queryset = Project.objects.filter(is_active=True)
+    queryset = public_projects()
     serializer_class = ProjectDetailSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = 'slug'
+    count_views = True
+    
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related('testimonials', 'images')
     
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        instance.increment_views()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        project_id, is_active = detail_cache.resolve_slug(kwargs['slug'])
+        if not is_active:
+            raise Http404
+        
+        lang = self.get_language()
+        data = detail_cache.get_payload('detail', project_id, request, lang)
+        if data is None:
+            instance = self.get_object()
+            project_id = instance.pk
+            data = detail_cache.set_payload('detail', project_id, request, self.get_serializer(instance).data, lang)
+        
+        if self.count_views:
+            # Count the view even when ?fields= leaves the counter out
+            pending = project_views.record(project_id)
+            if 'views_count' in data:
+                data = dict(data, views_count=data['views_count'] + pending)
+        return Response(data)
 
 
-class FeaturedProjectsView(generics.ListAPIView):
+class FeaturedProjectsView(ConditionalGetMixin, KeysetOptInMixin, SparseFieldsetMixin, LanguageProjectionMixin, generics.ListAPIView):
     """Get featured projects"""
     serializer_class = ProjectListSerializer
     permission_classes = [permissions.AllowAny]
+    keyset_pagination_class = ProjectKeysetPagination
+    conditional_models = (Project, ProjectCategory, ProjectRating)
     
     def get_queryset(self):
-        return Project.objects.filter(is_active=True, is_featured=True)
+        return public_projects().filter(is_featured=True)
+
+
+class TrendingProjectsView(ConditionalGetMixin, SparseFieldsetMixin, LanguageProjectionMixin, generics.ListAPIView):
+    """Get the projects with the most recent views"""
+    serializer_class = ProjectListSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = None
+    conditional_models = (TrendingProject, Project, ProjectCategory, ProjectRating)
+    
+    def get(self, request, *args, **kwargs):
+        # Keep the ranking decaying even in a worker that has not counted a view yet
+        trending.refresher.start()
+        return super().get(request, *args, **kwargs)
+    
+    def get_queryset(self):
+        return public_projects().filter(trending__isnull=False).order_by('trending__rank')
 
 
 # Admin Views
@@ -97,6 +170,12 @@ class ProjectCategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     lookup_field = 'slug'
 
 
+class ProjectCategoryBulkView(BulkWriteAPIView):
+    """Create, update and reorder project categories in bulk (admin only)"""
+    queryset = ProjectCategory.objects.all()
+    serializer_class = ProjectCategorySerializer
+
+
 class ProjectCreateView(generics.CreateAPIView):
     """Create project (admin only)"""
     queryset = Project.objects.all()
@@ -111,15 +190,50 @@ class ProjectDetailAdminView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAdminUser]
 
 
-class ProjectTestimonialListView(generics.ListAPIView):
+class ProjectBulkView(BulkWriteAPIView):
+    """Create, update and reorder projects in bulk (admin only)"""
+    queryset = Project.objects.all()
+    serializer_class = ProjectCreateUpdateSerializer
+
+
+class ProjectTestimonialListView(ConditionalGetMixin, SparseFieldsetMixin, LanguageProjectionMixin, generics.ListAPIView):
     """List testimonials for a project"""
     serializer_class = ProjectTestimonialSerializer
     permission_classes = [permissions.AllowAny]
+    conditional_models = (ProjectTestimonial, Project)
+    
+    def get_project_id(self):
+        project_id, is_active = detail_cache.resolve_slug(self.kwargs.get('project_slug'))
+        if project_id is None:
+            raise Http404
+        return project_id
     
     def get_queryset(self):
-        project_slug = self.kwargs.get('project_slug')
-        project = get_object_or_404(Project, slug=project_slug)
-        return project.testimonials.filter(is_active=True)
+        return ProjectTestimonial.objects.filter(project_id=self.get_project_id(), is_active=True)
+    
+    def list(self, request, *args, **kwargs):
+        project_id = self.get_project_id()
+        lang = self.get_language()
+        data = detail_cache.get_payload('testimonials', project_id, request, lang)
+        if data is None:
+            data = detail_cache.set_payload(
+                'testimonials', project_id, request, super().list(request, *args, **kwargs).data, lang
+            )
+        return Response(data)
+
+
+class ProjectImageCreateView(generics.CreateAPIView):
+    """Upload a gallery image (admin only)"""
+    queryset = ProjectImage.objects.all()
+    serializer_class = ProjectImageSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+
+class ProjectImageDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """Manage gallery image (admin only)"""
+    queryset = ProjectImage.objects.all()
+    serializer_class = ProjectImageSerializer
+    permission_classes = [permissions.IsAdminUser]
 
 
 class ProjectTestimonialCreateView(generics.CreateAPIView):
@@ -127,6 +241,11 @@ class ProjectTestimonialCreateView(generics.CreateAPIView):
     queryset = ProjectTestimonial.objects.all()
     serializer_class = ProjectTestimonialSerializer
     permission_classes = [permissions.IsAdminUser]
+    
+    def perform_create(self, serializer):
+        # The testimonial and its project's rating aggregates commit together
+        with transaction.atomic():
+            serializer.save()
 
 
 class ProjectTestimonialDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -134,46 +253,79 @@ class ProjectTestimonialDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = ProjectTestimonial.objects.all()
     serializer_class = ProjectTestimonialSerializer
     permission_classes = [permissions.IsAdminUser]
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
 
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@conditional_on(PortfolioStats)
 def get_portfolio_stats(request):
     """Get portfolio statistics"""
-    total_projects = Project.objects.filter(is_active=True).count()
-    completed_projects = Project.objects.filter(is_active=True, status='completed').count()
-    in_progress_projects = Project.objects.filter(is_active=True, status='in_progress').count()
-    featured_projects = Project.objects.filter(is_active=True, is_featured=True).count()
-    categories_count = ProjectCategory.objects.filter(is_active=True).count()
-    
-    return Response({
-        'total_projects': total_projects,
-        'completed_projects': completed_projects,
-        'in_progress_projects': in_progress_projects,
-        'featured_projects': featured_projects,
-        'categories_count': categories_count,
-    })
+    return Response(get_stats())
 
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@conditional_on(Project, ProjectCategory, ProjectRating, RelatedProject)
 def get_related_projects(request, slug):
     """Get related projects"""
-    project = get_object_or_404(Project, slug=slug, is_active=True)
-    
-    # Get projects in the same category, excluding current project
-    related = Project.objects.filter(
-        category=project.category,
-        is_active=True
-    ).exclude(id=project.id)[:4]
-    
-    # If not enough, add projects with similar technologies
-    if len(related) < 4 and project.technologies:
-        tech_related = Project.objects.filter(
-            technologies__overlap=project.technologies,
-            is_active=True
-        ).exclude(id=project.id).exclude(id__in=[p.id for p in related])[:4-len(related)]
-        related = list(related) + list(tech_related)
-    
-    serializer = ProjectListSerializer(related, many=True)
+    lang = resolve_language(request)
+    fieldset = resolve_fieldset(request)
+    related = project_queryset(public_projects(), ProjectListSerializer, lang)
+    related = shape_queryset(related, ProjectListSerializer, lang, fieldset).filter(
+        neighbour_of__project__slug=slug,
+        neighbour_of__project__is_active=True
+    ).order_by('neighbour_of__rank')[:4]
+    
+    # An empty result is ambiguous: no neighbours, or no such project
+    if not related and not Project.objects.filter(slug=slug, is_active=True).exists():
+        raise Http404
+    
+    serializer = ProjectListSerializer(related, many=True, context={'lang': lang, 'fieldset': fieldset})
     return Response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_portfolio_data(request, dataset, data_format):
+    """Stream a portfolio dataset as NDJSON or CSV (admin only)"""
+    if dataset not in transfer.DATASETS or data_format not in transfer.FORMATS:
+        raise Http404
+    response = StreamingHttpResponse(
+        transfer.export_rows(transfer.DATASETS[dataset], data_format),
+        content_type=transfer.CONTENT_TYPES[data_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{data_format}"'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+@parser_classes([MultiPartParser])
+def import_portfolio_data(request, dataset):
+    """Upsert a portfolio dataset from an uploaded NDJSON or CSV file (admin only)"""
+    if dataset not in transfer.DATASETS:
+        raise Http404
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'detail': 'Upload the data as "file".'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    fmt = request.data.get('format') or transfer.guess_format(upload.name)
+    if fmt not in transfer.FORMATS:
+        return Response({'detail': f'Format must be one of {", ".join(transfer.FORMATS)}.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+    result = transfer.import_rows(transfer.DATASETS[dataset], stream, fmt)
+    return Response({
+        'rows': result.rows,
+        'written': result.written,
+        'skipped': result.rows - result.written,
+        'errors': result.errors,
+    })